@@ -0,0 +1,20 @@
+"""Helpers for importing the agent package from benchmark scripts.
+
+The package directory is named ``telegram-assistant`` (the ADK app name),
+which is not a valid identifier, so it is imported through importlib.
+"""
+
+import importlib
+import os
+import sys
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "telegram-assistant"
+
+if AGENT_DIR not in sys.path:
+    sys.path.insert(0, AGENT_DIR)
+
+
+def load(module: str):
+    """Import ``telegram-assistant.<module>`` and return it."""
+    return importlib.import_module(f"{PACKAGE}.{module}")
@@ -0,0 +1,174 @@
+"""Event storage size and session load time: ADK JSON vs compact encoding.
+
+Takes a sample of conversations from a session database (``--db-url``,
+e.g. production ``adk_sessions``) or, without one, synthetic conversations
+shaped like this agent's: user messages, send_lead_to_backend calls with
+backend responses, model replies and usage metadata. Reports the bytes of
+the fields the compact encoding moves out of the ``events`` row, then writes
+the sample into two temporary SQLite databases, one per encoding, and times
+loading the sessions back.
+
+Usage:
+    python benchmarks/event_encoding_benchmark.py [--db-url URL] [--sessions 50]
+        [--turns 20] [--loads 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from google.adk.events import Event
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from _package import load
+
+compact_events = load("sessions.compact_events")
+
+_WORDS = (
+    "ручка цвет синий чернила доставка курьер заказ оплата возврат гарантия "
+    "скидка компания документы чек телефон менеджер качество стержень "
+    "корпус металл пластик подарок упаковка гравировка наличие склад срок"
+).split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(_WORDS, k=words))
+
+
+def _synthetic_session(rng: random.Random, turns: int) -> list:
+    events = []
+    for turn in range(turns):
+        invocation = f"e-{rng.getrandbits(64):x}"
+        events.append(Event(
+            author="user", invocation_id=invocation,
+            content=types.Content(role="user", parts=[types.Part(text=_text(rng, 15))]),
+        ))
+        if turn % 3 == 1:
+            lead = {
+                "lead_data": {
+                    "name": "Иван Петров", "phone": "+79161234567",
+                    "email": "ivan@example.com", "telegramId": str(rng.randint(10**8, 10**9)),
+                    "notes": _text(rng, 30),
+                }
+            }
+            events.append(Event(
+                author="agent", invocation_id=invocation,
+                content=types.Content(role="model", parts=[types.Part(
+                    function_call=types.FunctionCall(name="send_lead_to_backend", args=lead)
+                )]),
+            ))
+            events.append(Event(
+                author="agent", invocation_id=invocation,
+                content=types.Content(role="user", parts=[types.Part(
+                    function_response=types.FunctionResponse(
+                        name="send_lead_to_backend",
+                        response={"status": "success", "lead": {**lead["lead_data"],
+                                  "id": f"{rng.getrandbits(128):032x}", "status": "NEW",
+                                  "createdAt": "2025-10-01T12:00:00.000Z"}},
+                    )
+                )]),
+            ))
+        events.append(Event(
+            author="agent", invocation_id=invocation,
+            content=types.Content(role="model", parts=[types.Part(text=_text(rng, 60))]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=rng.randint(2000, 6000),
+                candidates_token_count=rng.randint(50, 300),
+                total_token_count=rng.randint(2100, 6300),
+            ),
+        ))
+    return events
+
+
+async def _sample(db_url: str, app_name: str, sessions: int) -> list:
+    source = DatabaseSessionService(db_url=db_url)
+    listed = (await source.list_sessions(app_name=app_name)).sessions
+    sample = []
+    for session in listed[:sessions]:
+        full = await source.get_session(
+            app_name=session.app_name, user_id=session.user_id, session_id=session.id
+        )
+        sample.append(full.events)
+    return sample
+
+
+def _json_bytes(event: Event) -> int:
+    # What ADK writes into the events row for the fields the compact
+    # encoding moves out.
+    return sum(
+        len(json.dumps(getattr(event, name).model_dump(exclude_none=True, mode="json")).encode())
+        for name in compact_events.PAYLOAD_FIELDS
+        if getattr(event, name) is not None
+    )
+
+
+async def _load_times(service, sessions: list, loads: int) -> list:
+    ids = []
+    for events in sessions:
+        session = await service.create_session(app_name="bench", user_id="user")
+        for event in events:
+            await service.append_event(session, event.model_copy(update={"id": Event.new_id()}))
+        ids.append(session.id)
+    latencies = []
+    for _ in range(loads):
+        for session_id in ids:
+            started = time.perf_counter()
+            await service.get_session(app_name="bench", user_id="user", session_id=session_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def run(args) -> None:
+    if args.db_url:
+        sessions = await _sample(args.db_url, args.app_name, args.sessions)
+        print(f"{len(sessions)} sessions from {args.db_url.split('@')[-1]}")
+    else:
+        rng = random.Random(0)
+        sessions = [_synthetic_session(rng, args.turns) for _ in range(args.sessions)]
+        print(f"{len(sessions)} synthetic sessions of {args.turns} turns")
+
+    codec = compact_events.EventCodec(args.level)
+    events = [event for session in sessions for event in session]
+    json_total = sum(_json_bytes(event) for event in events)
+    compact_total = sum(len(codec.encode(event) or b"") for event in events)
+    print(
+        f"{len(events)} events | JSON {json_total / 1024:9.1f} KiB | "
+        f"compact {compact_total / 1024:9.1f} KiB | {json_total / compact_total:5.2f}x smaller"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain = DatabaseSessionService(db_url=f"sqlite:///{os.path.join(directory, 'json.db')}")
+        compact = compact_events.CompactEventSessionService(
+            DatabaseSessionService(db_url=f"sqlite:///{os.path.join(directory, 'compact.db')}"),
+            level=args.level,
+        )
+        for name, service in (("json", plain), ("compact", compact)):
+            latencies = await _load_times(service, sessions, args.loads)
+            size = os.path.getsize(os.path.join(directory, f"{name}.db"))
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(
+                f"{name:<8} | db file {size / 1024:9.1f} KiB | "
+                f"get_session p50 {p50:7.3f}ms p99 {p99:7.3f}ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", default=None, help="sample real sessions from this database")
+    parser.add_argument("--app-name", default="telegram_customer_service_app")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20, help="turns per synthetic session")
+    parser.add_argument("--loads", type=int, default=20, help="loads per session")
+    parser.add_argument("--level", type=int, default=3, help="zstd level")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
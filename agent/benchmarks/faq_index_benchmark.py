@@ -0,0 +1,74 @@
+"""Query latency of the FAQ index at 10k and 100k entries.
+
+Usage:
+    python benchmarks/faq_index_benchmark.py [--sizes 10000 100000] [--queries 500]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from _package import load
+
+faq_index = load("services.faq_index")
+
+_WORDS = (
+    "ручка цвет синий чернила доставка курьер заказ оплата возврат гарантия "
+    "скидка компания документы чек email телефон менеджер качество стержень "
+    "корпус металл пластик подарок упаковка гравировка наличие склад срок"
+).split()
+
+
+def _synthetic_entries(count: int, rng: random.Random) -> list:
+    return [
+        {
+            "question": " ".join(rng.choices(_WORDS, k=8)) + f" #{i}",
+            "answer": " ".join(rng.choices(_WORDS, k=20)),
+        }
+        for i in range(count)
+    ]
+
+
+def run(size: int, queries: int, top_k: int, dim: int) -> None:
+    rng = random.Random(size)
+    entries = _synthetic_entries(size, rng)
+    with tempfile.TemporaryDirectory() as index_dir:
+        started = time.perf_counter()
+        faq_index.build_faq_index(entries, index_dir, dim=dim)
+        build_secs = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = faq_index.FaqIndex(index_dir)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        questions = [" ".join(rng.choices(_WORDS, k=6)) for _ in range(queries)]
+        index.search(questions[0], top_k=top_k)  # fault the pages in
+        latencies = []
+        for question in questions:
+            started = time.perf_counter()
+            index.search(question, top_k=top_k)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(
+        f"{size:>8} entries | build {build_secs:6.2f}s | load {load_ms:6.2f}ms | "
+        f"query p50 {p50:6.3f}ms p95 {p95:6.3f}ms p99 {p99:6.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=faq_index.DEFAULT_DIM)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.top_k, args.dim)
+
+
+if __name__ == "__main__":
+    main()
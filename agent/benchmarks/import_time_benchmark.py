@@ -0,0 +1,95 @@
+"""Import time of the agent module, checked against a budget.
+
+Imports ``telegram-assistant.agent`` in fresh interpreters under
+``python -X importtime`` and takes the median over the runs. Two numbers
+are checked:
+
+- total: the cumulative import time of the agent module, google.adk included;
+- own: total minus google.adk, i.e. what the agent package itself adds.
+
+Exits with status 1 when either median is over its budget, so it can gate CI.
+
+Usage:
+    python benchmarks/import_time_benchmark.py [--runs 5] [--budget-ms 12000]
+        [--own-budget-ms 100] [--top 15]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from _package import AGENT_DIR, PACKAGE
+
+MODULE = f"{PACKAGE}.agent"
+FRAMEWORK = "google.adk"
+
+
+def _importtime(module: str) -> List[Tuple[str, int, int]]:
+    # __import__ goes through the C import path that -X importtime reports on;
+    # importlib.import_module does not.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"__import__({module!r})"],
+        cwd=AGENT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(runs: int) -> Tuple[float, float, Dict[str, float]]:
+    """Return median total ms, median own ms and median self ms per module."""
+    totals, own = [], []
+    self_ms: Dict[str, List[float]] = {}
+    for _ in range(runs):
+        cumulative = {}
+        for name, self_us, cumulative_us in _importtime(MODULE):
+            cumulative[name] = cumulative_us / 1000
+            self_ms.setdefault(name, []).append(self_us / 1000)
+        totals.append(cumulative[MODULE])
+        own.append(cumulative[MODULE] - cumulative.get(FRAMEWORK, 0.0))
+    return (
+        statistics.median(totals),
+        statistics.median(own),
+        {name: statistics.median(values) for name, values in self_ms.items()},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=12000, help="budget for the total")
+    parser.add_argument(
+        "--own-budget-ms", type=float, default=100, help="budget for the package's own share"
+    )
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = parser.parse_args()
+
+    total, own, self_ms = measure(args.runs)
+    print(f"import {MODULE}: median of {args.runs} runs")
+    print(f"  total {total:9.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"  own   {own:9.1f} ms (budget {args.own_budget_ms:.0f} ms)")
+    print("slowest modules by self time:")
+    for name, ms in sorted(self_ms.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"  {ms:9.1f} ms  {name}")
+
+    over = []
+    if total > args.budget_ms:
+        over.append(f"total {total:.1f} ms > {args.budget_ms:.0f} ms")
+    if own > args.own_budget_ms:
+        over.append(f"own {own:.1f} ms > {args.own_budget_ms:.0f} ms")
+    if over:
+        print("OVER BUDGET: " + "; ".join(over))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
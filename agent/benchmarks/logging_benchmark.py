@@ -0,0 +1,123 @@
+"""Logging cost on the request path: plain vs production mode.
+
+Each mode runs in its own process (logging is configured once per process)
+with output going to /dev/null, as in a container whose stdout is a pipe.
+Several threads log INFO records with a lead-sized payload, like the tools
+do. Reported per mode:
+
+- caller: records per second and per-call latency seen by the logging threads;
+- drained: records per second until the last record has been written.
+
+``plain`` with LOG_LEVEL=DEBUG is the previous setup (basicConfig(DEBUG) at
+import). The benchmark logger is not rate limited, so every record is written.
+
+Usage:
+    python benchmarks/logging_benchmark.py [--threads 8] [--records 20000]
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from _package import AGENT_DIR, load
+
+PAYLOAD = {
+    "name": "Иван Петров",
+    "phone": "+7 (916) 123-45-67",
+    "email": "ivan.petrov@example.com",
+    "telegramId": "123456789",
+    "notes": "Хочет подключить тариф для команды из 15 человек" * 3,
+}
+MODES = {"plain (previous, DEBUG)": ("plain", "DEBUG"), "production": ("production", "INFO")}
+
+
+def _child(mode: str, level: str, threads: int, records: int, result_path: str) -> None:
+    config_module = load("config")
+    logging_config = load("shared_libraries.logging_config")
+    logging_config.configure_logging(config_module.Config(LOG_MODE=mode, LOG_LEVEL=level))
+    logger = logging.getLogger(f"{config_module.__package__}.benchmark")
+
+    latencies = [None] * threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index: int) -> None:
+        own = []
+        barrier.wait()
+        for i in range(records):
+            started = time.perf_counter()
+            logger.info(">>> Sending validated lead %i to backend API: %s", i, PAYLOAD)
+            own.append(time.perf_counter() - started)
+        latencies[index] = own
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    caller_secs = time.perf_counter() - started
+    logging_config._stop_listener()
+    drained_secs = time.perf_counter() - started
+
+    all_latencies = np.concatenate([np.array(own) for own in latencies]) * 1e6
+    p50, p99 = np.percentile(all_latencies, [50, 99])
+    with open(result_path, "w") as f:
+        json.dump(
+            {
+                "total": threads * records,
+                "caller_secs": caller_secs,
+                "drained_secs": drained_secs,
+                "p50_us": p50,
+                "p99_us": p99,
+            },
+            f,
+        )
+
+
+def run(mode: str, level: str, threads: int, records: int) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json") as result:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, level,
+             "--threads", str(threads), "--records", str(records), "--result", result.name],
+            cwd=AGENT_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        with open(result.name) as f:
+            return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--records", type=int, default=20000, help="records per thread")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "LEVEL"), help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child, args.threads, args.records, args.result)
+        return
+
+    print(f"{args.threads} threads x {args.records} records")
+    for name, (mode, level) in MODES.items():
+        stats = run(mode, level, args.threads, args.records)
+        print(
+            f"{name:<24} | caller {stats['total'] / stats['caller_secs']:9.0f} rec/s "
+            f"p50 {stats['p50_us']:6.1f}us p99 {stats['p99_us']:7.1f}us | "
+            f"drained {stats['total'] / stats['drained_secs']:9.0f} rec/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compiled argument normalizer vs. the old recursive lowercase_value.
+
+The old before_tool rebuilt a lowercase copy of every nested container and
+discarded it; the compiled normalizer rewrites only the fields named in the
+tool schema, in place.
+
+Usage:
+    python benchmarks/normalization_benchmark.py [--items 1000] [--repeat 200]
+"""
+
+import argparse
+import copy
+import time
+
+from _package import load
+
+normalization = load("shared_libraries.normalization")
+
+
+def lowercase_value(value):
+    """The recursive implementation previously called from before_tool."""
+    if isinstance(value, dict):
+        return dict((k, lowercase_value(v)) for k, v in value.items())
+    elif isinstance(value, str):
+        return value.lower()
+    elif isinstance(value, (list, set, tuple)):
+        tp = type(value)
+        return tp(lowercase_value(i) for i in value)
+    else:
+        return value
+
+
+def _large_args(items: int) -> dict:
+    return {
+        "lead_data": {
+            "name": "  Иван Петров ",
+            "phone": "8 (999) 123-45-67",
+            "email": " Ivan.Petrov@Example.COM ",
+            "company": "ООО Ромашка ",
+            "notes": "Перезвонить вечером " * 20,
+            "history": [
+                {"text": f"Сообщение {i} ", "tags": ["A", "B", "C"], "meta": {"n": i}}
+                for i in range(items)
+            ],
+        },
+        "contacts": [
+            {"email": f" User{i}@Example.com ", "phone": "+7 999 000 00 00"}
+            for i in range(items)
+        ],
+    }
+
+
+_SCHEMA = dict(
+    normalization.TOOL_ARG_SCHEMAS["send_lead_to_backend"],
+    **{
+        "lead_data.history[].text": ("strip",),
+        "contacts[].email": ("strip", "lower"),
+        "contacts[].phone": ("phone",),
+    },
+)
+
+
+def _time(function, inputs) -> float:
+    started = time.perf_counter()
+    for args in inputs:
+        function(args)
+    return (time.perf_counter() - started) / len(inputs) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    tool_normalizer = normalization.compile_normalizer(
+        normalization.TOOL_ARG_SCHEMAS["send_lead_to_backend"]
+    )
+    nested_normalizer = normalization.compile_normalizer(_SCHEMA)
+    print("per call: lowercase_value | tool schema | schema with list rules")
+    for items in args.items:
+        template = _large_args(items)
+        legacy_us = _time(lowercase_value, [template] * args.repeat)
+        tool_us = _time(
+            tool_normalizer, [copy.deepcopy(template) for _ in range(args.repeat)]
+        )
+        nested_us = _time(
+            nested_normalizer, [copy.deepcopy(template) for _ in range(args.repeat)]
+        )
+        print(
+            f"{items:>6} nested items | {legacy_us:10.1f}us | {tool_us:8.1f}us | "
+            f"{nested_us:10.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Throughput of the agent server by uvicorn worker count.
+
+Starts ``telegram-assistant.server`` with in-memory sessions for each worker
+count and drives it with keep-alive HTTP clients. The default path is a
+model-free ADK endpoint, so the numbers show how the server stack scales
+with workers; /run turns are bounded by Gemini latency instead.
+
+Usage:
+    python benchmarks/server_load_benchmark.py [--workers 1 2 4] [--seconds 10]
+        [--clients 4] [--concurrency 32] [--path /list-apps]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from _package import AGENT_DIR
+
+
+async def _drive(url: str, seconds: float, concurrency: int) -> list:
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def _client(args) -> list:
+    url, seconds, concurrency = args
+    return asyncio.run(_drive(url, seconds, concurrency))
+
+
+def _wait_ready(url: str, timeout: float = 120) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server did not become ready at {url}")
+
+
+def run(workers: int, port: int, path: str, seconds: float, clients: int, concurrency: int) -> None:
+    env = dict(os.environ, SERVER_ACCESS_LOG="false", SESSION_SERVICE_URI="")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "telegram-assistant.server", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers)],
+        cwd=AGENT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}{path}"
+        _wait_ready(url)
+        per_client = max(1, concurrency // clients)
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(_client, [(url, seconds, per_client)] * clients)
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait(timeout=30)
+
+    latencies = [latency * 1000 for result in results for latency in result]
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(
+        f"{workers:>3} workers | {len(latencies) / seconds:9.0f} req/s | "
+        f"p50 {p50:7.2f}ms p99 {p99:7.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/list-apps")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="total concurrent requests")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, GET {args.path}, concurrency {args.concurrency}")
+    for workers in args.workers:
+        run(workers, args.port, args.path, args.seconds, args.clients, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""get_session latency with and without the session cache, by session length.
+
+Creates one session per size, fills it with model-sized events and loads it
+repeatedly through DatabaseSessionService and through CachedSessionService.
+Uses a temporary SQLite database unless ``--db-url`` points at PostgreSQL,
+which is what production numbers should be taken from.
+
+Usage:
+    python benchmarks/session_cache_benchmark.py [--events 10 50 200] [--loads 200]
+        [--db-url postgresql://...]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+from google.adk.events import Event
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from _package import load
+
+cached_session_service = load("sessions.cached_session_service")
+metrics = load("shared_libraries.metrics")
+
+
+async def _fill(service, events: int):
+    session = await service.create_session(app_name="bench", user_id="user")
+    for i in range(events):
+        author = "user" if i % 2 == 0 else "agent"
+        text = f"Сообщение {i}: " + "хочу заказать ручки с гравировкой " * 10
+        await service.append_event(
+            session,
+            Event(
+                author=author,
+                invocation_id=f"inv-{i // 2}",
+                content=types.Content(role="user" if author == "user" else "model",
+                                      parts=[types.Part(text=text)]),
+            ),
+        )
+    return session.id
+
+
+async def _latencies(service, session_id: str, loads: int) -> list:
+    latencies = []
+    for _ in range(loads):
+        started = time.perf_counter()
+        await service.get_session(app_name="bench", user_id="user", session_id=session_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def run(db_url: str, sizes: list, loads: int) -> None:
+    database = DatabaseSessionService(db_url=db_url)
+    cached = cached_session_service.CachedSessionService(database)
+    for events in sizes:
+        session_id = await _fill(database, events)
+        uncached = await _latencies(database, session_id, loads)
+        with_cache = await _latencies(cached, session_id, loads)
+        u50, u99 = np.percentile(uncached, [50, 99])
+        c50, c99 = np.percentile(with_cache, [50, 99])
+        print(
+            f"{events:>5} events | uncached p50 {u50:7.3f}ms p99 {u99:7.3f}ms | "
+            f"cached p50 {c50:7.3f}ms p99 {c99:7.3f}ms"
+        )
+    stats = metrics.snapshot()
+    lookups = stats["agent_session_cache_lookups_total"]
+    hits = lookups.get(("hit",), 0)
+    print(
+        f"hit rate {hits / sum(lookups.values()):.1%}, "
+        f"queries saved {stats['agent_session_cache_db_queries_saved_total'].get((), 0):.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--loads", type=int, default=200)
+    parser.add_argument("--db-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_url = args.db_url or f"sqlite:///{os.path.join(directory, 'sessions.db')}"
+        asyncio.run(run(db_url, args.events, args.loads))
+
+
+if __name__ == "__main__":
+    main()
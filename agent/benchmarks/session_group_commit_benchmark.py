@@ -0,0 +1,168 @@
+"""Commits per turn with per-event appends, per-invocation and cross-session group commit.
+
+Runs concurrent users through an ADK Runner with a scripted agent whose turns
+look like the assistant's: the user message, a function call, its response
+and a reply carrying a state delta. Each mode stores sessions in the same
+database:
+
+- ``per_event``: DatabaseSessionService, one transaction per event (before);
+- ``invocation``: GroupCommitSessionService, one transaction per turn;
+- ``window``: the same, with flushes of concurrent sessions sharing a
+  transaction within ``--window-ms``.
+
+Commits are counted on the engine. Uses a temporary SQLite database unless
+``--db-url`` points at PostgreSQL, which is what production numbers should
+be taken from; ``postgresql+asyncpg://`` runs the asyncio service, whose
+turns overlap while they wait for the database.
+
+Usage:
+    python benchmarks/session_group_commit_benchmark.py [--users 20] [--turns 10]
+        [--window-ms 5] [--db-url postgresql://...]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+from google.adk.agents import BaseAgent
+from google.adk.apps import App
+from google.adk.events import Event, EventActions
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from _package import load
+
+async_database_session_service = load("sessions.async_database_session_service")
+group_commit = load("sessions.group_commit")
+
+APP_NAME = "bench"
+
+
+class ScriptedAgent(BaseAgent):
+    """Answers every message with a function call, its response and a reply."""
+
+    async def _run_async_impl(self, ctx):
+        turn = ctx.session.state.get("turns", 0)
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            content=types.Content(
+                role="model",
+                parts=[types.Part(function_call=types.FunctionCall(name="find_product", args={"q": "ручки"}))],
+            ),
+        )
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            content=types.Content(
+                role="user",
+                parts=[
+                    types.Part(
+                        function_response=types.FunctionResponse(
+                            name="find_product", response={"items": ["ручка с гравировкой"] * 5}
+                        )
+                    )
+                ],
+            ),
+        )
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            content=types.Content(
+                role="model", parts=[types.Part(text="Подберу ручки с гравировкой. " * 10)]
+            ),
+            actions=EventActions(state_delta={"turns": turn + 1}),
+        )
+
+
+def _database(db_url: str):
+    if db_url.startswith(("postgresql+asyncpg", "sqlite+aiosqlite")):
+        return async_database_session_service.AsyncDatabaseSessionService(db_url)
+    return DatabaseSessionService(db_url=db_url)
+
+
+def _count_commits(engine) -> list:
+    commits = [0]
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+
+    def on_commit(connection):
+        commits[0] += 1
+
+    sqlalchemy_event.listen(engine, "commit", on_commit)
+    return commits
+
+
+async def _user(runner, service, user: int, turns: int, latencies: list) -> None:
+    session = await service.create_session(app_name=APP_NAME, user_id=f"user-{user}")
+    for turn in range(turns):
+        message = types.Content(role="user", parts=[types.Part(text=f"Хочу заказать ручки, {turn}")])
+        started = time.perf_counter()
+        async for _ in runner.run_async(
+            user_id=session.user_id, session_id=session.id, new_message=message
+        ):
+            pass
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def _run_mode(mode: str, db_url: str, users: int, turns: int, window_ms: float) -> None:
+    database = _database(db_url)
+    service = database
+    if mode != "per_event":
+        service = group_commit.GroupCommitSessionService(
+            database, window_ms=window_ms if mode == "window" else 0, min_sessions=2
+        )
+    # Creates the tables before counting.
+    await database.list_sessions(app_name=APP_NAME)
+    commits = _count_commits(database.db_engine)
+    runner = Runner(
+        app=App(
+            name=APP_NAME,
+            root_agent=ScriptedAgent(name="bench_agent"),
+            plugins=[group_commit.SessionFlushPlugin()],
+        ),
+        session_service=service,
+    )
+
+    latencies: list = []
+    started = time.perf_counter()
+    await asyncio.gather(*(_user(runner, service, user, turns, latencies) for user in range(users)))
+    elapsed = time.perf_counter() - started
+    if isinstance(database.db_engine, AsyncEngine):
+        await database.db_engine.dispose()
+
+    # Session creation commits once per user.
+    per_turn = (commits[0] - users) / (users * turns)
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(
+        f"{mode:<10} {per_turn:5.2f} commits/turn | turn p50 {p50:7.2f}ms p99 {p99:7.2f}ms | "
+        f"{users * turns / elapsed:7.1f} turns/s"
+    )
+
+
+async def run(db_url: str, users: int, turns: int, window_ms: float) -> None:
+    for mode in ("per_event", "invocation", "window"):
+        await _run_mode(mode, db_url, users, turns, window_ms)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="concurrent users")
+    parser.add_argument("--turns", type=int, default=10, help="turns per user")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--db-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_url = args.db_url or f"sqlite:///{os.path.join(directory, 'sessions.db')}"
+        asyncio.run(run(db_url, args.users, args.turns, args.window_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -28,32 +28,70 @@ agent = root_agent
 ```
 """
 
-import os
-import logging
 from google.adk import Agent
-from google.adk.sessions import DatabaseSessionService  # ✅ Правильный импорт
+from google.adk.models import Gemini
 from .config import Config
 from .prompts import GLOBAL_INSTRUCTION, INSTRUCTION
 from .tools.tools import send_lead_to_backend
 from .shared_libraries.callbacks import (
+    model_budget_callback,
     rate_limit_callback,
+    inject_faq_context,
+    inject_history_summary,
+    start_turn_timer,
+    record_turn_metrics,
+    start_model_timer,
+    record_model_metrics,
+    record_token_usage,
     before_agent,
+    after_agent,
+    before_model_trace,
+    after_model_trace,
     before_tool,
     after_tool,
+    configure_tools,
 )
+from .services.token_usage import token_usage_db_url
+from .shared_libraries.tracing import get_tracer
 
-logger = logging.getLogger(__name__)
 configs = Config()
 
-# 2. Агент
+# 1. Инструменты; нормализаторы и валидаторы их аргументов собираются один раз
+tools = [send_lead_to_backend]
+configure_tools(tools)
+
+# Колбэки трассировки подключаются только при TRACE_ENABLED
+tracing = get_tracer() is not None
+
+# 2. Агент; один экземпляр модели, чтобы HTTP-клиент Gemini и его соединения
+# переиспользовались между ходами, а не создавались на каждый вызов
 root_agent = Agent(
-    model=configs.agent_settings.model,
+    model=Gemini(model=configs.agent_settings.model),
     global_instruction=GLOBAL_INSTRUCTION,
     instruction=INSTRUCTION,
     name=configs.agent_settings.name,
-    tools=[send_lead_to_backend],
+    tools=tools,
     before_tool_callback=before_tool,
     after_tool_callback=after_tool,
-    before_agent_callback=before_agent,
-    before_model_callback=rate_limit_callback,
+    before_agent_callback=[
+        start_turn_timer,
+        *([before_agent] if tracing else []),
+    ],
+    after_agent_callback=[
+        record_turn_metrics,
+        *([after_agent] if tracing else []),
+    ],
+    before_model_callback=[
+        model_budget_callback,
+        rate_limit_callback,
+        inject_faq_context,
+        inject_history_summary,
+        start_model_timer,
+        *([before_model_trace] if tracing else []),
+    ],
+    after_model_callback=[
+        record_model_metrics,
+        *([record_token_usage] if token_usage_db_url(configs) else []),
+        *([after_model_trace] if tracing else []),
+    ],
 )
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""Container bootstrap: prepare the session database, then start the server.
+
+Phases, each timed and reported:
+
+1. ``wait_for_postgres`` - connect to the ``postgres`` database with
+   exponential backoff until the server accepts connections.
+2. ``create_database`` - create ``ADK_DATABASE_NAME`` if it does not exist.
+3. ``create_tables`` - create the ADK session tables and the agent's own
+   tables (event payloads, event archive, token usage, Redis session
+   snapshots); existing tables are left alone.
+4. ``migrate`` - apply pending schema migrations: the lookup indexes the
+   session queries use and, if enabled, monthly partitioning of ``events``
+   (see ``migrations.py``).
+
+Then the server is started in this process with the session database as
+its session storage.
+
+Usage:
+    python -m telegram-assistant.bootstrap [--host 0.0.0.0] [--port 8000] [--no-serve]
+"""
+
+import argparse
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+import psycopg2
+from psycopg2 import errors, sql
+from sqlalchemy import create_engine
+
+from .config import Config
+from .migrations import run_migrations
+from .shared_libraries.logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+class BootstrapError(Exception):
+    """Raised when the session database cannot be prepared."""
+
+
+@contextmanager
+def _phase(timings: Dict[str, float], name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    logger.info("Bootstrap phase %s...", name)
+    yield
+    timings[name] = time.perf_counter() - started
+    logger.info("Bootstrap phase %s done in %.3fs", name, timings[name])
+
+
+def _connect(config: Config, database: str):
+    return psycopg2.connect(
+        host=config.DATABASE_HOST,
+        port=config.DATABASE_PORT,
+        user=config.DATABASE_USERNAME,
+        password=config.DATABASE_PASSWORD,
+        dbname=database,
+        connect_timeout=5,
+    )
+
+
+def wait_for_postgres(config: Config) -> int:
+    """
+    Wait until PostgreSQL accepts connections.
+
+    Args:
+        config (Config): Connection settings and BOOTSTRAP_* backoff settings.
+
+    Returns:
+        int: The number of attempts it took.
+
+    Raises:
+        BootstrapError: If PostgreSQL is not reachable within the timeout.
+    """
+    deadline = time.monotonic() + config.BOOTSTRAP_DB_TIMEOUT_SECS
+    delay = config.BOOTSTRAP_BACKOFF_INITIAL_SECS
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            _connect(config, "postgres").close()
+            return attempt
+        except psycopg2.OperationalError as e:
+            if time.monotonic() + delay > deadline:
+                raise BootstrapError(
+                    f"PostgreSQL at {config.DATABASE_HOST}:{config.DATABASE_PORT} is not "
+                    f"reachable after {attempt} attempts: {e}"
+                ) from e
+            logger.info("PostgreSQL not ready (attempt %i), retrying in %.1fs", attempt, delay)
+            time.sleep(delay)
+            delay = min(delay * 2, config.BOOTSTRAP_BACKOFF_MAX_SECS)
+
+
+def create_database(config: Config) -> bool:
+    """
+    Create the session database if it does not exist.
+
+    Returns:
+        bool: True if the database was created, False if it already existed.
+    """
+    connection = _connect(config, "postgres")
+    try:
+        # CREATE DATABASE cannot run inside a transaction.
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_database WHERE datname = %s", (config.ADK_DATABASE_NAME,)
+            )
+            if cursor.fetchone():
+                return False
+            try:
+                cursor.execute(
+                    sql.SQL("CREATE DATABASE {}").format(sql.Identifier(config.ADK_DATABASE_NAME))
+                )
+            except errors.DuplicateDatabase:
+                # Another replica created it between the check and here.
+                return False
+            return True
+    finally:
+        connection.close()
+
+
+def create_tables(engine) -> None:
+    """Create the ADK session tables and the agent's own tables if missing."""
+    from google.adk.sessions.database_session_service import Base
+
+    from .services.token_usage import metadata as token_usage_metadata
+    from .sessions import compact_events  # noqa: F401  registers event_payloads on Base
+    from .sessions.compaction import metadata as compaction_metadata
+    from .sessions.session_snapshots import metadata as session_snapshots_metadata
+
+    Base.metadata.create_all(engine)
+    token_usage_metadata.create_all(engine)
+    session_snapshots_metadata.create_all(engine)
+    compaction_metadata.create_all(engine)
+
+
+def bootstrap(config: Config) -> Dict[str, float]:
+    """
+    Prepare the session database.
+
+    Args:
+        config (Config): Database settings.
+
+    Returns:
+        Dict[str, float]: Seconds spent per phase.
+
+    Raises:
+        BootstrapError: If PostgreSQL does not come up in time.
+    """
+    timings: Dict[str, float] = {}
+    with _phase(timings, "wait_for_postgres"):
+        attempts = wait_for_postgres(config)
+        logger.info("PostgreSQL is ready after %i attempt(s)", attempts)
+    with _phase(timings, "create_database"):
+        created = create_database(config)
+        logger.info(
+            "Database %s %s", config.ADK_DATABASE_NAME, "created" if created else "already exists"
+        )
+
+    engine = create_engine(config.session_db_url)
+    try:
+        with _phase(timings, "create_tables"):
+            create_tables(engine)
+        with _phase(timings, "migrate"):
+            applied = run_migrations(engine, config)
+            logger.info("Applied %i migration(s)", len(applied))
+    finally:
+        engine.dispose()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prepare the session database and start the server")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--no-serve", action="store_true", help="only prepare the database")
+    args = parser.parse_args()
+
+    config = Config()
+    configure_logging(config)
+    started = time.perf_counter()
+    timings = bootstrap(config)
+    logger.info(
+        "Bootstrap finished in %.3fs (%s)",
+        time.perf_counter() - started,
+        ", ".join(f"{name} {secs:.3f}s" for name, secs in timings.items()),
+    )
+    if args.no_serve:
+        return
+
+    from . import server
+
+    # Workers read their settings from the environment (see server.main).
+    # An explicitly configured session storage (e.g. Redis) is kept.
+    if not config.SESSION_SERVICE_URI:
+        os.environ["SESSION_SERVICE_URI"] = config.session_db_url
+    config = Config()
+    server.run(args.host or config.SERVER_HOST, args.port or config.SERVER_PORT, config)
+
+
+if __name__ == "__main__":
+    main()
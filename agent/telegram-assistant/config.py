@@ -14,13 +14,11 @@
 """Configuration module for the customer service agent."""
 
 import os
-import logging
+from urllib.parse import quote_plus
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import BaseModel, Field
 
-
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 class AgentModel(BaseModel):
@@ -34,9 +32,7 @@ class Config(BaseSettings):
     """Configuration settings for the customer service agent."""
 
     model_config = SettingsConfigDict(
-        env_file=os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "../../.env.agent"
-        ),
+        env_file=os.path.join(_PACKAGE_DIR, "../../.env.agent"),
         env_prefix="",
         case_sensitive=True,
         extra="ignore",
@@ -53,6 +49,18 @@ class Config(BaseSettings):
 
     # Environment
     NODE_ENV: str = Field(default="development")
+    # Уровень логов агента (DEBUG, INFO, WARNING, ...)
+    LOG_LEVEL: str = Field(default="INFO")
+    # plain — текст из вызывающего потока; production — JSON через очередь и
+    # фоновый поток, с маскированием телефонов и e-mail
+    LOG_MODE: str = Field(default="plain")
+    LOG_QUEUE_SIZE: int = Field(default=10000)
+    # Ограничение частоты записей ниже WARNING для шумных логгеров (только production)
+    LOG_RATE_LIMITED_LOGGERS: str = Field(
+        default="tools.tools,services.auth_service,shared_libraries.callbacks"
+    )
+    LOG_RATE_LIMIT_PER_SEC: float = Field(default=20.0)
+    LOG_RATE_LIMIT_BURST: int = Field(default=50)
     
     # Настройки для истории сообщений
     MESSAGE_HISTORY_LIMIT: int = Field(default=20)
@@ -61,3 +69,136 @@ class Config(BaseSettings):
     # Service Account для аутентификации с backend
     SERVICE_ACCOUNT_LOGIN: str = Field(default="service@example.com")
     SERVICE_ACCOUNT_PASSWORD: str = Field(default="secret")
+
+    # Хранилище сессий ADK (PostgreSQL)
+    DATABASE_USERNAME: str = Field(default="postgres")
+    DATABASE_PASSWORD: str = Field(default="postgres")
+    DATABASE_HOST: str = Field(default="postgres")
+    DATABASE_PORT: int = Field(default=5432)
+    ADK_DATABASE_NAME: str = Field(default="adk_sessions")
+    # Ожидание PostgreSQL при старте: экспоненциальная задержка между попытками
+    BOOTSTRAP_DB_TIMEOUT_SECS: float = Field(default=120.0)
+    BOOTSTRAP_BACKOFF_INITIAL_SECS: float = Field(default=0.2)
+    BOOTSTRAP_BACKOFF_MAX_SECS: float = Field(default=5.0)
+    # URI хранилища сессий для сервера; если не задан — сессии в памяти
+    SESSION_SERVICE_URI: str | None = Field(default=None)
+    # Драйвер БД сессий: psycopg2 (синхронный ADK DatabaseSessionService) или
+    # asyncpg (асинхронный, не блокирует цикл событий воркера)
+    SESSION_DB_DRIVER: str = Field(default="psycopg2")
+    # Пул соединений на воркер: реплики × воркеры × (размер + overflow) должны
+    # помещаться в max_connections PostgreSQL
+    SESSION_DB_POOL_SIZE: int = Field(default=5)
+    SESSION_DB_MAX_OVERFLOW: int = Field(default=10)
+    SESSION_DB_POOL_TIMEOUT_SECS: float = Field(default=30.0)
+    SESSION_DB_POOL_PRE_PING: bool = Field(default=True)
+    SESSION_DB_POOL_RECYCLE_SECS: int = Field(default=1800)
+    # Кэш подготовленных запросов asyncpg (0 — за PgBouncer в режиме transaction)
+    SESSION_DB_STATEMENT_CACHE_SIZE: int = Field(default=100)
+    # statement_timeout на стороне сервера, мс (0 — без ограничения)
+    SESSION_DB_STATEMENT_TIMEOUT_MS: int = Field(default=5000)
+    # Кэш недавних сессий в памяти воркера (проверяется по update_time в БД)
+    SESSION_CACHE_ENABLED: bool = Field(default=True)
+    SESSION_CACHE_MAX_ENTRIES: int = Field(default=1000)
+    # Хранение событий: compact — содержимое в event_payloads (msgpack + zstd),
+    # json — как в ADK. Чтение старых JSON-строк работает в обоих режимах
+    SESSION_EVENT_ENCODING: str = Field(default="compact")
+    SESSION_EVENT_ZSTD_LEVEL: int = Field(default=3)
+    # Групповая запись событий: события хода копятся в памяти воркера и пишутся
+    # одной транзакцией в конце вызова (или по лимиту событий / задержке).
+    # При падении воркера теряются незаписанные события текущего хода
+    SESSION_GROUP_COMMIT_ENABLED: bool = Field(default=True)
+    SESSION_GROUP_COMMIT_MAX_EVENTS: int = Field(default=50)
+    SESSION_GROUP_COMMIT_MAX_DELAY_SECS: float = Field(default=30.0)
+    # Общая транзакция для нескольких сессий под нагрузкой: запись ждет до
+    # WINDOW_MS, если одновременно пишут не меньше MIN_SESSIONS сессий (0 — выкл.)
+    SESSION_GROUP_COMMIT_WINDOW_MS: float = Field(default=0.0)
+    SESSION_GROUP_COMMIT_MIN_SESSIONS: int = Field(default=4)
+    # Секционирование таблицы events по месяцам (только PostgreSQL): none или month.
+    # Включение переписывает таблицу при следующем запуске bootstrap
+    SESSION_EVENTS_PARTITIONING: str = Field(default="none")
+    SESSION_EVENTS_PARTITION_MONTHS_AHEAD: int = Field(default=3)
+    # Как часто сервер досоздает секции на месяцы вперед
+    SESSION_EVENTS_PARTITION_CHECK_HOURS: float = Field(default=24.0)
+    # Сжатие длинных сессий (python -m telegram-assistant.sessions.compaction):
+    # оставляются последние события, старые сворачиваются в history_summary
+    # и переносятся в event_archive (или удаляются)
+    SESSION_COMPACTION_KEEP_EVENTS: int = Field(default=100)
+    SESSION_COMPACTION_MIN_EVENTS: int = Field(default=300)
+    SESSION_COMPACTION_MIN_AGE_DAYS: float = Field(default=14.0)
+    SESSION_COMPACTION_MIN_IDLE_MINS: float = Field(default=60.0)
+    SESSION_COMPACTION_BATCH_SIZE: int = Field(default=500)
+    SESSION_COMPACTION_ARCHIVE: bool = Field(default=True)
+    # Архивация неактивных сессий в Parquet (python -m telegram-assistant.sessions.archival):
+    # срок жизни в днях по приложениям "app_name=days,...", только сессии без лида,
+    # каталог или URI хранилища (s3://bucket/prefix)
+    SESSION_TTL_DAYS: str = Field(default="telegram_customer_service_app=30")
+    SESSION_TTL_INCLUDE_LEADS: bool = Field(default=False)
+    SESSION_ARCHIVE_URI: str = Field(default="/var/lib/agent/session-archive")
+    SESSION_ARCHIVE_BATCH_SIZE: int = Field(default=500)
+    # Сессии в Redis (SESSION_SERVICE_URI=redis://redis:6379/0): сколько событий
+    # хранить на сессию (0 — все) и префикс ключей
+    REDIS_SESSION_MAX_EVENTS: int = Field(default=500)
+    REDIS_SESSION_KEY_PREFIX: str = Field(default="adk")
+    # Фоновые снимки Redis-сессий в PostgreSQL для восстановления
+    REDIS_SESSION_SNAPSHOTS_ENABLED: bool = Field(default=False)
+    REDIS_SESSION_SNAPSHOT_SECS: float = Field(default=30.0)
+
+    # HTTP-сервер агента (uvicorn). Каждый воркер — отдельный процесс
+    # со своими кэшами; метрики сводятся через METRICS_MULTIPROC_DIR
+    SERVER_HOST: str = Field(default="0.0.0.0")
+    SERVER_PORT: int = Field(default=8000)
+    SERVER_WORKERS: int = Field(default=1)
+    SERVER_LOOP: str = Field(default="uvloop")
+    SERVER_HTTP: str = Field(default="httptools")
+    SERVER_BACKLOG: int = Field(default=2048)
+    SERVER_KEEP_ALIVE_SECS: int = Field(default=75)
+    SERVER_LIMIT_CONCURRENCY: int | None = Field(default=None)
+    SERVER_ACCESS_LOG: bool = Field(default=True)
+    # Сколько ждать ответа воркера на проверку живости (импорт ADK и прогрев долгие)
+    SERVER_WORKER_HEALTHCHECK_SECS: int = Field(default=60)
+    # Общий каталог метрик воркеров: /metrics любого воркера суммирует метрики всех.
+    # При SERVER_WORKERS > 1 и пустом значении сервер создает временный каталог
+    METRICS_MULTIPROC_DIR: str = Field(default="")
+    METRICS_PUBLISH_INTERVAL_SECS: float = Field(default=5.0)
+
+    # Прогрев воркера до приема запросов: соединения с БД сессий и пробный вызов модели
+    WARMUP_DB_CONNECTIONS: int = Field(default=2)
+    WARMUP_MODEL_CALL: bool = Field(default=False)
+
+    # Проверки зависимостей для /readyz: выполняются в фоне, эндпоинт читает кэш
+    HEALTH_PROBES: str = Field(default="postgres,backend,model")
+    HEALTH_PROBE_INTERVAL_SECS: float = Field(default=15.0)
+    HEALTH_PROBE_TIMEOUT_SECS: float = Field(default=5.0)
+
+    # База знаний о продукте (FAQ) и локальный поисковый индекс
+    FAQ_PATH: str = Field(default=os.path.join(_PACKAGE_DIR, "data", "faq.jsonl"))
+    FAQ_INDEX_DIR: str = Field(default=os.path.join(_PACKAGE_DIR, "data", "faq_index"))
+    FAQ_INDEX_DIM: int = Field(default=256)
+    FAQ_TOP_K: int = Field(default=3)
+    FAQ_MIN_SCORE: float = Field(default=0.2)
+
+    # Ограничения на число вызовов модели и инструментов за один ход
+    MAX_MODEL_CALLS_PER_INVOCATION: int = Field(default=8)
+    MAX_TOOL_CALLS_PER_INVOCATION: int = Field(default=5)
+
+    # Трассировка колбэков агента (выборочная, структурированные JSON-записи)
+    TRACE_ENABLED: bool = Field(default=False)
+    TRACE_SAMPLE_RATE: float = Field(default=1.0)
+    TRACE_PAYLOAD_SAMPLE_RATE: float = Field(default=0.0)
+    TRACE_MAX_PAYLOAD_CHARS: int = Field(default=256)
+    # Куда отправлять спаны: log (JSON-строки), otel (OpenTelemetry), через запятую
+    TRACE_SINKS: str = Field(default="log")
+
+    # Учет токенов по сессиям, пользователям и дням (пакетная запись в БД сессий;
+    # только если SESSION_SERVICE_URI указывает на базу данных)
+    TOKEN_USAGE_ENABLED: bool = Field(default=True)
+    TOKEN_USAGE_FLUSH_SECS: float = Field(default=30.0)
+    TOKEN_USAGE_MAX_PENDING: int = Field(default=1000)
+
+    @property
+    def session_db_url(self) -> str:
+        """URI of the PostgreSQL database that stores ADK sessions."""
+        return (
+            f"postgresql://{quote_plus(self.DATABASE_USERNAME)}:{quote_plus(self.DATABASE_PASSWORD)}"
+            f"@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.ADK_DATABASE_NAME}"
+        )
@@ -0,0 +1,174 @@
+"""Liveness and readiness of the agent server.
+
+``/healthz`` only shows that the worker's event loop answers. ``/readyz``
+reports the cached results of dependency probes that a background task runs
+every ``HEALTH_PROBE_INTERVAL_SECS``, so neither endpoint does any I/O:
+
+- ``postgres`` - ``SELECT 1`` through each PostgreSQL session service's pool.
+- ``backend`` - a valid backend token (logs in again only when it expired).
+- ``model`` - metadata of the agent's model through its Gemini client, which
+  needs credentials and network access but uses no tokens.
+
+A worker is ready once warm-up has finished and the latest result of every
+probe is a success that is not older than two probe intervals.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import text
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+HealthProbe = Tuple[str, Callable[[], Union[None, Awaitable[None]]]]
+
+
+async def _probe_postgres() -> None:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+    from .sessions import session_db_engines
+
+    for engine in session_db_engines():
+        if isinstance(engine, AsyncEngine):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        else:
+            # A synchronous pool may block while waiting for a connection.
+            await asyncio.to_thread(_select_one, engine)
+
+
+def _select_one(engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def _probe_backend() -> None:
+    from .services import get_auth_service
+
+    get_auth_service().get_auth_headers()
+
+
+async def _probe_model() -> None:
+    from .agent import root_agent
+
+    model = root_agent.canonical_model
+    await model.api_client.aio.models.get(model=model.model)
+
+
+_PROBES = {
+    "postgres": _probe_postgres,
+    "backend": _probe_backend,
+    "model": _probe_model,
+}
+
+
+def health_probes(config: Config = None) -> List[HealthProbe]:
+    """
+    Return the probes enabled by HEALTH_PROBES.
+
+    Args:
+        config (Config): Provides HEALTH_PROBES; read from the environment
+            when omitted.
+
+    Returns:
+        List[HealthProbe]: (name, function) pairs; functions may be sync or
+        async.
+
+    Raises:
+        ValueError: If HEALTH_PROBES names an unknown probe.
+    """
+    config = config or Config()
+    probes = []
+    for name in config.HEALTH_PROBES.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in _PROBES:
+            raise ValueError(f"Unknown health probe {name!r}, expected one of {', '.join(_PROBES)}")
+        probes.append((name, _PROBES[name]))
+    return probes
+
+
+class HealthMonitor:
+    """Runs health probes in the background and caches their results.
+
+    Sync probes run in a thread so a slow dependency never blocks the event
+    loop; every probe is bounded by ``timeout_secs``.
+    """
+
+    def __init__(self, probes: List[HealthProbe], interval_secs: float, timeout_secs: float):
+        self._probes = probes
+        self._interval_secs = interval_secs
+        self._timeout_secs = timeout_secs
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.warmed_up = False
+
+    async def _run_probe(self, name: str, probe) -> None:
+        started = time.perf_counter()
+        error = None
+        try:
+            if inspect.iscoroutinefunction(probe):
+                await asyncio.wait_for(probe(), self._timeout_secs)
+            else:
+                await asyncio.wait_for(asyncio.to_thread(probe), self._timeout_secs)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self._timeout_secs}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        previous = self._results.get(name)
+        if error and (previous is None or previous["ok"]):
+            logger.warning("Health probe %s failed: %s", name, error)
+        elif not error and previous is not None and not previous["ok"]:
+            logger.info("Health probe %s recovered", name)
+        self._results[name] = {
+            "ok": error is None,
+            "error": error,
+            "checked_at": time.time(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    async def check(self) -> None:
+        """Run all probes once, concurrently."""
+        await asyncio.gather(*(self._run_probe(name, probe) for name, probe in self._probes))
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval_secs)
+            await self.check()
+
+    def start(self) -> None:
+        """Start probing in the background of the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Return readiness from the cached probe results.
+
+        Returns:
+            Tuple[bool, Dict[str, Any]]: Whether the worker is ready, and the
+            warm-up state and latest result per probe.
+        """
+        stale_before = time.time() - 2 * self._interval_secs
+        ready = self.warmed_up
+        for name, _ in self._probes:
+            result = self._results.get(name)
+            if result is None or not result["ok"] or result["checked_at"] < stale_before:
+                ready = False
+        return ready, {"warmed_up": self.warmed_up, "probes": self._results}
@@ -0,0 +1,367 @@
+"""Schema migrations of the session database, run by the bootstrap.
+
+ADK creates the session tables with primary keys only, so listing a user's
+sessions and loading a session's events by timestamp scan whole tables.
+The migrations below add the indexes the agent's queries need and,
+optionally, partition ``events`` by month.
+
+Applied migrations are recorded in ``schema_migrations`` and run once, in
+order, each in its own transaction. On PostgreSQL an advisory lock keeps
+replicas that start together from migrating at the same time. A migration
+that does not apply (partitioning while it is disabled, or on SQLite)
+returns False and is not recorded, so it runs once it is enabled.
+
+Monthly ``events`` partitions are created SESSION_EVENTS_PARTITION_MONTHS_AHEAD
+months ahead by every migration run, and the server extends them in the
+background (``run_partition_maintenance``), so a long-running deployment
+never starts writing a month into ``events_default``.
+
+Usage:
+    python -m telegram-assistant.migrations [--db-url URL] [--list]
+"""
+
+import argparse
+import asyncio
+import datetime
+import logging
+import time
+from typing import Callable, Tuple
+
+from sqlalchemy import Column, DateTime, Float, MetaData, String, Table, create_engine, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+schema_migrations_table = Table(
+    "schema_migrations",
+    metadata,
+    Column("id", String(64), primary_key=True),
+    Column("description", String(256), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+    Column("duration_ms", Float, nullable=False),
+)
+
+# Key of the PostgreSQL advisory lock held while migrating.
+_ADVISORY_LOCK_KEY = 4_482_170_001
+
+# (name, table, columns) of the indexes created on the session tables.
+SESSION_INDEXES: Tuple[Tuple[str, str, str], ...] = (
+    # list_sessions and the cache's version check
+    ("ix_sessions_app_user_update_time", "sessions", "app_name, user_id, update_time"),
+    # get_session: events of a session, newest first, optionally after a time
+    ("ix_events_session_timestamp", "events", "app_name, user_id, session_id, timestamp"),
+)
+
+# Indexes of the scans the TTL archival and compaction jobs make.
+MAINTENANCE_INDEXES: Tuple[Tuple[str, str, str], ...] = (
+    ("ix_sessions_app_update_time", "sessions", "app_name, update_time"),
+)
+
+Migration = Tuple[str, str, Callable[[Connection, Config], bool]]
+
+
+def _create_indexes(connection: Connection, indexes: Tuple[Tuple[str, str, str], ...]) -> None:
+    for name, table, columns in indexes:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _session_indexes(connection: Connection, config: Config) -> bool:
+    # Earlier bootstraps created these without recording a migration.
+    _create_indexes(connection, SESSION_INDEXES)
+    return True
+
+
+def _maintenance_indexes(connection: Connection, config: Config) -> bool:
+    _create_indexes(connection, MAINTENANCE_INDEXES)
+    return True
+
+
+def _month_start(value: datetime.datetime) -> datetime.date:
+    return datetime.date(value.year, value.month, 1)
+
+
+def _next_month(month: datetime.date) -> datetime.date:
+    return datetime.date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _create_month_partitions(
+    connection: Connection, table: str, first: datetime.date, last: datetime.date
+) -> int:
+    created = 0
+    month = first
+    while month <= last:
+        name = f"events_p{month:%Y_%m}"
+        exists = connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if exists is None:
+            connection.execute(
+                text(
+                    f"CREATE TABLE {name} PARTITION OF {table}"
+                    f" FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+                )
+            )
+            created += 1
+        month = _next_month(month)
+    return created
+
+
+def _utc_now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _partition_horizon(months_ahead: int) -> datetime.date:
+    last = _month_start(_utc_now())
+    for _ in range(months_ahead):
+        last = _next_month(last)
+    return last
+
+
+def events_partitioned(connection: Connection) -> bool:
+    """Return True if ``events`` is a partitioned PostgreSQL table."""
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(
+        connection.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid"
+                " WHERE c.relname = 'events' AND pg_table_is_visible(c.oid)"
+            )
+        ).scalar()
+    )
+
+
+def ensure_event_partitions(connection: Connection, months_ahead: int) -> int:
+    """
+    Create the monthly ``events`` partitions up to ``months_ahead`` from now.
+
+    Events outside every monthly partition land in ``events_default``; a
+    month must be created before rows for it arrive there.
+
+    Returns:
+        int: The number of partitions created.
+    """
+    if not events_partitioned(connection):
+        return 0
+    return _create_month_partitions(
+        connection,
+        "events",
+        _month_start(_utc_now()),
+        _partition_horizon(months_ahead),
+    )
+
+
+def maintain_event_partitions(connection: Connection, months_ahead: int) -> int:
+    """
+    Extend the monthly ``events`` partitions unless another process does.
+
+    Takes a transaction-level advisory lock without waiting, so replicas
+    that run this together do not block each other or a migration.
+
+    Args:
+        connection (Connection): A connection inside a transaction.
+        months_ahead (int): Months ahead of the current one to create.
+
+    Returns:
+        int: The number of partitions created.
+    """
+    if not events_partitioned(connection):
+        return 0
+    locked = connection.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY}
+    ).scalar()
+    if not locked:
+        return 0
+    return ensure_event_partitions(connection, months_ahead)
+
+
+async def run_partition_maintenance(months_ahead: int, interval_secs: float) -> None:
+    """
+    Extend the ``events`` partitions of the session databases periodically.
+
+    Runs until cancelled; started by the server while partitioning is on.
+
+    Args:
+        months_ahead (int): Months ahead of the current one to create.
+        interval_secs (float): Time between passes.
+    """
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+    from .sessions import session_db_engines
+
+    def maintain(connection: Connection) -> int:
+        return maintain_event_partitions(connection, months_ahead)
+
+    def maintain_sync(engine: Engine) -> int:
+        with engine.begin() as connection:
+            return maintain(connection)
+
+    while True:
+        for engine in session_db_engines():
+            try:
+                if isinstance(engine, AsyncEngine):
+                    async with engine.begin() as connection:
+                        created = await connection.run_sync(maintain)
+                else:
+                    created = await asyncio.to_thread(maintain_sync, engine)
+            except Exception:
+                logger.exception("Failed to extend events partitions")
+                continue
+            if created:
+                logger.info("Created %i events partitions", created)
+        await asyncio.sleep(interval_secs)
+
+
+def _partition_events(connection: Connection, config: Config) -> bool:
+    if config.SESSION_EVENTS_PARTITIONING == "none":
+        return False
+    if config.SESSION_EVENTS_PARTITIONING != "month":
+        raise ValueError(
+            f"Unknown SESSION_EVENTS_PARTITIONING {config.SESSION_EVENTS_PARTITIONING!r},"
+            " expected 'none' or 'month'"
+        )
+    if connection.dialect.name != "postgresql":
+        logger.warning("Events partitioning needs PostgreSQL, skipped on %s", connection.dialect.name)
+        return False
+    if events_partitioned(connection):
+        return True
+
+    # Rewrites the table; the lock keeps writers out while rows are copied.
+    connection.execute(text("LOCK TABLE events IN ACCESS EXCLUSIVE MODE"))
+    connection.execute(
+        text(
+            "CREATE TABLE events_partitioned (LIKE events INCLUDING DEFAULTS)"
+            ' PARTITION BY RANGE ("timestamp")'
+        )
+    )
+    # The partition key has to be part of the primary key.
+    connection.execute(
+        text(
+            "ALTER TABLE events_partitioned"
+            ' ADD PRIMARY KEY (id, app_name, user_id, session_id, "timestamp")'
+        )
+    )
+    connection.execute(
+        text(
+            "ALTER TABLE events_partitioned ADD FOREIGN KEY (app_name, user_id, session_id)"
+            " REFERENCES sessions (app_name, user_id, id) ON DELETE CASCADE"
+        )
+    )
+    connection.execute(text("CREATE TABLE events_default PARTITION OF events_partitioned DEFAULT"))
+    oldest = connection.execute(text('SELECT min("timestamp") FROM events')).scalar()
+    _create_month_partitions(
+        connection,
+        "events_partitioned",
+        _month_start(oldest or _utc_now()),
+        _partition_horizon(config.SESSION_EVENTS_PARTITION_MONTHS_AHEAD),
+    )
+    copied = connection.execute(text("INSERT INTO events_partitioned SELECT * FROM events")).rowcount
+    connection.execute(text("DROP TABLE events"))
+    connection.execute(text("ALTER TABLE events_partitioned RENAME TO events"))
+    connection.execute(text("ALTER INDEX events_partitioned_pkey RENAME TO events_pkey"))
+    # Indexes on the partitioned table apply to every partition.
+    _create_indexes(connection, tuple(index for index in SESSION_INDEXES if index[1] == "events"))
+    logger.info("Partitioned events by month, %i rows copied", copied)
+    return True
+
+
+# Applied in order; ids never change once released.
+MIGRATIONS: Tuple[Migration, ...] = (
+    ("0001_session_indexes", "Session and event lookup indexes", _session_indexes),
+    (
+        "0002_maintenance_indexes",
+        "Indexes of the TTL archival and compaction scans",
+        _maintenance_indexes,
+    ),
+    ("0003_partition_events_by_month", "Range-partition events by month", _partition_events),
+)
+
+
+def _applied(engine: Engine) -> set:
+    with engine.connect() as connection:
+        return set(connection.execute(select(schema_migrations_table.c.id)).scalars())
+
+
+def run_migrations(engine: Engine, config: Config) -> list:
+    """
+    Apply the pending migrations.
+
+    Args:
+        engine (Engine): Engine of the session database; the ADK tables
+            must exist.
+        config (Config): Provides the partitioning settings.
+
+    Returns:
+        list: Ids of the migrations applied by this call.
+    """
+    metadata.create_all(engine, tables=[schema_migrations_table])
+    applied = []
+    with engine.connect() as lock_connection:
+        postgres = engine.dialect.name == "postgresql"
+        if postgres:
+            lock_connection.execute(
+                text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY}
+            )
+            lock_connection.commit()
+        try:
+            done = _applied(engine)
+            for migration_id, description, apply in MIGRATIONS:
+                if migration_id in done:
+                    continue
+                started = time.perf_counter()
+                with engine.begin() as connection:
+                    if not apply(connection, config):
+                        logger.info("Migration %s does not apply, skipped", migration_id)
+                        continue
+                    duration_ms = (time.perf_counter() - started) * 1000
+                    connection.execute(
+                        schema_migrations_table.insert().values(
+                            id=migration_id,
+                            description=description,
+                            applied_at=datetime.datetime.now(datetime.timezone.utc),
+                            duration_ms=duration_ms,
+                        )
+                    )
+                logger.info("Applied migration %s in %.0fms", migration_id, duration_ms)
+                applied.append(migration_id)
+            with engine.begin() as connection:
+                created = ensure_event_partitions(
+                    connection, config.SESSION_EVENTS_PARTITION_MONTHS_AHEAD
+                )
+            if created:
+                logger.info("Created %i events partitions", created)
+        finally:
+            if postgres:
+                lock_connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY}
+                )
+                lock_connection.commit()
+    return applied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", default=None, help="defaults to the configured session database")
+    parser.add_argument("--list", action="store_true", help="only list migrations and their status")
+    args = parser.parse_args()
+
+    config = Config()
+    engine = create_engine(args.db_url or config.session_db_url)
+    try:
+        if args.list:
+            metadata.create_all(engine, tables=[schema_migrations_table])
+            done = _applied(engine)
+            for migration_id, description, _ in MIGRATIONS:
+                status = "applied" if migration_id in done else "pending"
+                print(f"{status:<8} {migration_id}  {description}")
+            return
+        applied = run_migrations(engine, config)
+        print(f"applied {len(applied)} migrations" + (f": {', '.join(applied)}" if applied else ""))
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
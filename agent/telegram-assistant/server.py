@@ -0,0 +1,223 @@
+"""ADK API server for the Telegram Assistant agent.
+
+Builds the same FastAPI app as ``adk api_server`` and adds what the agent
+needs around it: the incoming W3C trace context of each request is
+continued, so spans of a turn join the trace started by the ai-gateway;
+the agent's metrics are served on ``/metrics`` for Prometheus, summed over
+all workers when there are several (see ``MultiprocessMetrics``); ``/healthz``
+and ``/readyz`` report liveness and readiness (see ``health``). PostgreSQL
+session URIs are served by the agent's own session services (see
+``sessions``), which record per-turn timings; with monthly ``events``
+partitioning the server keeps creating partitions ahead (see ``migrations``).
+
+The app is served by uvicorn with the worker count, event loop, HTTP parser,
+keep-alive and backlog taken from Config. Every worker runs the warm-up
+stages (see ``warmup``) before it accepts requests.
+
+Usage::
+
+    python -m telegram-assistant.server --host 0.0.0.0 --port 8000 \\
+        --session_service_uri postgresql://...
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from google.adk.cli.fast_api import get_fast_api_app
+
+from .config import Config
+from .health import HealthMonitor, health_probes
+from .migrations import run_partition_maintenance
+from .sessions import flush_session_services, register_session_services
+from .shared_libraries.logging_config import configure_logging
+from .shared_libraries.metrics import (
+    MultiprocessMetrics,
+    render_prometheus,
+    reset_multiprocess_dir,
+)
+from .shared_libraries.tracing import TraceContextMiddleware
+from .warmup import run_warmup, warmup_stages
+
+logger = logging.getLogger(__name__)
+
+# The directory that contains this agent package, as expected by ADK.
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Import string of the app factory, used when uvicorn starts several workers.
+APP_FACTORY = f"{__package__}.server:create_app"
+# Plugin flushing buffered session events at the end of each invocation.
+SESSION_FLUSH_PLUGIN = f"{__package__}.sessions.SessionFlushPlugin"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    config = Config()
+    monitor = HealthMonitor(
+        health_probes(config), config.HEALTH_PROBE_INTERVAL_SECS, config.HEALTH_PROBE_TIMEOUT_SECS
+    )
+    app.state.health = monitor
+    app.state.warmup_timings = await run_warmup(warmup_stages(config))
+    monitor.warmed_up = True
+    await monitor.check()
+    monitor.start()
+    if app.state.metrics is not None:
+        app.state.metrics.start()
+    partitions = None
+    if config.SESSION_EVENTS_PARTITIONING == "month":
+        partitions = asyncio.create_task(
+            run_partition_maintenance(
+                config.SESSION_EVENTS_PARTITION_MONTHS_AHEAD,
+                config.SESSION_EVENTS_PARTITION_CHECK_HOURS * 3600,
+            )
+        )
+    yield
+    if partitions is not None:
+        partitions.cancel()
+        try:
+            await partitions
+        except asyncio.CancelledError:
+            pass
+    await monitor.stop()
+    if app.state.metrics is not None:
+        await app.state.metrics.stop()
+    await flush_session_services()
+
+
+def create_app(session_service_uri: Optional[str] = None) -> FastAPI:
+    """
+    Build the ADK FastAPI app for the agents directory.
+
+    Args:
+        session_service_uri (Optional[str]): Session storage URI, defaults to
+            Config.SESSION_SERVICE_URI; in-memory sessions when neither is set.
+
+    Returns:
+        FastAPI: The application.
+    """
+    config = Config()
+    # Runs in every worker process; does nothing if logging is already set up.
+    configure_logging(config)
+    register_session_services()
+    app = get_fast_api_app(
+        agents_dir=AGENTS_DIR,
+        session_service_uri=session_service_uri or config.SESSION_SERVICE_URI,
+        web=False,
+        lifespan=lifespan,
+        # Ends the invocation's group commit of session events.
+        extra_plugins=[SESSION_FLUSH_PLUGIN],
+    )
+    app.add_middleware(TraceContextMiddleware)
+    app.state.metrics = None
+    if config.METRICS_MULTIPROC_DIR:
+        app.state.metrics = MultiprocessMetrics(
+            config.METRICS_MULTIPROC_DIR, config.METRICS_PUBLISH_INTERVAL_SECS
+        )
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics() -> PlainTextResponse:
+        multiprocess = app.state.metrics
+        text = multiprocess.render() if multiprocess is not None else render_prometheus()
+        return PlainTextResponse(text, media_type=PROMETHEUS_CONTENT_TYPE)
+
+    # Both are async so they are answered on the event loop, without a trip
+    # through the threadpool, and read only cached state.
+    @app.get("/healthz", include_in_schema=False)
+    async def healthz() -> JSONResponse:
+        return JSONResponse({"status": "ok"})
+
+    @app.get("/readyz", include_in_schema=False)
+    async def readyz() -> JSONResponse:
+        ready, details = app.state.health.status()
+        return JSONResponse(
+            {"status": "ready" if ready else "not_ready", **details},
+            status_code=200 if ready else 503,
+        )
+
+    return app
+
+
+def run(host: str, port: int, config: Config) -> None:
+    """
+    Serve the app with uvicorn using the server settings from Config.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind.
+        config (Config): Provides the SERVER_* settings.
+    """
+    logger.info(
+        "Starting ADK API server on %s:%i (workers: %i, loop: %s, http: %s)",
+        host,
+        port,
+        config.SERVER_WORKERS,
+        config.SERVER_LOOP,
+        config.SERVER_HTTP,
+    )
+    # In production logging mode uvicorn's own loggers (access log included)
+    # go through the agent's log queue instead of writing to stdout directly.
+    log_config = None if config.LOG_MODE == "production" else LOGGING_CONFIG
+    # Each worker only sees its own metrics; a scrape that lands on another
+    # worker would see counters jump. Workers publish them to a shared
+    # directory instead, which is passed on through the environment.
+    metrics_dir = config.METRICS_MULTIPROC_DIR
+    temporary_metrics_dir = not metrics_dir and config.SERVER_WORKERS > 1
+    if temporary_metrics_dir:
+        metrics_dir = tempfile.mkdtemp(prefix="agent-metrics-")
+    if metrics_dir:
+        reset_multiprocess_dir(metrics_dir)
+        os.environ["METRICS_MULTIPROC_DIR"] = metrics_dir
+    try:
+        uvicorn.run(
+            APP_FACTORY,
+            factory=True,
+            app_dir=AGENTS_DIR,
+            host=host,
+            port=port,
+            workers=config.SERVER_WORKERS,
+            loop=config.SERVER_LOOP,
+            http=config.SERVER_HTTP,
+            backlog=config.SERVER_BACKLOG,
+            timeout_keep_alive=config.SERVER_KEEP_ALIVE_SECS,
+            limit_concurrency=config.SERVER_LIMIT_CONCURRENCY,
+            access_log=config.SERVER_ACCESS_LOG,
+            log_config=log_config,
+            timeout_worker_healthcheck=config.SERVER_WORKER_HEALTHCHECK_SECS,
+        )
+    finally:
+        if temporary_metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Telegram Assistant ADK API server")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--session_service_uri", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    # Workers build the app in their own processes from Config, which reads
+    # the environment, so command line overrides are passed on through it.
+    if args.session_service_uri:
+        os.environ["SESSION_SERVICE_URI"] = args.session_service_uri
+    if args.workers:
+        os.environ["SERVER_WORKERS"] = str(args.workers)
+
+    config = Config()
+    configure_logging(config)
+    run(args.host or config.SERVER_HOST, args.port or config.SERVER_PORT, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,29 @@
-"""Services package for telegram assistant."""
+"""Services package for telegram assistant.
 
-from .auth_service import AuthService, get_auth_service
+Services are imported on first attribute access, so importing one service
+does not load the dependencies of the others (numpy, SQLAlchemy).
+"""
 
-__all__ = ['AuthService', 'get_auth_service']
+import importlib
+
+_EXPORTS = {
+    'AuthService': 'auth_service',
+    'get_auth_service': 'auth_service',
+    'FaqIndex': 'faq_index',
+    'build_faq_index': 'faq_index',
+    'get_faq_index': 'faq_index',
+    'TokenUsageAggregator': 'token_usage',
+    'get_token_usage': 'token_usage',
+    'top_usage': 'token_usage',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -7,8 +7,20 @@ import requests
 from typing import Optional, Dict, Any
 from threading import Lock
 
+from ..shared_libraries.metrics import counter, histogram
+from ..shared_libraries.tracing import inject_trace_headers
+
 logger = logging.getLogger(__name__)
 
+backend_requests = counter(
+    "agent_backend_requests_total",
+    "Backend API requests by method and HTTP status (or 'error')",
+    ("method", "status"),
+)
+backend_request_duration = histogram(
+    "agent_backend_request_duration_seconds", "Duration of backend API requests", ("method",)
+)
+
 
 class AuthService:
     """Service for handling JWT authentication with the backend API."""
@@ -18,6 +30,8 @@ class AuthService:
         self._token_expires_at: Optional[float] = None
         self._lock = Lock()
         self._backend_base_url = "http://backend:4343/api/v1"
+        # Keep-alive connection pool to the backend, shared by login and API calls
+        self._http = requests.Session()
         
         # Get credentials from environment variables
         self._service_email = os.getenv('SERVICE_ACCOUNT_LOGIN', 'service@example.com')
@@ -41,7 +55,7 @@ class AuthService:
         try:
             logger.info("Attempting login to %s with email: %s", login_url, self._service_email)
             
-            response = requests.post(
+            response = self._http.post(
                 login_url,
                 json=login_data,
                 headers={'Content-Type': 'application/json'},
@@ -158,11 +172,22 @@ class AuthService:
                 # Merge with any additional headers
                 if 'headers' in kwargs:
                     headers.update(kwargs['headers'])
-                kwargs['headers'] = headers
+                # Propagate the current trace context (traceparent) to the backend
+                kwargs['headers'] = inject_trace_headers(headers)
                 
                 logger.info("Making %s request to %s (attempt %d)", method.upper(), url, attempt + 1)
                 
-                response = requests.request(method, url, timeout=10, **kwargs)
+                started = time.perf_counter()
+                try:
+                    response = self._http.request(method, url, timeout=10, **kwargs)
+                except requests.exceptions.RequestException:
+                    backend_requests.inc(method=method.upper(), status="error")
+                    raise
+                finally:
+                    backend_request_duration.observe(
+                        time.perf_counter() - started, method=method.upper()
+                    )
+                backend_requests.inc(method=method.upper(), status=str(response.status_code))
                 
                 # If we get 401, token might be invalid, try to refresh once
                 if response.status_code == 401 and attempt == 0:
@@ -0,0 +1,274 @@
+"""Local retrieval index over the product FAQ.
+
+The index is a hashed TF-IDF embedding: every token is hashed into one of
+``dim`` signed buckets, weighted by inverse document frequency and the
+resulting row is L2-normalized. Rows are stored as a float32 ``.npy`` matrix
+that is memory-mapped at startup, so the index costs no parse time and pages
+are shared between worker processes.
+
+Workers that start together may all find the index stale and rebuild it.
+Each build is written to a temporary directory next to the index and its
+files are moved into place with ``os.replace``, the meta file last, so a
+reader never maps a half-written file and a build interrupted midway leaves
+the index stale rather than broken.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIM = 256
+# Russian is highly inflected; a short prefix is a cheap stand-in for
+# stemming ("ручка", "ручки", "ручкой" all share "ручк"). The full token is
+# kept as well so exact matches still rank above prefix matches.
+_STEM_LENGTH = 4
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_VECTORS_FILE = "vectors.npy"
+_IDF_FILE = "idf.npy"
+_OFFSETS_FILE = "offsets.npy"
+_TEXTS_FILE = "texts.bin"
+_META_FILE = "meta.json"
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase tokens plus their stem prefixes."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) < 2:
+            continue
+        tokens.append(token)
+        if len(token) > _STEM_LENGTH:
+            tokens.append(token[:_STEM_LENGTH] + "*")
+    return tokens
+
+
+def _hash_tokens(tokens: Iterable[str], dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Map tokens to (bucket, sign) arrays with a process-independent hash."""
+    hashes = np.fromiter(
+        (zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.uint32
+    )
+    buckets = (hashes % dim).astype(np.intp)
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+    return buckets, signs
+
+
+def _format_snippet(entry: Dict[str, Any]) -> str:
+    """Render a FAQ entry the way it is shown to the model."""
+    question = str(entry.get("question", "")).strip()
+    answer = str(entry.get("answer", "")).strip()
+    return f"Вопрос: {question}\nОтвет: {answer}"
+
+
+def load_faq_entries(faq_path: str) -> List[Dict[str, Any]]:
+    """
+    Read FAQ entries from a JSON Lines file.
+
+    Args:
+        faq_path (str): Path to a file with one ``{"question", "answer"}``
+                        object per line.
+
+    Returns:
+        List[Dict[str, Any]]: The parsed entries, blank lines skipped.
+    """
+    entries = []
+    with open(faq_path, encoding="utf-8") as faq_file:
+        for line in faq_file:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+def build_faq_index(
+    entries: List[Dict[str, Any]], index_dir: str, dim: int = DEFAULT_DIM
+) -> None:
+    """
+    Build the on-disk index for the given FAQ entries.
+
+    Args:
+        entries (List[Dict[str, Any]]): FAQ entries with question and answer.
+        index_dir (str): Directory the index files are written to.
+        dim (int): Number of hash buckets (embedding width).
+    """
+    index_dir = os.path.abspath(index_dir)
+    os.makedirs(index_dir, exist_ok=True)
+    build_dir = tempfile.mkdtemp(
+        prefix=f".{os.path.basename(index_dir)}-", dir=os.path.dirname(index_dir)
+    )
+    try:
+        _write_index(entries, build_dir, dim)
+        for name in (_VECTORS_FILE, _IDF_FILE, _OFFSETS_FILE, _TEXTS_FILE, _META_FILE):
+            os.replace(os.path.join(build_dir, name), os.path.join(index_dir, name))
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    logger.info("FAQ index built: %d entries, dim=%d, dir=%s", len(entries), dim, index_dir)
+
+
+def _write_index(entries: List[Dict[str, Any]], index_dir: str, dim: int) -> None:
+    count = len(entries)
+    snippets = [_format_snippet(entry) for entry in entries]
+
+    rows: List[np.ndarray] = []
+    cols: List[np.ndarray] = []
+    vals: List[np.ndarray] = []
+    doc_freq = np.zeros(dim, dtype=np.float32)
+    for row, snippet in enumerate(snippets):
+        buckets, signs = _hash_tokens(_tokenize(snippet), dim)
+        if not len(buckets):
+            continue
+        doc_freq[np.unique(buckets)] += 1
+        rows.append(np.full(len(buckets), row, dtype=np.intp))
+        cols.append(buckets)
+        vals.append(signs)
+
+    idf = (np.log((1.0 + count) / (1.0 + doc_freq)) + 1.0).astype(np.float32)
+    vectors = np.zeros((count, dim), dtype=np.float32)
+    if rows:
+        all_cols = np.concatenate(cols)
+        np.add.at(
+            vectors,
+            (np.concatenate(rows), all_cols),
+            np.concatenate(vals) * idf[all_cols],
+        )
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+    encoded = [snippet.encode("utf-8") for snippet in snippets]
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(blob) for blob in encoded], out=offsets[1:])
+
+    np.save(os.path.join(index_dir, _VECTORS_FILE), vectors)
+    np.save(os.path.join(index_dir, _IDF_FILE), idf)
+    np.save(os.path.join(index_dir, _OFFSETS_FILE), offsets)
+    with open(os.path.join(index_dir, _TEXTS_FILE), "wb") as texts_file:
+        texts_file.write(b"".join(encoded))
+    with open(os.path.join(index_dir, _META_FILE), "w", encoding="utf-8") as meta_file:
+        json.dump({"dim": dim, "count": count}, meta_file)
+
+
+class FaqIndex:
+    """Read-only, memory-mapped FAQ index with vectorized top-k search."""
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, _META_FILE), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        self.dim: int = meta["dim"]
+        self._vectors = np.load(os.path.join(index_dir, _VECTORS_FILE), mmap_mode="r")
+        self._idf = np.load(os.path.join(index_dir, _IDF_FILE))
+        self._offsets = np.load(os.path.join(index_dir, _OFFSETS_FILE), mmap_mode="r")
+        texts_path = os.path.join(index_dir, _TEXTS_FILE)
+        self._texts = (
+            np.memmap(texts_path, dtype=np.uint8, mode="r")
+            if os.path.getsize(texts_path)
+            else np.zeros(0, dtype=np.uint8)
+        )
+
+    def __len__(self) -> int:
+        return self._vectors.shape[0]
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        buckets, signs = _hash_tokens(_tokenize(text), self.dim)
+        if not len(buckets):
+            return None
+        query = np.zeros(self.dim, dtype=np.float32)
+        np.add.at(query, buckets, signs * self._idf[buckets])
+        norm = np.linalg.norm(query)
+        return query / norm if norm > 0 else None
+
+    def snippet(self, position: int) -> str:
+        """Return the stored snippet text for a row of the index."""
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        return self._texts[start:end].tobytes().decode("utf-8")
+
+    def search(
+        self, text: str, top_k: int = 3, min_score: float = 0.0
+    ) -> List[Tuple[float, str]]:
+        """
+        Find the FAQ snippets most similar to the given text.
+
+        Args:
+            text (str): The user question.
+            top_k (int): Maximum number of snippets to return.
+            min_score (float): Cosine similarity below which hits are dropped.
+
+        Returns:
+            List[Tuple[float, str]]: (score, snippet) pairs, best first.
+        """
+        count = len(self)
+        if not count or top_k <= 0:
+            return []
+        query = self._embed(text)
+        if query is None:
+            return []
+
+        scores = self._vectors @ query
+        k = min(top_k, count)
+        candidates = np.argpartition(scores, count - k)[count - k:]
+        ranked = candidates[np.argsort(scores[candidates])[::-1]]
+        return [
+            (float(scores[position]), self.snippet(position))
+            for position in ranked
+            if scores[position] > min_score
+        ]
+
+
+def _index_is_stale(faq_path: str, index_dir: str, dim: int) -> bool:
+    meta_path = os.path.join(index_dir, _META_FILE)
+    try:
+        with open(meta_path, encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        return True
+    if meta.get("dim") != dim:
+        return True
+    return os.path.getmtime(faq_path) > os.path.getmtime(meta_path)
+
+
+# Global instance
+_faq_index: Optional[FaqIndex] = None
+_faq_index_loaded = False
+_faq_index_lock = Lock()
+
+
+def get_faq_index() -> Optional[FaqIndex]:
+    """
+    Get the global FaqIndex instance, building it from the FAQ file if needed.
+
+    Returns:
+        Optional[FaqIndex]: The loaded index, or None if no FAQ file exists.
+    """
+    global _faq_index, _faq_index_loaded
+    if _faq_index_loaded:
+        return _faq_index
+
+    with _faq_index_lock:
+        if not _faq_index_loaded:
+            from ..config import Config
+
+            config = Config()
+            if not os.path.exists(config.FAQ_PATH):
+                logger.warning("FAQ file not found: %s", config.FAQ_PATH)
+            else:
+                if _index_is_stale(config.FAQ_PATH, config.FAQ_INDEX_DIR, config.FAQ_INDEX_DIM):
+                    build_faq_index(
+                        load_faq_entries(config.FAQ_PATH),
+                        config.FAQ_INDEX_DIR,
+                        dim=config.FAQ_INDEX_DIM,
+                    )
+                _faq_index = FaqIndex(config.FAQ_INDEX_DIR)
+                logger.info("FAQ index loaded with %d entries", len(_faq_index))
+            _faq_index_loaded = True
+    return _faq_index
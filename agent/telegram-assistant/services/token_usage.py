@@ -0,0 +1,332 @@
+"""Token usage accounting per session, user and day.
+
+Model calls add their ``usage_metadata`` to an in-memory aggregator keyed by
+(app, user, session, day). A background thread flushes the pending totals
+every few seconds as one batched upsert into the ``token_usage`` table, so
+the request path never waits for the database. Per-user and per-day totals
+are sums over that table; ``top_usage`` and the CLI below query them.
+
+Accounting runs only when sessions are stored in a database
+(SESSION_SERVICE_URI), whose ``token_usage`` table then holds the totals.
+At most ``max_pending`` keys wait for a flush; usage of new keys beyond
+that, e.g. while the database is down, is dropped and counted in
+``agent_token_usage_dropped_total``.
+
+Usage:
+    python -m telegram-assistant.services.token_usage --by session [--days 7] [--limit 20]
+"""
+
+import argparse
+import atexit
+import datetime
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    func,
+    select,
+)
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import ArgumentError
+
+from ..shared_libraries.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+token_usage_table = Table(
+    "token_usage",
+    metadata,
+    Column("app_name", String(128), primary_key=True),
+    Column("user_id", String(128), primary_key=True),
+    Column("session_id", String(128), primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("model_calls", Integer, nullable=False, default=0),
+    Column("prompt_tokens", Integer, nullable=False, default=0),
+    Column("cached_tokens", Integer, nullable=False, default=0),
+    Column("output_tokens", Integer, nullable=False, default=0),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+)
+
+dropped_calls = counter(
+    "agent_token_usage_dropped_total",
+    "Model calls whose token usage was dropped because too many totals were pending",
+)
+
+UsageKey = Tuple[str, str, str, datetime.date]
+_COUNTERS = ("model_calls", "prompt_tokens", "cached_tokens", "output_tokens")
+_GROUPINGS = {
+    "session": ("app_name", "user_id", "session_id"),
+    "user": ("app_name", "user_id"),
+    "day": ("day",),
+}
+
+
+def _upsert(engine: Engine):
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Token usage storage does not support {engine.dialect.name}")
+    statement = insert(token_usage_table)
+    updates = {name: token_usage_table.c[name] + statement.excluded[name] for name in _COUNTERS}
+    updates["updated_at"] = statement.excluded.updated_at
+    return statement.on_conflict_do_update(
+        index_elements=["app_name", "user_id", "session_id", "day"], set_=updates
+    )
+
+
+class TokenUsageAggregator:
+    """Accumulates token usage in memory and flushes it in batches."""
+
+    def __init__(self, engine: Engine, flush_interval_secs: float = 30.0, max_pending: int = 1000):
+        self._engine = engine
+        self._flush_interval_secs = flush_interval_secs
+        self._max_pending = max_pending
+        self._pending: Dict[UsageKey, List[int]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._table_ready = False
+        self._dropping = False
+
+    def record(
+        self,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        prompt_tokens: int,
+        cached_tokens: int,
+        output_tokens: int,
+    ) -> None:
+        """
+        Add the usage of one model call.
+
+        Args:
+            app_name (str): The ADK app.
+            user_id (str): The user the session belongs to.
+            session_id (str): The session.
+            prompt_tokens (int): Prompt tokens, cached ones included.
+            cached_tokens (int): Prompt tokens served from the context cache.
+            output_tokens (int): Generated tokens.
+        """
+        key = (app_name, user_id, session_id, datetime.date.today())
+        with self._lock:
+            totals = self._pending.get(key)
+            if totals is None:
+                if len(self._pending) >= self._max_pending:
+                    self._drop(1)
+                    return
+                totals = self._pending[key] = [0, 0, 0, 0]
+            totals[0] += 1
+            totals[1] += prompt_tokens
+            totals[2] += cached_tokens
+            totals[3] += output_tokens
+            pending = len(self._pending)
+        if self._thread is None:
+            self._start()
+        if pending >= self._max_pending:
+            self._wake.set()
+
+    def _drop(self, model_calls: int) -> None:
+        # Called with self._lock held; warns once until a flush succeeds.
+        dropped_calls.inc(model_calls)
+        if not self._dropping:
+            self._dropping = True
+            logger.warning(
+                "Token usage has %i pending totals, dropping usage of new sessions",
+                len(self._pending),
+            )
+        self._wake.set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="token-usage-flush", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self._flush_interval_secs)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write the pending totals in one transaction.
+
+        Returns:
+            int: The number of rows upserted. On failure the totals are put
+            back and retried with the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            now = datetime.datetime.now(datetime.timezone.utc)
+            rows = [
+                {
+                    "app_name": app_name,
+                    "user_id": user_id,
+                    "session_id": session_id,
+                    "day": day,
+                    "model_calls": totals[0],
+                    "prompt_tokens": totals[1],
+                    "cached_tokens": totals[2],
+                    "output_tokens": totals[3],
+                    "updated_at": now,
+                }
+                for (app_name, user_id, session_id, day), totals in batch.items()
+            ]
+            try:
+                if not self._table_ready:
+                    metadata.create_all(self._engine, tables=[token_usage_table])
+                    self._table_ready = True
+                with self._engine.begin() as connection:
+                    connection.execute(_upsert(self._engine), rows)
+            except Exception as e:
+                logger.error("Token usage flush of %i rows failed: %s", len(rows), e)
+                self._restore(batch)
+                return 0
+            with self._lock:
+                self._dropping = False
+            logger.debug("Flushed token usage for %i sessions", len(rows))
+            return len(rows)
+
+    def _restore(self, batch: Dict[UsageKey, List[int]]) -> None:
+        # Totals recorded since the batch was taken share the same bound.
+        with self._lock:
+            for key, totals in batch.items():
+                current = self._pending.get(key)
+                if current is None:
+                    if len(self._pending) >= self._max_pending:
+                        self._drop(totals[0])
+                        continue
+                    current = self._pending[key] = [0, 0, 0, 0]
+                for position, amount in enumerate(totals):
+                    current[position] += amount
+
+
+def top_usage(
+    engine: Engine, by: str = "session", days: int = 7, limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Return the largest token consumers over the last ``days`` days.
+
+    Args:
+        engine (Engine): Engine of the database holding ``token_usage``.
+        by (str): Grouping, one of ``session``, ``user`` or ``day``.
+        days (int): How many days back to include, today included.
+        limit (int): Maximum number of rows.
+
+    Returns:
+        List[Dict[str, Any]]: Totals per group, most tokens first (by day:
+        newest day first).
+    """
+    group = [token_usage_table.c[name] for name in _GROUPINGS[by]]
+    totals = [func.sum(token_usage_table.c[name]).label(name) for name in _COUNTERS]
+    total_tokens = func.sum(
+        token_usage_table.c.prompt_tokens + token_usage_table.c.output_tokens
+    ).label("total_tokens")
+    since = datetime.date.today() - datetime.timedelta(days=days - 1)
+    query = (
+        select(*group, *totals, total_tokens)
+        .where(token_usage_table.c.day >= since)
+        .group_by(*group)
+        .order_by(token_usage_table.c.day.desc() if by == "day" else total_tokens.desc())
+        .limit(limit)
+    )
+    with engine.connect() as connection:
+        return [dict(row._mapping) for row in connection.execute(query)]
+
+
+def token_usage_db_url(config) -> Optional[str]:
+    """
+    Return the database token usage is written to, if accounting is on.
+
+    Args:
+        config (Config): Provides TOKEN_USAGE_ENABLED and SESSION_SERVICE_URI.
+
+    Returns:
+        Optional[str]: The session database with a synchronous driver, or
+        None when accounting is disabled or sessions are not stored in a
+        database (in memory, Redis).
+    """
+    if not config.TOKEN_USAGE_ENABLED or not config.SESSION_SERVICE_URI:
+        return None
+    try:
+        url = make_url(config.SESSION_SERVICE_URI)
+    except ArgumentError:
+        return None
+    if url.get_backend_name() not in ("postgresql", "sqlite"):
+        return None
+    # The flush thread uses a synchronous engine, whatever the session driver.
+    return url.set(drivername=url.get_backend_name()).render_as_string(hide_password=False)
+
+
+# Global instance
+_token_usage: Optional[TokenUsageAggregator] = None
+
+
+def get_token_usage() -> TokenUsageAggregator:
+    """
+    Get the global TokenUsageAggregator instance (singleton pattern).
+
+    Returns:
+        TokenUsageAggregator: Aggregator writing to the session database.
+    """
+    global _token_usage
+    if _token_usage is None:
+        from ..config import Config
+
+        config = Config()
+        db_url = token_usage_db_url(config)
+        if db_url is None:
+            raise RuntimeError(
+                "Token usage needs sessions stored in a database (SESSION_SERVICE_URI)"
+            )
+        _token_usage = TokenUsageAggregator(
+            create_engine(db_url, pool_pre_ping=True),
+            flush_interval_secs=config.TOKEN_USAGE_FLUSH_SECS,
+            max_pending=config.TOKEN_USAGE_MAX_PENDING,
+        )
+    return _token_usage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Top token consumers from token_usage")
+    parser.add_argument("--by", choices=sorted(_GROUPINGS), default="session")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--db-url", default=None, help="defaults to the configured session database")
+    args = parser.parse_args()
+
+    from ..config import Config
+
+    engine = create_engine(args.db_url or Config().session_db_url)
+    rows = top_usage(engine, by=args.by, days=args.days, limit=args.limit)
+    columns = list(_GROUPINGS[args.by]) + list(_COUNTERS) + ["total_tokens"]
+    print("\t".join(columns))
+    for row in rows:
+        print("\t".join(str(row[column]) for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Session storage for telegram assistant."""
+
+from .async_database_session_service import AsyncDatabaseSessionService
+from .cached_session_service import CachedSessionService
+from .compact_events import CompactEventSessionService
+from .factory import flush_session_services, register_session_services, session_db_engines
+from .group_commit import GroupCommitSessionService, SessionFlushPlugin
+from .timed_session_service import TimedSessionService
+
+__all__ = ['AsyncDatabaseSessionService', 'CachedSessionService', 'CompactEventSessionService', 'flush_session_services',
+           'GroupCommitSessionService', 'register_session_services', 'session_db_engines', 'SessionFlushPlugin',
+           'TimedSessionService']
@@ -0,0 +1,558 @@
+"""TTL expiry of inactive sessions to Parquet, and on-demand restore.
+
+Conversations that never produced a lead (the customer never gave a valid
+phone number) stay in the session database forever. A session has a lead if
+its state holds a ``lead_id`` or, for sessions from before ``lead_id`` was
+kept in state, if one of its events is a successful ``send_lead_to_backend``
+response; events compaction moved to ``event_archive`` count too, events it
+deleted (SESSION_COMPACTION_ARCHIVE off) do not. Sessions with a lead are
+kept unless SESSION_TTL_INCLUDE_LEADS is set. ``archive`` moves sessions of
+an app that have been inactive
+longer than its TTL (SESSION_TTL_DAYS, e.g. ``telegram_customer_service_app=30``)
+into zstd-compressed Parquet files under SESSION_ARCHIVE_URI, a local
+directory or any URI pyarrow has a filesystem for (``s3://bucket/prefix``,
+``gs://...``)::
+
+    {uri}/{app_name}/sessions/{run}-{batch}.parquet   one row per session
+    {uri}/{app_name}/events/{run}-{batch}.parquet     one row per event
+
+Sessions are read through a server-side cursor in batches of
+``--batch-size``; each batch's events (compact payloads and rows moved to
+``event_archive`` by compaction included) are written as full event JSON,
+then the batch is deleted in one transaction, skipping sessions that were
+written to after they were read. Memory use is bounded by the batch size.
+
+``restore`` copies archived sessions back; restored events are stored
+inline as JSON, which every session service reads, and events compaction
+had moved out go back to ``event_archive``. Parquet files are immutable,
+so restored sessions stay in the archive too.
+
+Usage:
+    python -m telegram-assistant.sessions.archival archive [--dry-run] [--batch-size 500]
+    python -m telegram-assistant.sessions.archival restore --app-name APP --user-id USER
+        [--session-id ID]
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.adk.sessions.database_session_service import (
+    StorageEvent,
+    StorageSession,
+    set_sqlite_pragma,
+)
+from sqlalchemy import create_engine, delete, exists, insert, inspect, select, tuple_
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as OrmSession
+
+from ..config import Config
+from ..shared_libraries.lead_sync import LEAD_ID_KEY
+from .compact_events import EventCodec, event_payloads_table
+from .compaction import event_archive_table
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_SCHEMA = pa.schema(
+    [
+        ("app_name", pa.string()),
+        ("user_id", pa.string()),
+        ("session_id", pa.string()),
+        ("state", pa.string()),
+        ("create_time", pa.timestamp("us")),
+        ("update_time", pa.timestamp("us")),
+        ("archived_at", pa.timestamp("us", tz="UTC")),
+    ]
+)
+
+EVENTS_SCHEMA = pa.schema(
+    [
+        ("app_name", pa.string()),
+        ("user_id", pa.string()),
+        ("session_id", pa.string()),
+        ("event_id", pa.string()),
+        ("invocation_id", pa.string()),
+        ("author", pa.string()),
+        ("timestamp", pa.float64()),
+        ("event", pa.string()),
+        # Moved to event_archive by compaction before the session expired
+        ("compacted", pa.bool_()),
+    ]
+)
+
+SessionKey = Tuple[str, str, str]
+
+LEAD_TOOL_NAME = "send_lead_to_backend"
+
+
+def session_ttls(config: Config = None) -> Dict[str, float]:
+    """
+    Return the TTL in days per app configured by SESSION_TTL_DAYS.
+
+    Raises:
+        ValueError: If an entry is not ``app_name=days``.
+    """
+    config = config or Config()
+    ttls = {}
+    for entry in config.SESSION_TTL_DAYS.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        app_name, separator, days = entry.partition("=")
+        if not separator:
+            raise ValueError(f"Invalid SESSION_TTL_DAYS entry {entry!r}, expected app_name=days")
+        ttls[app_name.strip()] = float(days)
+    return ttls
+
+
+def _has_lead(state: Optional[dict]) -> bool:
+    return (state or {}).get(LEAD_ID_KEY) is not None
+
+
+def _is_lead_event(event: Event) -> bool:
+    # The tool's own success response; a lead written before lead_id was
+    # kept in state leaves no other trace in the session.
+    if event.content is None:
+        return False
+    for part in event.content.parts or ():
+        response = part.function_response
+        if (
+            response is not None
+            and response.name == LEAD_TOOL_NAME
+            and (response.response or {}).get("status") == "success"
+        ):
+            return True
+    return False
+
+
+def _db_now(engine: Engine) -> datetime.datetime:
+    # ADK stores naive timestamps: UTC on SQLite, server local time elsewhere.
+    if engine.dialect.name == "sqlite":
+        return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return datetime.datetime.now()
+
+
+@dataclass
+class ArchiveStats:
+    """Counters of one archival run."""
+
+    sessions_scanned: int = 0
+    sessions_archived: int = 0
+    sessions_kept_with_lead: int = 0
+    sessions_skipped: int = 0
+    events_archived: int = 0
+    files_written: int = 0
+    elapsed_secs: float = 0.0
+
+
+class SessionArchiver:
+    """Moves expired sessions to Parquet files and restores them.
+
+    Args:
+        engine (Engine): Engine of the session database.
+        uri (str): Archive root, a local directory or a pyarrow filesystem URI.
+        batch_size (int): Sessions per cursor batch, transaction and file.
+        include_leads (bool): Also archive sessions that produced a lead.
+        dry_run (bool): Only count what would be archived.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        uri: str,
+        batch_size: int = 500,
+        include_leads: bool = False,
+        dry_run: bool = False,
+    ):
+        self.engine = engine
+        if engine.dialect.name == "sqlite" and not sqlalchemy_event.contains(
+            engine, "connect", set_sqlite_pragma
+        ):
+            # Events go with their sessions only when SQLite enforces foreign keys.
+            sqlalchemy_event.listen(engine, "connect", set_sqlite_pragma)
+        self.filesystem, self.root = pyarrow.fs.FileSystem.from_uri(uri)
+        self.batch_size = batch_size
+        self.include_leads = include_leads
+        self.dry_run = dry_run
+        self.codec = EventCodec()
+        tables = inspect(engine)
+        self._has_payloads = tables.has_table(event_payloads_table.name)
+        self._has_event_archive = tables.has_table(event_archive_table.name)
+
+    def _expired_batches(self, app_name: str, cutoff: datetime.datetime) -> Iterator[list]:
+        sessions = StorageSession.__table__
+        query = (
+            select(
+                sessions.c.app_name,
+                sessions.c.user_id,
+                sessions.c.id,
+                sessions.c.state,
+                sessions.c.create_time,
+                sessions.c.update_time,
+            )
+            .where(sessions.c.app_name == app_name, sessions.c.update_time < cutoff)
+            .order_by(sessions.c.user_id, sessions.c.id)
+        )
+        if self.engine.dialect.name == "sqlite":
+            # No server-side cursors, and an open read would block the
+            # deletes; SQLite is only used in development.
+            with self.engine.connect() as connection:
+                rows = connection.execute(query).all()
+            for start in range(0, len(rows), self.batch_size):
+                yield rows[start : start + self.batch_size]
+            return
+        with self.engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=self.batch_size
+            ).execute(query)
+            yield from result.partitions()
+
+    def _events(
+        self, connection, keys: List[SessionKey]
+    ) -> List[Tuple[SessionKey, Event, bool]]:
+        key = tuple_(StorageEvent.app_name, StorageEvent.user_id, StorageEvent.session_id)
+        with OrmSession(bind=connection) as orm_session:
+            rows = orm_session.scalars(
+                select(StorageEvent).where(key.in_(keys)).order_by(StorageEvent.timestamp)
+            ).all()
+            events = [
+                ((row.app_name, row.user_id, row.session_id), row.to_event(), False) for row in rows
+            ]
+        if self._has_payloads:
+            table = event_payloads_table
+            payloads = {
+                (row.app_name, row.user_id, row.session_id, row.event_id): row.payload
+                for row in connection.execute(
+                    select(table).where(
+                        tuple_(table.c.app_name, table.c.user_id, table.c.session_id).in_(keys)
+                    )
+                )
+            }
+            events = [
+                (key, event.model_copy(update=self.codec.decode(payloads[(*key, event.id)])), False)
+                if (*key, event.id) in payloads
+                else (key, event, False)
+                for key, event, _ in events
+            ]
+        if self._has_event_archive:
+            table = event_archive_table
+            compacted = [
+                (
+                    (row.app_name, row.user_id, row.session_id),
+                    Event.model_validate_json(row.event),
+                    True,
+                )
+                for row in connection.execute(
+                    select(table).where(
+                        tuple_(table.c.app_name, table.c.user_id, table.c.session_id).in_(keys)
+                    )
+                )
+            ]
+            events = compacted + events
+        return events
+
+    def _write(self, directory: str, name: str, table: pa.Table) -> None:
+        path = f"{self.root.rstrip('/')}/{directory}"
+        self.filesystem.create_dir(path, recursive=True)
+        pq.write_table(table, f"{path}/{name}", filesystem=self.filesystem, compression="zstd")
+
+    def _archive_batch(
+        self,
+        rows: list,
+        cutoff: datetime.datetime,
+        run_id: str,
+        batch_number: int,
+        stats: ArchiveStats,
+    ) -> int:
+        keys = [(row.app_name, row.user_id, row.id) for row in rows]
+        with self.engine.connect() as connection:
+            events = self._events(connection, keys)
+        if not self.include_leads:
+            with_lead = {key for key, event, _ in events if _is_lead_event(event)}
+            if with_lead:
+                rows = [row for row in rows if (row.app_name, row.user_id, row.id) not in with_lead]
+                keys = [key for key in keys if key not in with_lead]
+                events = [item for item in events if item[0] not in with_lead]
+                stats.sessions_kept_with_lead += len(with_lead)
+                if not rows:
+                    return 0
+        if self.dry_run:
+            stats.sessions_archived += len(rows)
+            stats.events_archived += len(events)
+            return len(rows)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        app_name = rows[0].app_name
+        name = f"{run_id}-{batch_number:05d}.parquet"
+        self._write(
+            f"{app_name}/sessions",
+            name,
+            pa.Table.from_pylist(
+                [
+                    {
+                        "app_name": row.app_name,
+                        "user_id": row.user_id,
+                        "session_id": row.id,
+                        "state": json.dumps(row.state or {}, ensure_ascii=False),
+                        "create_time": row.create_time,
+                        "update_time": row.update_time,
+                        "archived_at": now,
+                    }
+                    for row in rows
+                ],
+                schema=SESSIONS_SCHEMA,
+            ),
+        )
+        self._write(
+            f"{app_name}/events",
+            name,
+            pa.Table.from_pylist(
+                [
+                    {
+                        "app_name": key[0],
+                        "user_id": key[1],
+                        "session_id": key[2],
+                        "event_id": event.id,
+                        "invocation_id": event.invocation_id,
+                        "author": event.author,
+                        "timestamp": event.timestamp,
+                        "event": event.model_dump_json(exclude_none=True),
+                        "compacted": compacted,
+                    }
+                    for key, event, compacted in events
+                ],
+                schema=EVENTS_SCHEMA,
+            ),
+        )
+        stats.files_written += 2
+
+        sessions = StorageSession.__table__
+        with self.engine.begin() as connection:
+            # Events and payloads go with their sessions (ON DELETE CASCADE).
+            # A session written to since it was read is no longer expired and
+            # is kept; its copy in the archive is harmless, restore never
+            # overwrites a live session.
+            deleted = connection.execute(
+                delete(sessions).where(
+                    tuple_(sessions.c.app_name, sessions.c.user_id, sessions.c.id).in_(keys),
+                    sessions.c.update_time < cutoff,
+                )
+            ).rowcount
+            if self._has_event_archive:
+                table = event_archive_table
+                connection.execute(
+                    delete(table).where(
+                        tuple_(table.c.app_name, table.c.user_id, table.c.session_id).in_(keys),
+                        ~exists().where(
+                            sessions.c.app_name == table.c.app_name,
+                            sessions.c.user_id == table.c.user_id,
+                            sessions.c.id == table.c.session_id,
+                        ),
+                    )
+                )
+        stats.sessions_archived += deleted
+        stats.sessions_skipped += len(rows) - deleted
+        stats.events_archived += len(events)
+        return len(rows)
+
+    def archive(self, ttls: Dict[str, float]) -> ArchiveStats:
+        """
+        Archive the expired sessions of every app with a TTL.
+
+        Args:
+            ttls (Dict[str, float]): TTL in days per app name.
+
+        Returns:
+            ArchiveStats: What was (or, in a dry run, would be) archived.
+        """
+        stats = ArchiveStats()
+        started = time.perf_counter()
+        started_at = datetime.datetime.now(datetime.timezone.utc)
+        run_id = f"{started_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        batch_number = 0
+        for app_name, ttl_days in ttls.items():
+            cutoff = _db_now(self.engine) - datetime.timedelta(days=ttl_days)
+            for rows in self._expired_batches(app_name, cutoff):
+                stats.sessions_scanned += len(rows)
+                expired = [row for row in rows if self.include_leads or not _has_lead(row.state)]
+                stats.sessions_kept_with_lead += len(rows) - len(expired)
+                if not expired:
+                    continue
+                archived = self._archive_batch(expired, cutoff, run_id, batch_number, stats)
+                if not archived:
+                    continue
+                batch_number += 1
+                logger.info(
+                    "Archived batch %i of %s: %i sessions", batch_number, app_name, archived
+                )
+        stats.elapsed_secs = time.perf_counter() - started
+        return stats
+
+    def _dataset(self, app_name: str, kind: str) -> Optional[ds.Dataset]:
+        path = f"{self.root.rstrip('/')}/{app_name}/{kind}"
+        if self.filesystem.get_file_info(path).type == pyarrow.fs.FileType.NotFound:
+            return None
+        schema = SESSIONS_SCHEMA if kind == "sessions" else EVENTS_SCHEMA
+        return ds.dataset(path, filesystem=self.filesystem, format="parquet", schema=schema)
+
+    def restore(self, app_name: str, user_id: str, session_id: Optional[str] = None) -> List[str]:
+        """
+        Restore archived sessions of a user into the session database.
+
+        Args:
+            app_name (str): The app of the sessions.
+            user_id (str): The user whose sessions are restored.
+            session_id (Optional[str]): Restore only this session.
+
+        Returns:
+            List[str]: Ids of the restored sessions. Sessions that exist in
+            the database are left alone and not listed.
+        """
+        sessions_dataset = self._dataset(app_name, "sessions")
+        if sessions_dataset is None:
+            return []
+        condition = pc.field("user_id") == user_id
+        if session_id is not None:
+            condition = condition & (pc.field("session_id") == session_id)
+        # A session archived, restored and archived again has several rows;
+        # the latest one wins.
+        latest: Dict[str, dict] = {}
+        for row in sessions_dataset.to_table(filter=condition).to_pylist():
+            kept = latest.get(row["session_id"])
+            if kept is None or row["archived_at"] > kept["archived_at"]:
+                latest[row["session_id"]] = row
+        if not latest:
+            return []
+
+        events_dataset = self._dataset(app_name, "events")
+        events: Dict[str, Dict[str, Tuple[Event, bool]]] = {sid: {} for sid in latest}
+        if events_dataset is not None:
+            table = events_dataset.to_table(
+                columns=["session_id", "event", "compacted"],
+                filter=condition & pc.field("session_id").isin(list(latest)),
+            )
+            for row in table.to_pylist():
+                event = Event.model_validate_json(row["event"])
+                events[row["session_id"]][event.id] = (event, row["compacted"])
+
+        restored = []
+        now = datetime.datetime.now(datetime.timezone.utc)
+        storage = StorageSession.__table__
+        with OrmSession(self.engine) as orm_session, orm_session.begin():
+            existing = set(
+                orm_session.scalars(
+                    select(storage.c.id).where(
+                        storage.c.app_name == app_name,
+                        storage.c.user_id == user_id,
+                        storage.c.id.in_(list(latest)),
+                    )
+                )
+            )
+            for sid, row in latest.items():
+                if sid in existing:
+                    continue
+                # update_time defaults to now, so the session is not expired
+                # again by the next run.
+                orm_session.add(
+                    StorageSession(
+                        app_name=app_name,
+                        user_id=user_id,
+                        id=sid,
+                        state=json.loads(row["state"]),
+                        create_time=row["create_time"],
+                    )
+                )
+                session = Session(app_name=app_name, user_id=user_id, id=sid)
+                ordered = sorted(events[sid].values(), key=lambda item: item[0].timestamp)
+                # Compacted events go back to event_archive, so the session
+                # has the same shape as before it expired.
+                orm_session.add_all(
+                    StorageEvent.from_event(session, event)
+                    for event, compacted in ordered
+                    if not (compacted and self._has_event_archive)
+                )
+                compacted_rows = [
+                    {
+                        "app_name": app_name,
+                        "user_id": user_id,
+                        "session_id": sid,
+                        "event_id": event.id,
+                        "timestamp": event.timestamp,
+                        "event": event.model_dump_json(exclude_none=True),
+                        "archived_at": now,
+                    }
+                    for event, compacted in ordered
+                    if compacted and self._has_event_archive
+                ]
+                if compacted_rows:
+                    orm_session.execute(insert(event_archive_table), compacted_rows)
+                restored.append(sid)
+        return restored
+
+
+def main() -> None:
+    config = Config()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=config.SESSION_ARCHIVE_URI, help="archive root")
+    parser.add_argument("--db-url", default=None, help="defaults to the configured session database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive = commands.add_parser("archive", help="move expired sessions to Parquet")
+    archive.add_argument("--dry-run", action="store_true", help="only report what would be archived")
+    archive.add_argument("--batch-size", type=int, default=config.SESSION_ARCHIVE_BATCH_SIZE)
+    archive.add_argument(
+        "--include-leads",
+        action="store_true",
+        default=config.SESSION_TTL_INCLUDE_LEADS,
+        help="also archive sessions that produced a lead",
+    )
+    restore = commands.add_parser("restore", help="copy archived sessions back")
+    restore.add_argument("--app-name", default=config.app_name)
+    restore.add_argument("--user-id", required=True)
+    restore.add_argument("--session-id", default=None)
+    args = parser.parse_args()
+
+    engine = create_engine(args.db_url or config.session_db_url)
+    try:
+        if args.command == "restore":
+            archiver = SessionArchiver(engine, args.uri)
+            restored = archiver.restore(args.app_name, args.user_id, args.session_id)
+            print(f"restored {len(restored)} sessions")
+            for session_id in restored:
+                print(f"  {session_id}")
+            return
+        archiver = SessionArchiver(
+            engine,
+            args.uri,
+            batch_size=args.batch_size,
+            include_leads=args.include_leads,
+            dry_run=args.dry_run,
+        )
+        stats = archiver.archive(session_ttls(config))
+    finally:
+        engine.dispose()
+
+    rate = stats.sessions_archived / stats.elapsed_secs if stats.elapsed_secs else 0.0
+    print(f"{'dry run: ' if args.dry_run else ''}{stats.sessions_scanned} expired sessions scanned")
+    print(
+        f"sessions {'to archive' if args.dry_run else 'archived'} {stats.sessions_archived:>8}"
+        f"  kept with lead {stats.sessions_kept_with_lead:>6}  skipped {stats.sessions_skipped:>6}"
+    )
+    print(f"events {stats.events_archived:>8}  files {stats.files_written}")
+    print(f"elapsed {stats.elapsed_secs:.2f}s  {rate:.0f} sessions/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Session service on an asyncio SQLAlchemy engine (asyncpg).
+
+ADK's DatabaseSessionService runs synchronous SQLAlchemy calls inside its
+async methods, so every session read and event append blocks the worker's
+event loop for a database round trip. This service stores sessions in the
+same tables with ADK's own row models and the same semantics (state
+prefixes, temp state trimming, stale session check), but awaits the
+database through an asyncio engine, so other turns keep running meanwhile.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session, _session_util
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.database_session_service import (
+    Base,
+    StorageAppState,
+    StorageEvent,
+    StorageSession,
+    StorageUserState,
+    _merge_state,
+    set_sqlite_pragma,
+)
+from sqlalchemy import delete, event as sqlalchemy_event, select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+
+class AsyncDatabaseSessionService(BaseSessionService):
+    """Stores sessions in a SQL database through an asyncio engine.
+
+    Args:
+        db_url (str): Database URL with an async driver, e.g.
+            ``postgresql+asyncpg://...`` or ``sqlite+aiosqlite:///...``.
+        **kwargs: Passed on to ``create_async_engine`` (pool settings,
+            ``connect_args``).
+    """
+
+    def __init__(self, db_url: str, **kwargs: Any):
+        self.db_engine: AsyncEngine = create_async_engine(db_url, **kwargs)
+        if self.db_engine.dialect.name == "sqlite":
+            sqlalchemy_event.listen(self.db_engine.sync_engine, "connect", set_sqlite_pragma)
+        # Objects stay readable after commit; each call uses its own session.
+        self._sessions = async_sessionmaker(self.db_engine, expire_on_commit=False)
+        self._tables_ready = False
+        self._tables_lock = asyncio.Lock()
+
+    async def _ready(self) -> None:
+        # DatabaseSessionService creates the tables in its constructor, which
+        # cannot await; here it happens on first use.
+        if self._tables_ready:
+            return
+        async with self._tables_lock:
+            if not self._tables_ready:
+                async with self.db_engine.begin() as connection:
+                    await connection.run_sync(Base.metadata.create_all)
+                self._tables_ready = True
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        await self._ready()
+        async with self._sessions() as sql_session:
+            if session_id and await sql_session.get(
+                StorageSession, (app_name, user_id, session_id)
+            ):
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+            storage_app_state = await sql_session.get(StorageAppState, (app_name,))
+            if not storage_app_state:
+                storage_app_state = StorageAppState(app_name=app_name, state={})
+                sql_session.add(storage_app_state)
+            storage_user_state = await sql_session.get(StorageUserState, (app_name, user_id))
+            if not storage_user_state:
+                storage_user_state = StorageUserState(app_name=app_name, user_id=user_id, state={})
+                sql_session.add(storage_user_state)
+
+            state_deltas = _session_util.extract_state_delta(state)
+            if state_deltas["app"]:
+                storage_app_state.state = storage_app_state.state | state_deltas["app"]
+            if state_deltas["user"]:
+                storage_user_state.state = storage_user_state.state | state_deltas["user"]
+            storage_session = StorageSession(
+                app_name=app_name, user_id=user_id, id=session_id, state=state_deltas["session"]
+            )
+            sql_session.add(storage_session)
+            await sql_session.commit()
+            await sql_session.refresh(storage_session)
+
+            merged_state = _merge_state(
+                storage_app_state.state, storage_user_state.state, state_deltas["session"]
+            )
+            return storage_session.to_session(state=merged_state)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        await self._ready()
+        async with self._sessions() as sql_session:
+            storage_session = await sql_session.get(
+                StorageSession, (app_name, user_id, session_id)
+            )
+            if storage_session is None:
+                return None
+
+            query = select(StorageEvent).where(
+                StorageEvent.app_name == app_name,
+                StorageEvent.user_id == user_id,
+                StorageEvent.session_id == session_id,
+            )
+            if config and config.after_timestamp:
+                query = query.where(
+                    StorageEvent.timestamp >= datetime.fromtimestamp(config.after_timestamp)
+                )
+            query = query.order_by(StorageEvent.timestamp.desc())
+            if config and config.num_recent_events:
+                query = query.limit(config.num_recent_events)
+            storage_events = (await sql_session.scalars(query)).all()
+
+            storage_app_state = await sql_session.get(StorageAppState, (app_name,))
+            storage_user_state = await sql_session.get(StorageUserState, (app_name, user_id))
+            merged_state = _merge_state(
+                storage_app_state.state if storage_app_state else {},
+                storage_user_state.state if storage_user_state else {},
+                storage_session.state,
+            )
+            events = [storage_event.to_event() for storage_event in reversed(storage_events)]
+            return storage_session.to_session(state=merged_state, events=events)
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        await self._ready()
+        async with self._sessions() as sql_session:
+            query = select(StorageSession).where(StorageSession.app_name == app_name)
+            user_states = select(StorageUserState).where(StorageUserState.app_name == app_name)
+            if user_id is not None:
+                query = query.where(StorageSession.user_id == user_id)
+                user_states = user_states.where(StorageUserState.user_id == user_id)
+            storage_sessions = (await sql_session.scalars(query)).all()
+            storage_app_state = await sql_session.get(StorageAppState, (app_name,))
+            app_state = storage_app_state.state if storage_app_state else {}
+            user_states_map = {
+                storage_user_state.user_id: storage_user_state.state
+                for storage_user_state in (await sql_session.scalars(user_states)).all()
+            }
+            return ListSessionsResponse(
+                sessions=[
+                    storage_session.to_session(
+                        state=_merge_state(
+                            app_state,
+                            user_states_map.get(storage_session.user_id, {}),
+                            storage_session.state,
+                        )
+                    )
+                    for storage_session in storage_sessions
+                ]
+            )
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self._ready()
+        async with self._sessions() as sql_session:
+            await sql_session.execute(
+                delete(StorageSession).where(
+                    StorageSession.app_name == app_name,
+                    StorageSession.user_id == user_id,
+                    StorageSession.id == session_id,
+                )
+            )
+            await sql_session.commit()
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        await self._ready()
+        event = self._trim_temp_delta_state(event)
+
+        async with self._sessions() as sql_session:
+            storage_session = await sql_session.get(
+                StorageSession, (session.app_name, session.user_id, session.id)
+            )
+            if storage_session.update_timestamp_tz > session.last_update_time:
+                raise ValueError(
+                    "The last_update_time provided in the session object"
+                    f" {datetime.fromtimestamp(session.last_update_time):'%Y-%m-%d %H:%M:%S'} is"
+                    " earlier than the update_time in the storage_session"
+                    f" {datetime.fromtimestamp(storage_session.update_timestamp_tz):'%Y-%m-%d %H:%M:%S'}."
+                    " Please check if it is a stale session."
+                )
+            storage_app_state = await sql_session.get(StorageAppState, (session.app_name,))
+            storage_user_state = await sql_session.get(
+                StorageUserState, (session.app_name, session.user_id)
+            )
+            if event.actions and event.actions.state_delta:
+                state_deltas = _session_util.extract_state_delta(event.actions.state_delta)
+                if state_deltas["app"]:
+                    storage_app_state.state = storage_app_state.state | state_deltas["app"]
+                if state_deltas["user"]:
+                    storage_user_state.state = storage_user_state.state | state_deltas["user"]
+                if state_deltas["session"]:
+                    storage_session.state = storage_session.state | state_deltas["session"]
+
+            sql_session.add(StorageEvent.from_event(session, event))
+            await sql_session.commit()
+            await sql_session.refresh(storage_session)
+            session.last_update_time = storage_session.update_timestamp_tz
+
+        await super().append_event(session=session, event=event)
+        return event
@@ -0,0 +1,214 @@
+"""In-process LRU cache of sessions in front of a database session service."""
+
+import copy
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.database_session_service import (
+    StorageAppState,
+    StorageSession,
+    StorageUserState,
+)
+from google.adk.sessions.state import State
+from sqlalchemy import select
+
+from ..shared_libraries.metrics import counter, gauge
+from .engine import fetch_one
+from .group_commit import flush_session
+
+SessionKey = Tuple[str, str, str]
+# (session update time, app state update time, user state update time)
+Versions = Tuple[Optional[float], Optional[float], Optional[float]]
+
+# A full load reads the session, its events, the app state and the user state;
+# a validated hit only reads the three update times in one statement.
+FULL_LOAD_QUERIES = 4
+VALIDATION_QUERIES = 1
+
+
+def _versions_query(app_name: str, user_id: str, session_id: str):
+    session_time = select(StorageSession.update_time).where(
+        StorageSession.app_name == app_name,
+        StorageSession.user_id == user_id,
+        StorageSession.id == session_id,
+    )
+    app_time = select(StorageAppState.update_time).where(StorageAppState.app_name == app_name)
+    user_time = select(StorageUserState.update_time).where(
+        StorageUserState.app_name == app_name, StorageUserState.user_id == user_id
+    )
+    return select(
+        session_time.scalar_subquery(), app_time.scalar_subquery(), user_time.scalar_subquery()
+    )
+
+
+cache_lookups = counter(
+    "agent_session_cache_lookups_total",
+    "Session cache lookups by result (hit, miss, stale, bypass)",
+    ("result",),
+)
+cache_queries_saved = counter(
+    "agent_session_cache_db_queries_saved_total",
+    "Database queries avoided by serving validated sessions from the cache",
+)
+
+
+class CachedSessionService(BaseSessionService):
+    """Keeps recently used sessions of a database session service in memory.
+
+    Every lookup is validated against the update times of the session, app
+    state and user state rows, so a session changed by another replica is
+    reloaded in full. Appended events are written through to the database and
+    applied to the cached copy. Callers get a copy whose state and event list
+    they may change freely; the events themselves are shared.
+
+    Validation is as precise as the database's ``update_time``: microseconds
+    on PostgreSQL, but only seconds with SQLite's CURRENT_TIMESTAMP.
+
+    Args:
+        inner (BaseSessionService): The database session service holding the
+            sessions (sync or asyncio), or a wrapper of it exposing its
+            ``db_engine``.
+        max_entries (int): Sessions kept, least recently used evicted first.
+    """
+
+    def __init__(self, inner: BaseSessionService, max_entries: int = 1000):
+        self.inner = inner
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[SessionKey, Tuple[Versions, Session]]" = OrderedDict()
+        self._sqlite = inner.db_engine.dialect.name == "sqlite"
+        gauge(
+            "agent_session_cache_entries",
+            "Sessions held in the session cache",
+            lambda: len(self._entries),
+        )
+
+    def _timestamp(self, value: Optional[datetime]) -> Optional[float]:
+        # Same conversion as DatabaseSessionService: SQLite returns naive UTC.
+        if value is None:
+            return None
+        if self._sqlite:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+
+    async def _versions(self, app_name: str, user_id: str, session_id: str) -> Versions:
+        query = _versions_query(app_name, user_id, session_id)
+        row = await fetch_one(self.inner.db_engine, query)
+        return tuple(self._timestamp(value) for value in row)
+
+    @staticmethod
+    def _copy(session: Session) -> Session:
+        return session.model_copy(
+            update={"state": copy.deepcopy(session.state), "events": list(session.events)}
+        )
+
+    def _put(self, key: SessionKey, versions: Versions, session: Session) -> None:
+        self._entries[key] = (versions, session)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        return await self.inner.create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        if config is not None:
+            # Filtered loads are rare and not worth caching.
+            cache_lookups.inc(result="bypass")
+            return await self.inner.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=config
+            )
+
+        key = (app_name, user_id, session_id)
+        versions = await self._versions(app_name, user_id, session_id)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] == versions:
+                self._entries.move_to_end(key)
+                cache_lookups.inc(result="hit")
+                cache_queries_saved.inc(FULL_LOAD_QUERIES - VALIDATION_QUERIES)
+                return self._copy(entry[1])
+            cache_lookups.inc(result="stale")
+            del self._entries[key]
+        else:
+            cache_lookups.inc(result="miss")
+
+        if versions[0] is None:
+            return None
+        session = await self.inner.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        if session is not None:
+            # The versions were read before the load: if a write slipped in
+            # between, the next lookup sees newer versions and reloads.
+            self._put(key, versions, self._copy(session))
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        return await self.inner.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self._entries.pop((app_name, user_id, session_id), None)
+        await self.inner.delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        key = (session.app_name, session.user_id, session.id)
+        try:
+            event = await self.inner.append_event(session, event)
+        except Exception:
+            self._entries.pop(key, None)
+            raise
+        if event.partial:
+            return event
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return event
+        versions, cached = entry
+        state_delta = event.actions.state_delta if event.actions else None
+        if state_delta and any(
+            name.startswith((State.APP_PREFIX, State.USER_PREFIX)) for name in state_delta
+        ):
+            # The app or user state row changed too; its new update time is
+            # not known here, so the next lookup loads the session in full.
+            del self._entries[key]
+            return event
+        await super().append_event(cached, event)
+        cached.last_update_time = session.last_update_time
+        self._put(key, (session.last_update_time, versions[1], versions[2]), cached)
+        return event
+
+    async def flush(self, session: Session) -> None:
+        await flush_session(self.inner, session)
+        # Buffered events are already in the cached copy; only the session's
+        # update time moved with their commit.
+        key = (session.app_name, session.user_id, session.id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1].events and session.events:
+            versions, cached = entry
+            if cached.events[-1] is session.events[-1]:
+                cached.last_update_time = session.last_update_time
+                self._entries[key] = ((session.last_update_time, versions[1], versions[2]), cached)
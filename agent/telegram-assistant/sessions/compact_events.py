@@ -0,0 +1,240 @@
+"""Compact, compressed storage of the bulky parts of session events.
+
+ADK stores every event as a row of the ``events`` table with its content and
+metadata as JSON. ``CompactEventSessionService`` writes the same row without
+``content``, ``grounding_metadata``, ``usage_metadata`` and
+``citation_metadata``, and stores those fields in ``event_payloads`` as
+msgpack compressed with zstd. Everything else, including the actions that
+carry state deltas and ``custom_metadata`` (read by the timings report),
+stays in the ADK row, so ADK keeps handling state and stale checks.
+
+Loads fetch the payloads of the returned events that have no content in one
+query. Rows written before this service, which carry their content inline,
+have no payload and are returned unchanged.
+"""
+
+from typing import Any, Dict, Optional
+
+import msgpack
+import zstandard
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.database_session_service import Base
+from google.genai import types
+from sqlalchemy import (
+    Column,
+    ForeignKeyConstraint,
+    LargeBinary,
+    String,
+    Table,
+    delete,
+    insert,
+    select,
+)
+
+from .engine import create_tables, execute, fetch_all
+from .group_commit import GroupCommitSessionService, flush_session
+
+# Registered with ADK's metadata so the foreign key to ``sessions`` resolves.
+metadata = Base.metadata
+
+event_payloads_table = Table(
+    "event_payloads",
+    metadata,
+    Column("app_name", String(128), primary_key=True),
+    Column("user_id", String(128), primary_key=True),
+    Column("session_id", String(128), primary_key=True),
+    Column("event_id", String(128), primary_key=True),
+    Column("payload", LargeBinary, nullable=False),
+    ForeignKeyConstraint(
+        ["app_name", "user_id", "session_id"],
+        ["sessions.app_name", "sessions.user_id", "sessions.id"],
+        ondelete="CASCADE",
+    ),
+)
+
+# First byte of every payload, so the format can change later.
+FORMAT_MSGPACK_ZSTD = 1
+
+# Event fields moved to the payload, with their types for decoding.
+PAYLOAD_FIELDS = {
+    "content": types.Content,
+    "grounding_metadata": types.GroundingMetadata,
+    "usage_metadata": types.GenerateContentResponseUsageMetadata,
+    "citation_metadata": types.CitationMetadata,
+}
+
+
+class EventCodec:
+    """Encodes the payload fields of an event as zstd-compressed msgpack.
+
+    Args:
+        level (int): zstd compression level.
+    """
+
+    def __init__(self, level: int = 3):
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, event: Event) -> Optional[bytes]:
+        """Return the payload of ``event``, or None if it has no payload fields."""
+        fields = {
+            name: getattr(event, name).model_dump(exclude_none=True, mode="json")
+            for name in PAYLOAD_FIELDS
+            if getattr(event, name) is not None
+        }
+        if not fields:
+            return None
+        packed = msgpack.packb(fields, use_bin_type=True)
+        return bytes([FORMAT_MSGPACK_ZSTD]) + self._compressor.compress(packed)
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        """Return the payload fields as models, ready for ``Event.model_copy``."""
+        payload = bytes(payload)
+        if payload[0] != FORMAT_MSGPACK_ZSTD:
+            raise ValueError(f"Unknown event payload format {payload[0]}")
+        fields = msgpack.unpackb(self._decompressor.decompress(payload[1:]), raw=False)
+        return {
+            name: PAYLOAD_FIELDS[name].model_validate(value) for name, value in fields.items()
+        }
+
+
+class CompactEventSessionService(BaseSessionService):
+    """Stores event payloads of a database session service compactly.
+
+    Args:
+        inner (BaseSessionService): The database session service (sync or
+            asyncio) holding sessions and event rows, or a
+            GroupCommitSessionService in front of it, whose transactions
+            then carry the payloads as well.
+        level (int): zstd compression level of new payloads.
+    """
+
+    def __init__(self, inner: BaseSessionService, level: int = 3):
+        self.inner = inner
+        self.db_engine = inner.db_engine
+        self.codec = EventCodec(level)
+        self._table_ready = False
+
+    async def _ensure_table(self) -> None:
+        if not self._table_ready:
+            await create_tables(self.db_engine, metadata, [event_payloads_table])
+            self._table_ready = True
+
+    def _where(self, app_name: str, user_id: str, session_id: str):
+        table = event_payloads_table
+        return (
+            table.c.app_name == app_name,
+            table.c.user_id == user_id,
+            table.c.session_id == session_id,
+        )
+
+    async def _fill_payloads(self, session: Session) -> None:
+        missing = [event.id for event in session.events if event.content is None]
+        if not missing:
+            return
+        await self._ensure_table()
+        table = event_payloads_table
+        rows = await fetch_all(
+            self.db_engine,
+            select(table.c.event_id, table.c.payload).where(
+                *self._where(session.app_name, session.user_id, session.id),
+                table.c.event_id.in_(missing),
+            ),
+        )
+        if not rows:
+            return
+        payloads = {event_id: payload for event_id, payload in rows}
+        session.events = [
+            event.model_copy(update=self.codec.decode(payloads[event.id]))
+            if event.id in payloads
+            else event
+            for event in session.events
+        ]
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        return await self.inner.create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        session = await self.inner.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            await self._fill_payloads(session)
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        return await self.inner.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self.inner.delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return await self.inner.append_event(session, event)
+        payload = self.codec.encode(event)
+        if payload is None:
+            return await self.inner.append_event(session, event)
+
+        await self._ensure_table()
+        where = self._where(session.app_name, session.user_id, session.id)
+        insert_payload = insert(event_payloads_table).values(
+            app_name=session.app_name,
+            user_id=session.user_id,
+            session_id=session.id,
+            event_id=event.id,
+            payload=payload,
+        )
+        # The stub shares the actions of the event, so ADK's state handling
+        # (temp state trimming included) applies to both.
+        stub = event.model_copy(update={name: None for name in PAYLOAD_FIELDS})
+        if isinstance(self.inner, GroupCommitSessionService):
+            # Written in the transaction of the buffered event row.
+            self.inner.defer(session, insert_payload)
+            await self.inner.append_event(session, stub)
+            return self._restore_event(session, stub, event)
+
+        await execute(self.db_engine, insert_payload)
+        try:
+            await self.inner.append_event(session, stub)
+        except Exception:
+            await execute(
+                self.db_engine,
+                delete(event_payloads_table).where(
+                    *where, event_payloads_table.c.event_id == event.id
+                ),
+            )
+            raise
+        return self._restore_event(session, stub, event)
+
+    @staticmethod
+    def _restore_event(session: Session, stub: Event, event: Event) -> Event:
+        # ADK appended the stub to the in-memory session; the runner keeps
+        # working with the full event.
+        if session.events and session.events[-1] is stub:
+            session.events[-1] = event
+        return event
+
+    async def flush(self, session: Session) -> None:
+        await flush_session(self.inner, session)
@@ -0,0 +1,422 @@
+"""Compact long-running sessions in the session database.
+
+Telegram sessions live for weeks and every event stays in ``events``, so
+loading a session gets slower over time. This job picks sessions that have
+more than ``--keep`` events and either at least ``--min-events`` events or
+an oldest event older than ``--min-age-days``. For each, it keeps the last
+``--keep`` events and moves the older ones out:
+
+- their counts, time span, tool calls and last few messages are folded
+  into ``history_summary`` in the session state, which is added to the
+  model's instruction on every turn (see ``shared_libraries.history_summary``);
+  the customer profile and lead already live in state;
+- they are copied to ``event_archive`` (unless ``--no-archive``) and deleted
+  together with their compact payloads.
+
+The cut is moved back to an invocation boundary so a kept turn is never
+split from its tool calls. Only sessions idle for ``--min-idle-mins`` are
+touched, and each batch of ``--batch-size`` events is its own transaction
+that first locks the session row and checks that its ``update_time`` has
+not changed; a session written to meanwhile is skipped.
+
+Usage:
+    python -m telegram-assistant.sessions.compaction [--dry-run] [--keep 100]
+        [--min-events 300] [--min-age-days 14] [--batch-size 500] [--db-url URL]
+"""
+
+import argparse
+import datetime
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from google.adk.events import Event
+from google.adk.sessions.database_session_service import StorageEvent, StorageSession
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    MetaData,
+    String,
+    Table,
+    Text,
+    create_engine,
+    delete,
+    func,
+    inspect,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as OrmSession
+
+from ..config import Config
+from ..shared_libraries.history_summary import HISTORY_SUMMARY_KEY, fold_summary
+from .compact_events import EventCodec, event_payloads_table
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+# Events moved out of compacted sessions. Rows outlive their sessions, so
+# there is no foreign key.
+event_archive_table = Table(
+    "event_archive",
+    metadata,
+    Column("app_name", String(128), primary_key=True),
+    Column("user_id", String(128), primary_key=True),
+    Column("session_id", String(128), primary_key=True),
+    Column("event_id", String(128), primary_key=True),
+    # Event.timestamp, seconds since the epoch
+    Column("timestamp", Float, nullable=False),
+    # The full event as JSON, payload included
+    Column("event", Text, nullable=False),
+    Column("archived_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class _SessionChanged(Exception):
+    """Raised inside a batch transaction when a turn wrote to the session."""
+
+
+@dataclass
+class CompactionStats:
+    """Counters of one compaction run."""
+
+    sessions_scanned: int = 0
+    sessions_compacted: int = 0
+    sessions_skipped: int = 0
+    events_removed: int = 0
+    events_archived: int = 0
+    batches: int = 0
+    elapsed_secs: float = 0.0
+    skipped: List[str] = field(default_factory=list)
+
+
+def _db_now(engine: Engine) -> datetime.datetime:
+    # ADK stores naive timestamps: UTC on SQLite, server local time elsewhere.
+    if engine.dialect.name == "sqlite":
+        return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return datetime.datetime.now()
+
+
+class SessionCompactor:
+    """Moves the old events of long sessions out of the session tables.
+
+    Args:
+        engine (Engine): Engine of the session database.
+        keep (int): Events kept per session, at least 1.
+        min_events (int): Sessions with at least this many events are compacted.
+        min_age_days (float): Sessions whose oldest event is older are compacted.
+        min_idle_mins (float): Sessions updated more recently are left alone.
+        batch_size (int): Events moved per transaction.
+        archive (bool): Copy removed events to ``event_archive``.
+        dry_run (bool): Only count what would be removed.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        keep: int = 100,
+        min_events: int = 300,
+        min_age_days: float = 14.0,
+        min_idle_mins: float = 60.0,
+        batch_size: int = 500,
+        archive: bool = True,
+        dry_run: bool = False,
+    ):
+        if keep < 1:
+            raise ValueError(f"keep must be at least 1, got {keep}")
+        self.engine = engine
+        self.keep = keep
+        self.min_events = min_events
+        self.min_age_days = min_age_days
+        self.min_idle_mins = min_idle_mins
+        self.batch_size = batch_size
+        self.archive = archive
+        self.dry_run = dry_run
+        self.codec = EventCodec()
+        self._has_payloads = inspect(engine).has_table(event_payloads_table.name)
+        if archive and not dry_run:
+            metadata.create_all(engine, tables=[event_archive_table])
+
+    def candidates(self, limit: Optional[int] = None) -> List[tuple]:
+        """Return (app_name, user_id, session_id, update_time, events) of sessions to compact."""
+        now = _db_now(self.engine)
+        events = StorageEvent.__table__
+        sessions = StorageSession.__table__
+        count = func.count(events.c.id)
+        query = (
+            select(
+                sessions.c.app_name, sessions.c.user_id, sessions.c.id, sessions.c.update_time, count
+            )
+            .join(
+                events,
+                (events.c.app_name == sessions.c.app_name)
+                & (events.c.user_id == sessions.c.user_id)
+                & (events.c.session_id == sessions.c.id),
+            )
+            .where(sessions.c.update_time < now - datetime.timedelta(minutes=self.min_idle_mins))
+            .group_by(
+                sessions.c.app_name, sessions.c.user_id, sessions.c.id, sessions.c.update_time
+            )
+            .having(count > self.keep)
+            .having(
+                or_(
+                    count >= self.min_events,
+                    func.min(events.c.timestamp) < now - datetime.timedelta(days=self.min_age_days),
+                )
+            )
+            .order_by(count.desc())
+        )
+        if limit:
+            query = query.limit(limit)
+        with self.engine.connect() as connection:
+            return [tuple(row) for row in connection.execute(query)]
+
+    def _old_event_ids(
+        self, connection, app_name: str, user_id: str, session_id: str
+    ) -> List[str]:
+        events = StorageEvent.__table__
+        rows = connection.execute(
+            select(events.c.id, events.c.invocation_id)
+            .where(
+                events.c.app_name == app_name,
+                events.c.user_id == user_id,
+                events.c.session_id == session_id,
+            )
+            .order_by(events.c.timestamp)
+        ).all()
+        cut = len(rows) - self.keep
+        while cut > 0 and rows[cut].invocation_id == rows[cut - 1].invocation_id:
+            cut -= 1
+        return [row.id for row in rows[: max(cut, 0)]]
+
+    def _load_events(
+        self, connection, app_name: str, user_id: str, session_id: str, ids: List[str]
+    ) -> List[Event]:
+        # ADK's row model converts rows to events, actions included.
+        with OrmSession(bind=connection) as orm_session:
+            rows = orm_session.scalars(
+                select(StorageEvent)
+                .where(
+                    StorageEvent.app_name == app_name,
+                    StorageEvent.user_id == user_id,
+                    StorageEvent.session_id == session_id,
+                    StorageEvent.id.in_(ids),
+                )
+                .order_by(StorageEvent.timestamp)
+            ).all()
+            events = [row.to_event() for row in rows]
+        if self._has_payloads:
+            table = event_payloads_table
+            payloads = dict(
+                connection.execute(
+                    select(table.c.event_id, table.c.payload).where(
+                        table.c.app_name == app_name,
+                        table.c.user_id == user_id,
+                        table.c.session_id == session_id,
+                        table.c.event_id.in_(ids),
+                    )
+                ).all()
+            )
+            events = [
+                event.model_copy(update=self.codec.decode(payloads[event.id]))
+                if event.id in payloads
+                else event
+                for event in events
+            ]
+        return events
+
+    def compact_session(
+        self,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        update_time: datetime.datetime,
+        stats: CompactionStats,
+    ) -> bool:
+        """
+        Compact one session in batches.
+
+        Returns:
+            bool: False if the session was written to meanwhile and skipped.
+        """
+        sessions = StorageSession.__table__
+        where_session = (
+            (sessions.c.app_name == app_name)
+            & (sessions.c.user_id == user_id)
+            & (sessions.c.id == session_id)
+        )
+        with self.engine.connect() as connection:
+            ids = self._old_event_ids(connection, app_name, user_id, session_id)
+            state = connection.execute(select(sessions.c.state).where(where_session)).scalar_one()
+        if not ids:
+            return True
+        if self.dry_run:
+            stats.events_removed += len(ids)
+            return True
+
+        state = dict(state or {})
+        seen = update_time
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start : start + self.batch_size]
+            try:
+                seen = self._move_batch(app_name, user_id, session_id, seen, state, batch, stats)
+            except _SessionChanged:
+                return False
+            stats.events_removed += len(batch)
+            stats.batches += 1
+        return True
+
+    def _move_batch(
+        self,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        seen: datetime.datetime,
+        state: Dict[str, Any],
+        batch: List[str],
+        stats: CompactionStats,
+    ) -> datetime.datetime:
+        sessions = StorageSession.__table__
+        events = StorageEvent.__table__
+        where_session = (
+            (sessions.c.app_name == app_name)
+            & (sessions.c.user_id == user_id)
+            & (sessions.c.id == session_id)
+        )
+        with self.engine.begin() as connection:
+            # Locks the session row for the rest of this short transaction;
+            # a turn that wrote to the session since it was read wins.
+            current = connection.execute(
+                select(sessions.c.update_time).where(where_session).with_for_update()
+            ).scalar_one_or_none()
+            if current != seen:
+                raise _SessionChanged(session_id)
+            loaded = self._load_events(connection, app_name, user_id, session_id, batch)
+            state[HISTORY_SUMMARY_KEY] = fold_summary(state.get(HISTORY_SUMMARY_KEY), loaded)
+            connection.execute(update(sessions).where(where_session).values(state=state))
+            if self.archive:
+                now = datetime.datetime.now(datetime.timezone.utc)
+                connection.execute(
+                    insert(event_archive_table),
+                    [
+                        {
+                            "app_name": app_name,
+                            "user_id": user_id,
+                            "session_id": session_id,
+                            "event_id": event.id,
+                            "timestamp": event.timestamp,
+                            "event": event.model_dump_json(exclude_none=True),
+                            "archived_at": now,
+                        }
+                        for event in loaded
+                    ],
+                )
+                stats.events_archived += len(loaded)
+            if self._has_payloads:
+                table = event_payloads_table
+                connection.execute(
+                    delete(table).where(
+                        table.c.app_name == app_name,
+                        table.c.user_id == user_id,
+                        table.c.session_id == session_id,
+                        table.c.event_id.in_(batch),
+                    )
+                )
+            connection.execute(
+                delete(events).where(
+                    events.c.app_name == app_name,
+                    events.c.user_id == user_id,
+                    events.c.session_id == session_id,
+                    events.c.id.in_(batch),
+                )
+            )
+            return connection.execute(
+                select(sessions.c.update_time).where(where_session)
+            ).scalar_one()
+
+    def run(self, max_sessions: Optional[int] = None) -> CompactionStats:
+        """
+        Compact every candidate session.
+
+        Args:
+            max_sessions (Optional[int]): Stop after this many sessions.
+
+        Returns:
+            CompactionStats: What was (or, in a dry run, would be) removed.
+        """
+        stats = CompactionStats()
+        started = time.perf_counter()
+        for app_name, user_id, session_id, update_time, _ in self.candidates(max_sessions):
+            stats.sessions_scanned += 1
+            try:
+                compacted = self.compact_session(app_name, user_id, session_id, update_time, stats)
+            except Exception as e:
+                logger.error("Compaction of session %s failed: %s", session_id, e)
+                compacted = False
+            if compacted:
+                stats.sessions_compacted += 1
+            else:
+                stats.sessions_skipped += 1
+                stats.skipped.append(session_id)
+        stats.elapsed_secs = time.perf_counter() - started
+        return stats
+
+
+def main() -> None:
+    config = Config()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be removed")
+    parser.add_argument("--keep", type=int, default=config.SESSION_COMPACTION_KEEP_EVENTS)
+    parser.add_argument("--min-events", type=int, default=config.SESSION_COMPACTION_MIN_EVENTS)
+    parser.add_argument("--min-age-days", type=float, default=config.SESSION_COMPACTION_MIN_AGE_DAYS)
+    parser.add_argument("--min-idle-mins", type=float, default=config.SESSION_COMPACTION_MIN_IDLE_MINS)
+    parser.add_argument("--batch-size", type=int, default=config.SESSION_COMPACTION_BATCH_SIZE)
+    parser.add_argument("--max-sessions", type=int, default=None)
+    parser.add_argument(
+        "--no-archive",
+        dest="archive",
+        action="store_false",
+        default=config.SESSION_COMPACTION_ARCHIVE,
+        help="delete old events instead of copying them to event_archive",
+    )
+    parser.add_argument("--db-url", default=None, help="defaults to the configured session database")
+    args = parser.parse_args()
+    if args.keep < 1:
+        parser.error("--keep must be at least 1")
+
+    engine = create_engine(args.db_url or config.session_db_url)
+    try:
+        compactor = SessionCompactor(
+            engine,
+            keep=args.keep,
+            min_events=args.min_events,
+            min_age_days=args.min_age_days,
+            min_idle_mins=args.min_idle_mins,
+            batch_size=args.batch_size,
+            archive=args.archive,
+            dry_run=args.dry_run,
+        )
+        stats = compactor.run(args.max_sessions)
+    finally:
+        engine.dispose()
+
+    rate = stats.events_removed / stats.elapsed_secs if stats.elapsed_secs else 0.0
+    print(f"{'dry run: ' if args.dry_run else ''}{stats.sessions_scanned} sessions scanned")
+    print(f"sessions compacted {stats.sessions_compacted:>8}  skipped {stats.sessions_skipped:>6}")
+    print(
+        f"events {'to remove' if args.dry_run else 'removed'} {stats.events_removed:>8}"
+        f"  archived {stats.events_archived:>6}  batches {stats.batches}"
+    )
+    print(f"elapsed {stats.elapsed_secs:.2f}s  {rate:.0f} events/s")
+    for session_id in stats.skipped:
+        print(f"skipped {session_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Engines of the session database: pool settings, timed checkouts, helpers.
+
+Session services get their engine options from Config (SESSION_DB_*): pool
+size and overflow, checkout timeout, pre-ping, recycling, a server-side
+statement timeout and, with asyncpg, the prepared statement cache size
+(set it to 0 behind PgBouncer in transaction mode).
+
+Both pool classes time every checkout, connecting included, into
+``agent_session_db_pool_checkout_seconds``. The wait across replicas is what
+the PostgreSQL connection budget (``max_connections`` divided by replicas
+and workers) has to be sized against.
+
+The session service wrappers run their own statements through ``fetch_one``,
+``fetch_all`` and ``execute``, which accept a synchronous or an asyncio
+engine, so they work in front of either database service.
+"""
+
+import time
+from typing import Any, Dict, List, Union
+
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from ..config import Config
+from ..shared_libraries.metrics import histogram
+
+AnyEngine = Union[Engine, AsyncEngine]
+
+ASYNC_DRIVER = "postgresql+asyncpg"
+
+pool_checkout_seconds = histogram(
+    "agent_session_db_pool_checkout_seconds",
+    "Time to check out a session database connection, waiting and connecting included",
+    ("driver",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording checkout time."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_seconds.observe(
+                time.perf_counter() - started, driver=self._dialect.driver
+            )
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording checkout time."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_seconds.observe(
+                time.perf_counter() - started, driver=self._dialect.driver
+            )
+
+
+def engine_options(config: Config, asynchronous: bool = False) -> Dict[str, Any]:
+    """
+    Return create_engine keyword arguments for a PostgreSQL session database.
+
+    Args:
+        config (Config): Provides the SESSION_DB_* settings.
+        asynchronous (bool): Options for asyncpg instead of psycopg2.
+
+    Returns:
+        Dict[str, Any]: Pool and connection options.
+    """
+    options: Dict[str, Any] = {
+        "poolclass": TimedAsyncAdaptedQueuePool if asynchronous else TimedQueuePool,
+        "pool_size": config.SESSION_DB_POOL_SIZE,
+        "max_overflow": config.SESSION_DB_MAX_OVERFLOW,
+        "pool_timeout": config.SESSION_DB_POOL_TIMEOUT_SECS,
+        "pool_pre_ping": config.SESSION_DB_POOL_PRE_PING,
+        "pool_recycle": config.SESSION_DB_POOL_RECYCLE_SECS,
+    }
+    timeout_ms = config.SESSION_DB_STATEMENT_TIMEOUT_MS
+    if asynchronous:
+        connect_args: Dict[str, Any] = {"statement_cache_size": config.SESSION_DB_STATEMENT_CACHE_SIZE}
+        if timeout_ms:
+            connect_args["server_settings"] = {"statement_timeout": str(timeout_ms)}
+        options["connect_args"] = connect_args
+    elif timeout_ms:
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
+def async_url(uri: str, config: Config) -> URL:
+    """Return ``uri`` with the asyncpg driver and its statement cache size."""
+    return (
+        make_url(uri)
+        .set(drivername=ASYNC_DRIVER)
+        .update_query_dict(
+            {"prepared_statement_cache_size": str(config.SESSION_DB_STATEMENT_CACHE_SIZE)}
+        )
+    )
+
+
+async def fetch_one(engine: AnyEngine, statement):
+    """Run a query and return its only row."""
+    if isinstance(engine, AsyncEngine):
+        async with engine.connect() as connection:
+            return (await connection.execute(statement)).one()
+    with engine.connect() as connection:
+        return connection.execute(statement).one()
+
+
+async def fetch_all(engine: AnyEngine, statement) -> List[Any]:
+    """Run a query and return all its rows."""
+    if isinstance(engine, AsyncEngine):
+        async with engine.connect() as connection:
+            return (await connection.execute(statement)).all()
+    with engine.connect() as connection:
+        return connection.execute(statement).all()
+
+
+async def execute(engine: AnyEngine, *statements) -> None:
+    """Run statements in one transaction."""
+    if isinstance(engine, AsyncEngine):
+        async with engine.begin() as connection:
+            for statement in statements:
+                await connection.execute(statement)
+        return
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(statement)
+
+
+async def create_tables(engine: AnyEngine, metadata, tables) -> None:
+    """Create ``tables`` of ``metadata`` if they are missing."""
+    if isinstance(engine, AsyncEngine):
+        async with engine.begin() as connection:
+            await connection.run_sync(metadata.create_all, tables=tables)
+        return
+    metadata.create_all(engine, tables=tables)
+
@@ -0,0 +1,110 @@
+"""Session service factories registered with the ADK service registry."""
+
+import logging
+from typing import List
+
+from google.adk.cli.service_registry import get_service_registry
+from google.adk.sessions import BaseSessionService, DatabaseSessionService
+
+from ..config import Config
+from .async_database_session_service import AsyncDatabaseSessionService
+from .cached_session_service import CachedSessionService
+from .compact_events import CompactEventSessionService
+from .engine import AnyEngine, async_url, engine_options
+from .group_commit import GroupCommitSessionService
+from .timed_session_service import TimedSessionService
+
+logger = logging.getLogger(__name__)
+
+DATABASE_SCHEMES = ("postgresql", "postgresql+psycopg2", "postgresql+asyncpg")
+SESSION_DB_DRIVERS = ("psycopg2", "asyncpg")
+REDIS_SCHEMES = ("redis", "rediss")
+
+# Database session services created in this process, for warm-up and probes.
+_database_services: List[BaseSessionService] = []
+# Services buffering event appends, flushed at shutdown.
+_group_commit_services: List[GroupCommitSessionService] = []
+
+
+def _database_session_service(uri: str, **kwargs):
+    # The registry passes agents_dir to every factory; the database service
+    # forwards its kwargs to SQLAlchemy, which does not accept it.
+    kwargs.pop("agents_dir", None)
+    config = Config()
+    if config.SESSION_DB_DRIVER not in SESSION_DB_DRIVERS:
+        raise ValueError(
+            f"Unknown SESSION_DB_DRIVER {config.SESSION_DB_DRIVER!r},"
+            f" expected one of {', '.join(SESSION_DB_DRIVERS)}"
+        )
+    if config.SESSION_DB_DRIVER == "asyncpg" or uri.startswith("postgresql+asyncpg"):
+        database = AsyncDatabaseSessionService(
+            async_url(uri, config), **{**engine_options(config, asynchronous=True), **kwargs}
+        )
+    else:
+        database = DatabaseSessionService(db_url=uri, **{**engine_options(config), **kwargs})
+    _database_services.append(database)
+    service = database
+    if config.SESSION_GROUP_COMMIT_ENABLED:
+        service = GroupCommitSessionService(
+            database,
+            max_events=config.SESSION_GROUP_COMMIT_MAX_EVENTS,
+            max_delay_secs=config.SESSION_GROUP_COMMIT_MAX_DELAY_SECS,
+            window_ms=config.SESSION_GROUP_COMMIT_WINDOW_MS,
+            min_sessions=config.SESSION_GROUP_COMMIT_MIN_SESSIONS,
+        )
+        _group_commit_services.append(service)
+    if config.SESSION_EVENT_ENCODING == "compact":
+        service = CompactEventSessionService(service, level=config.SESSION_EVENT_ZSTD_LEVEL)
+    elif config.SESSION_EVENT_ENCODING != "json":
+        raise ValueError(
+            f"Unknown SESSION_EVENT_ENCODING {config.SESSION_EVENT_ENCODING!r},"
+            " expected 'compact' or 'json'"
+        )
+    if config.SESSION_CACHE_ENABLED:
+        service = CachedSessionService(service, max_entries=config.SESSION_CACHE_MAX_ENTRIES)
+    return TimedSessionService(service)
+
+
+def _redis_session_service(uri: str, **kwargs):
+    # redis is only needed when Redis sessions are selected.
+    from .redis_session_service import RedisSessionService
+
+    config = Config()
+    service = RedisSessionService(
+        uri, max_events=config.REDIS_SESSION_MAX_EVENTS, prefix=config.REDIS_SESSION_KEY_PREFIX
+    )
+    if config.REDIS_SESSION_SNAPSHOTS_ENABLED:
+        from sqlalchemy import create_engine
+
+        from .session_snapshots import SessionSnapshotter
+
+        service.snapshots = SessionSnapshotter(
+            service,
+            create_engine(config.session_db_url, pool_pre_ping=True),
+            interval_secs=config.REDIS_SESSION_SNAPSHOT_SECS,
+        )
+        service.snapshots.start()
+    return TimedSessionService(service)
+
+
+def session_db_engines() -> List[AnyEngine]:
+    """Return the engines (sync or asyncio) of the database session services created so far."""
+    return [service.db_engine for service in _database_services]
+
+
+async def flush_session_services() -> None:
+    """Write the events buffered by the session services created so far."""
+    for service in _group_commit_services:
+        await service.flush_all()
+
+
+def register_session_services() -> None:
+    """Register the agent's session services for their URI schemes."""
+    registry = get_service_registry()
+    for scheme in DATABASE_SCHEMES:
+        registry.register_session_service(scheme, _database_session_service)
+    for scheme in REDIS_SCHEMES:
+        registry.register_session_service(scheme, _redis_session_service)
+    logger.debug(
+        "Registered session services for %s", ", ".join(DATABASE_SCHEMES + REDIS_SCHEMES)
+    )
@@ -0,0 +1,364 @@
+"""Group commit of session event appends.
+
+ADK's database session service commits every event of a turn on its own:
+the user message, each function call and response, and the model reply.
+``GroupCommitSessionService`` applies events to the in-memory session right
+away, as ADK does, but keeps them in a per-session buffer. The buffer is
+written in one transaction, with the same stale session check and state
+handling as ADK, when:
+
+- the invocation ends (``SessionFlushPlugin.after_run_callback``);
+- it holds ``max_events`` events;
+- its oldest event is ``max_delay_secs`` old (invocations that failed or
+  whose client went away never reach the end callback);
+- the session is read, listed or deleted through this service;
+- the server shuts down (``flush_all``).
+
+With ``window_ms`` set, a flush that starts while at least ``min_sessions``
+flushes are in progress waits up to that long, and all flushes arriving
+meanwhile share one transaction. If that transaction fails, every buffer is
+retried in its own transaction, so a stale session only fails its own turn.
+Flushes only overlap with the asyncio driver (SESSION_DB_DRIVER=asyncpg):
+psycopg2 commits block the event loop, so there is nothing to group.
+
+Durability: an event is durable once its flush commits, not when
+``append_event`` returns. The /run endpoint answers after the end of the
+invocation, so a reply it returns is stored. Streaming endpoints send events
+before the invocation ends: if the worker dies in between, the client has
+seen the turn and the database has not. A flush that fails (stale session,
+database error) raises from the end of the invocation and its events are
+dropped, as a failed ADK append would be. Other workers and processes only
+see a session's new events once they are committed.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.sessions import BaseSessionService, Session, _session_util
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.database_session_service import (
+    StorageAppState,
+    StorageEvent,
+    StorageSession,
+    StorageUserState,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+
+from ..shared_libraries.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str, str]
+
+flushes = counter(
+    "agent_session_flushes_total",
+    "Session event buffers written, by trigger",
+    ("trigger",),
+)
+flushed_events = histogram(
+    "agent_session_flush_events",
+    "Events written per session buffer flush",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+group_sessions = histogram(
+    "agent_session_group_commit_sessions",
+    "Session buffers written per transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+
+class _Buffer:
+    """Events of one session waiting for their transaction."""
+
+    def __init__(self, session: Session):
+        # Session objects the events were appended to; a cached session and
+        # the runner's copy may both be in use.
+        self.sessions = [session]
+        self.events: List[Event] = []
+        self.statements: List[Any] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def session(self) -> Session:
+        return self.sessions[0]
+
+    @property
+    def since(self) -> float:
+        # Update time the stale check compares against; flushes of earlier
+        # buffers of the session advance it.
+        return max(session.last_update_time for session in self.sessions)
+
+
+def _stale_error(since: float, update_time: float) -> ValueError:
+    # Same message as DatabaseSessionService.append_event.
+    return ValueError(
+        "The last_update_time provided in the session object"
+        f" {datetime.fromtimestamp(since):'%Y-%m-%d %H:%M:%S'} is"
+        " earlier than the update_time in the storage_session"
+        f" {datetime.fromtimestamp(update_time):'%Y-%m-%d %H:%M:%S'}."
+        " Please check if it is a stale session."
+    )
+
+
+def _write(sql_session: OrmSession, buffers: List[_Buffer]) -> List[float]:
+    # Port of DatabaseSessionService.append_event for many events and
+    # sessions; returns the new update time of each session.
+    storage_sessions = []
+    for buffer in buffers:
+        session = buffer.session
+        storage_session = sql_session.get(
+            StorageSession, (session.app_name, session.user_id, session.id)
+        )
+        if storage_session is None:
+            raise ValueError(f"Session {session.id} not found")
+        if storage_session.update_timestamp_tz > buffer.since:
+            raise _stale_error(buffer.since, storage_session.update_timestamp_tz)
+        storage_app_state = sql_session.get(StorageAppState, (session.app_name,))
+        storage_user_state = sql_session.get(
+            StorageUserState, (session.app_name, session.user_id)
+        )
+        for event in buffer.events:
+            if event.actions and event.actions.state_delta:
+                state_deltas = _session_util.extract_state_delta(event.actions.state_delta)
+                if state_deltas["app"]:
+                    storage_app_state.state = storage_app_state.state | state_deltas["app"]
+                if state_deltas["user"]:
+                    storage_user_state.state = storage_user_state.state | state_deltas["user"]
+                if state_deltas["session"]:
+                    storage_session.state = storage_session.state | state_deltas["session"]
+            sql_session.add(StorageEvent.from_event(session, event))
+        for statement in buffer.statements:
+            sql_session.execute(statement)
+        storage_sessions.append(storage_session)
+    sql_session.commit()
+    update_times = []
+    for storage_session in storage_sessions:
+        sql_session.refresh(storage_session)
+        update_times.append(storage_session.update_timestamp_tz)
+    return update_times
+
+
+async def flush_session(service: BaseSessionService, session: Session) -> None:
+    """Flush the buffered events of ``session`` if ``service`` buffers them."""
+    flush = getattr(service, "flush", None)
+    if flush is not None:
+        await flush(session)
+
+
+class GroupCommitSessionService(BaseSessionService):
+    """Buffers event appends of a database session service, see the module docstring.
+
+    Args:
+        inner (BaseSessionService): The database session service (sync or
+            asyncio) holding the sessions.
+        max_events (int): Events buffered per session before a flush.
+        max_delay_secs (float): Age of the oldest buffered event that forces
+            a flush.
+        window_ms (float): How long a flush under load waits for others to
+            share its transaction; 0 disables cross-session grouping.
+        min_sessions (int): Flushes in progress, this one included, from
+            which a flush waits for the window.
+    """
+
+    def __init__(
+        self,
+        inner: BaseSessionService,
+        max_events: int = 50,
+        max_delay_secs: float = 30.0,
+        window_ms: float = 0.0,
+        min_sessions: int = 4,
+    ):
+        self.inner = inner
+        self.db_engine = inner.db_engine
+        self._max_events = max_events
+        self._max_delay_secs = max_delay_secs
+        self._window_secs = window_ms / 1000
+        self._min_sessions = min_sessions
+        self._buffers: Dict[SessionKey, _Buffer] = {}
+        self._in_flight: Dict[SessionKey, asyncio.Future] = {}
+        self._tasks: set = set()
+        self._flushing = 0
+        self._group: Optional[List[Tuple[_Buffer, asyncio.Future]]] = None
+
+    @staticmethod
+    def _key(session: Session) -> SessionKey:
+        return (session.app_name, session.user_id, session.id)
+
+    def defer(self, session: Session, *statements) -> None:
+        """Run ``statements`` in the transaction that writes the session's next events."""
+        self._buffer(session).statements.extend(statements)
+
+    def _buffer(self, session: Session) -> _Buffer:
+        key = self._key(session)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = _Buffer(session)
+            if self._max_delay_secs > 0:
+                buffer.timer = asyncio.get_running_loop().call_later(
+                    self._max_delay_secs, self._flush_later, key
+                )
+        elif not any(known is session for known in buffer.sessions):
+            buffer.sessions.append(session)
+        return buffer
+
+    def _flush_later(self, key: SessionKey) -> None:
+        task = asyncio.create_task(self._flush_key(key, "max_delay"))
+        self._tasks.add(task)
+        task.add_done_callback(self._flushed_later)
+
+    def _flushed_later(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Delayed session flush failed: %s", task.exception())
+
+    async def flush(self, session: Session) -> None:
+        """Write the buffered events of ``session`` in one transaction."""
+        await self._flush_key(self._key(session), "invocation_end")
+
+    async def flush_all(self) -> None:
+        """Write every buffered session, e.g. at shutdown."""
+        for key in list(self._buffers):
+            try:
+                await self._flush_key(key, "shutdown")
+            except Exception as e:
+                logger.error("Session flush at shutdown failed for %s: %s", key[2], e)
+
+    async def _flush_matching(self, app_name: str, user_id: Optional[str]) -> None:
+        for key in list(self._buffers):
+            if key[0] == app_name and (user_id is None or key[1] == user_id):
+                await self._flush_key(key, "read")
+
+    async def _flush_key(self, key: SessionKey, trigger: str) -> None:
+        # Buffers of a session are written in order, one at a time.
+        while key in self._in_flight:
+            await self._in_flight[key]
+        buffer = self._buffers.pop(key, None)
+        if buffer is None:
+            return
+        if buffer.timer is not None:
+            buffer.timer.cancel()
+        flushes.inc(trigger=trigger)
+        flushed_events.observe(len(buffer.events))
+        done = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        self._flushing += 1
+        try:
+            if self._window_secs > 0 and (
+                self._group is not None or self._flushing >= self._min_sessions
+            ):
+                update_time = await self._join_group(buffer)
+            else:
+                update_time = (await self._commit([buffer]))[0]
+            for session in buffer.sessions:
+                session.last_update_time = update_time
+        except Exception:
+            logger.error("Dropped %i buffered events of session %s", len(buffer.events), key[2])
+            raise
+        finally:
+            self._flushing -= 1
+            del self._in_flight[key]
+            done.set_result(None)
+
+    async def _commit(self, buffers: List[_Buffer]) -> List[float]:
+        group_sessions.observe(len(buffers))
+        if isinstance(self.db_engine, AsyncEngine):
+            async with AsyncSession(self.db_engine, expire_on_commit=False) as sql_session:
+                return await sql_session.run_sync(_write, buffers)
+        with OrmSession(self.db_engine, expire_on_commit=False) as sql_session:
+            return _write(sql_session, buffers)
+
+    async def _join_group(self, buffer: _Buffer) -> float:
+        future = asyncio.get_running_loop().create_future()
+        if self._group is None:
+            self._group = []
+            task = asyncio.create_task(self._commit_group())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        self._group.append((buffer, future))
+        return await future
+
+    async def _commit_group(self) -> None:
+        await asyncio.sleep(self._window_secs)
+        group, self._group = self._group, None
+        try:
+            update_times = await self._commit([buffer for buffer, _ in group])
+        except Exception as e:
+            if len(group) == 1:
+                group[0][1].set_exception(e)
+                return
+            # One stale session fails the whole transaction; retry the
+            # sessions one by one so only the failing one reports it.
+            for buffer, future in group:
+                try:
+                    future.set_result((await self._commit([buffer]))[0])
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        for (_, future), update_time in zip(group, update_times):
+            future.set_result(update_time)
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        return await self.inner.create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        await self._flush_key((app_name, user_id, session_id), "read")
+        return await self.inner.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        await self._flush_matching(app_name, user_id)
+        return await self.inner.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        buffer = self._buffers.pop((app_name, user_id, session_id), None)
+        if buffer is not None and buffer.timer is not None:
+            buffer.timer.cancel()
+        await self.inner.delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        buffer = self._buffer(session)
+        # Trims temp state and applies the delta to the in-memory session,
+        # as DatabaseSessionService does after its commit.
+        event = await super().append_event(session=session, event=event)
+        buffer.events.append(event)
+        if len(buffer.events) >= self._max_events:
+            await self._flush_key(self._key(session), "max_events")
+        return event
+
+
+class SessionFlushPlugin(BasePlugin):
+    """Flushes the session's buffered events when an invocation ends."""
+
+    def __init__(self, name: str = "session_flush"):
+        super().__init__(name=name)
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        await flush_session(invocation_context.session_service, invocation_context.session)
@@ -0,0 +1,371 @@
+"""ADK session service storing sessions in Redis.
+
+Keys, all under ``prefix``:
+
+- ``{prefix}:session:{app}:{user}:{id}`` - hash with ``create_time`` and
+  ``update_time`` (seconds, Redis server clock).
+- ``{prefix}:state:{app}:{user}:{id}`` - hash of session state, one JSON
+  value per key.
+- ``{prefix}:events:{app}:{user}:{id}`` - list of event JSON documents,
+  oldest first, capped to the newest ``max_events``.
+- ``{prefix}:app_state:{app}`` and ``{prefix}:user_state:{app}:{user}`` -
+  hashes of app and user state.
+- ``{prefix}:sessions:{app}:{user}`` and ``{prefix}:users:{app}`` - sets
+  indexing session ids and users for ``list_sessions``.
+- ``{prefix}:dirty`` - set of sessions changed since the last snapshot
+  (see ``session_snapshots``).
+
+Session creation and event appends are Lua scripts, so the stale-session
+check, the event write and the state deltas of all three scopes are applied
+atomically in one round trip. All keys of a session must live on one Redis
+instance; Redis Cluster is not supported.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict, List, Optional
+
+import redis.asyncio as redis
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions import _session_util
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+from redis.exceptions import ResponseError
+
+logger = logging.getLogger(__name__)
+
+# KEYS: meta, state, app_state, user_state, sessions index, users index
+# ARGV: user_id, session_id, session state pairs, app state pairs, user state pairs
+_CREATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return redis.error_reply('EXISTS')
+end
+local t = redis.call('TIME')
+local now = string.format('%.6f', tonumber(t[1]) + tonumber(t[2]) / 1000000)
+redis.call('HSET', KEYS[1], 'create_time', now, 'update_time', now)
+for i, target in ipairs({KEYS[2], KEYS[3], KEYS[4]}) do
+  local pairs_ = cjson.decode(ARGV[i + 2])
+  for _, pair in ipairs(pairs_) do
+    redis.call('HSET', target, pair[1], pair[2])
+  end
+end
+redis.call('SADD', KEYS[5], ARGV[2])
+redis.call('SADD', KEYS[6], ARGV[1])
+return now
+"""
+
+# KEYS: meta, state, app_state, user_state, events, dirty
+# ARGV: expected update_time, event JSON, max events, session state pairs,
+#       app state pairs, user state pairs, dirty member
+_APPEND_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'update_time')
+if not current then
+  return redis.error_reply('NOSESSION')
+end
+if tonumber(current) > tonumber(ARGV[1]) then
+  return redis.error_reply('STALE ' .. current)
+end
+local t = redis.call('TIME')
+local now = string.format('%.6f', tonumber(t[1]) + tonumber(t[2]) / 1000000)
+if tonumber(now) <= tonumber(current) then
+  now = string.format('%.6f', tonumber(current) + 0.000001)
+end
+for i, target in ipairs({KEYS[2], KEYS[3], KEYS[4]}) do
+  local pairs_ = cjson.decode(ARGV[i + 3])
+  for _, pair in ipairs(pairs_) do
+    redis.call('HSET', target, pair[1], pair[2])
+  end
+end
+redis.call('RPUSH', KEYS[5], ARGV[2])
+local max_events = tonumber(ARGV[3])
+if max_events > 0 then
+  redis.call('LTRIM', KEYS[5], -max_events, -1)
+end
+redis.call('HSET', KEYS[1], 'update_time', now)
+redis.call('SADD', KEYS[6], ARGV[7])
+return now
+"""
+
+
+def _pairs(state: Dict[str, Any]) -> str:
+    # Values are encoded here, so the scripts store them byte for byte.
+    return json.dumps([[key, json.dumps(value)] for key, value in state.items()])
+
+
+def _decode_state(raw: Dict[str, str]) -> Dict[str, Any]:
+    return {key: json.loads(value) for key, value in raw.items()}
+
+
+def _merge_state(
+    app_state: Dict[str, Any], user_state: Dict[str, Any], session_state: Dict[str, Any]
+) -> Dict[str, Any]:
+    merged = dict(session_state)
+    for key, value in app_state.items():
+        merged[State.APP_PREFIX + key] = value
+    for key, value in user_state.items():
+        merged[State.USER_PREFIX + key] = value
+    return merged
+
+
+class RedisSessionService(BaseSessionService):
+    """Session service backed by Redis.
+
+    Args:
+        url (str): Redis URL, e.g. ``redis://redis:6379/0``.
+        max_events (int): Events kept per session, oldest trimmed first;
+            0 keeps all.
+        prefix (str): Prefix of every key.
+        snapshots (Optional[SessionSnapshotter]): Where sessions missing in
+            Redis are restored from.
+        client (Optional[redis.Redis]): Client to use instead of one made
+            from ``url``; it must decode responses.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_events: int = 500,
+        prefix: str = "adk",
+        snapshots=None,
+        client: Optional[redis.Redis] = None,
+    ):
+        self.url = url
+        self.client = client or redis.Redis.from_url(url, decode_responses=True)
+        self.max_events = max_events
+        self.prefix = prefix
+        self.snapshots = snapshots
+        self._create = self.client.register_script(_CREATE_SCRIPT)
+        self._append = self.client.register_script(_APPEND_SCRIPT)
+
+    def key(self, kind: str, app_name: str, user_id: str, session_id: str) -> str:
+        """Return the key of one of a session's structures."""
+        return f"{self.prefix}:{kind}:{app_name}:{user_id}:{session_id}"
+
+    def _app_state_key(self, app_name: str) -> str:
+        return f"{self.prefix}:app_state:{app_name}"
+
+    def _user_state_key(self, app_name: str, user_id: str) -> str:
+        return f"{self.prefix}:user_state:{app_name}:{user_id}"
+
+    def _sessions_key(self, app_name: str, user_id: str) -> str:
+        return f"{self.prefix}:sessions:{app_name}:{user_id}"
+
+    def _users_key(self, app_name: str) -> str:
+        return f"{self.prefix}:users:{app_name}"
+
+    @property
+    def dirty_key(self) -> str:
+        """Key of the set of sessions changed since the last snapshot."""
+        return f"{self.prefix}:dirty"
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        deltas = _session_util.extract_state_delta(state)
+        try:
+            now = await self._create(
+                keys=[
+                    self.key("session", app_name, user_id, session_id),
+                    self.key("state", app_name, user_id, session_id),
+                    self._app_state_key(app_name),
+                    self._user_state_key(app_name, user_id),
+                    self._sessions_key(app_name, user_id),
+                    self._users_key(app_name),
+                ],
+                args=[
+                    user_id,
+                    session_id,
+                    _pairs(deltas["session"]),
+                    _pairs(deltas["app"]),
+                    _pairs(deltas["user"]),
+                ],
+            )
+        except ResponseError as e:
+            if str(e) == "EXISTS":
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.") from e
+            raise
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._app_state_key(app_name))
+            pipe.hgetall(self._user_state_key(app_name, user_id))
+            app_state, user_state = await pipe.execute()
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=_merge_state(
+                _decode_state(app_state), _decode_state(user_state), deltas["session"]
+            ),
+            last_update_time=float(now),
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        start = 0
+        if config and config.num_recent_events:
+            start = -config.num_recent_events
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self.key("session", app_name, user_id, session_id))
+            pipe.hgetall(self.key("state", app_name, user_id, session_id))
+            pipe.lrange(self.key("events", app_name, user_id, session_id), start, -1)
+            pipe.hgetall(self._app_state_key(app_name))
+            pipe.hgetall(self._user_state_key(app_name, user_id))
+            meta, state, events, app_state, user_state = await pipe.execute()
+
+        if not meta:
+            if self.snapshots is None or not await self._restore(app_name, user_id, session_id):
+                return None
+            return await self.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=config
+            )
+
+        events = [Event.model_validate_json(event) for event in events]
+        if config and config.after_timestamp:
+            events = [event for event in events if event.timestamp >= config.after_timestamp]
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=_merge_state(
+                _decode_state(app_state), _decode_state(user_state), _decode_state(state)
+            ),
+            events=events,
+            last_update_time=float(meta["update_time"]),
+        )
+
+    async def _restore(self, app_name: str, user_id: str, session_id: str) -> bool:
+        # The snapshot store is PostgreSQL; keep its round trip off the loop.
+        snapshot = await asyncio.to_thread(self.snapshots.load, app_name, user_id, session_id)
+        if snapshot is None:
+            return False
+        state, events, update_time = snapshot
+        logger.info("Restoring session %s from its snapshot", session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            meta_key = self.key("session", app_name, user_id, session_id)
+            pipe.hset(meta_key, mapping={"create_time": update_time, "update_time": update_time})
+            if state:
+                pipe.hset(
+                    self.key("state", app_name, user_id, session_id),
+                    mapping={key: json.dumps(value) for key, value in state.items()},
+                )
+            events_key = self.key("events", app_name, user_id, session_id)
+            pipe.delete(events_key)
+            if events:
+                pipe.rpush(events_key, *events)
+            pipe.sadd(self._sessions_key(app_name, user_id), session_id)
+            pipe.sadd(self._users_key(app_name), user_id)
+            await pipe.execute()
+        return True
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        if user_id is None:
+            user_ids = sorted(await self.client.smembers(self._users_key(app_name)))
+        else:
+            user_ids = [user_id]
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._app_state_key(app_name))
+            for user in user_ids:
+                pipe.hgetall(self._user_state_key(app_name, user))
+                pipe.smembers(self._sessions_key(app_name, user))
+            results = await pipe.execute()
+        app_state = _decode_state(results[0])
+        owners: List[tuple] = []
+        for position, user in enumerate(user_ids):
+            user_state = _decode_state(results[1 + 2 * position])
+            for session_id in sorted(results[2 + 2 * position]):
+                owners.append((user, session_id, user_state))
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for user, session_id, _ in owners:
+                pipe.hget(self.key("session", app_name, user, session_id), "update_time")
+                pipe.hgetall(self.key("state", app_name, user, session_id))
+            results = await pipe.execute()
+        sessions = []
+        for position, (user, session_id, user_state) in enumerate(owners):
+            update_time = results[2 * position]
+            if update_time is None:
+                continue
+            sessions.append(
+                Session(
+                    app_name=app_name,
+                    user_id=user,
+                    id=session_id,
+                    state=_merge_state(
+                        app_state, user_state, _decode_state(results[2 * position + 1])
+                    ),
+                    last_update_time=float(update_time),
+                )
+            )
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(
+                self.key("session", app_name, user_id, session_id),
+                self.key("state", app_name, user_id, session_id),
+                self.key("events", app_name, user_id, session_id),
+            )
+            pipe.srem(self._sessions_key(app_name, user_id), session_id)
+            await pipe.execute()
+        if self.snapshots is not None:
+            await asyncio.to_thread(self.snapshots.delete, app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = self._trim_temp_delta_state(event)
+        deltas = _session_util.extract_state_delta(
+            event.actions.state_delta if event.actions else None
+        )
+        try:
+            now = await self._append(
+                keys=[
+                    self.key("session", session.app_name, session.user_id, session.id),
+                    self.key("state", session.app_name, session.user_id, session.id),
+                    self._app_state_key(session.app_name),
+                    self._user_state_key(session.app_name, session.user_id),
+                    self.key("events", session.app_name, session.user_id, session.id),
+                    self.dirty_key,
+                ],
+                args=[
+                    f"{session.last_update_time:.6f}",
+                    event.model_dump_json(exclude_none=True),
+                    self.max_events,
+                    _pairs(deltas["session"]),
+                    _pairs(deltas["app"]),
+                    _pairs(deltas["user"]),
+                    json.dumps([session.app_name, session.user_id, session.id]),
+                ],
+            )
+        except ResponseError as e:
+            if str(e).startswith("STALE"):
+                raise ValueError(
+                    f"The last_update_time {session.last_update_time} of session {session.id}"
+                    f" is earlier than its stored update_time {str(e).split()[1]}."
+                    " Please check if it is a stale session."
+                ) from e
+            if str(e) == "NOSESSION":
+                raise ValueError(f"Session {session.id} does not exist.") from e
+            raise
+        session.last_update_time = float(now)
+        await super().append_event(session=session, event=event)
+        return event
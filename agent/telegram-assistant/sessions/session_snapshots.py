@@ -0,0 +1,199 @@
+"""Asynchronous snapshots of Redis sessions to the session database.
+
+Every event append marks its session dirty in Redis. A background thread
+takes dirty sessions in batches every few seconds and upserts their state
+and events into the ``session_snapshots`` table, so the request path never
+waits for PostgreSQL. When a session is missing from Redis (a flushed or
+replaced instance), ``RedisSessionService`` restores it from its snapshot.
+App and user state are not snapshotted.
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, delete, select
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+session_snapshots_table = Table(
+    "session_snapshots",
+    metadata,
+    Column("app_name", String(128), primary_key=True),
+    Column("user_id", String(128), primary_key=True),
+    Column("session_id", String(128), primary_key=True),
+    # JSON object of the session state and JSON array of its events
+    Column("state", Text, nullable=False),
+    Column("events", Text, nullable=False),
+    # Redis update_time of the session when it was snapshotted
+    Column("update_time", String(32), nullable=False),
+    Column("snapshot_at", DateTime(timezone=True), nullable=False),
+)
+
+# Session state, event JSON documents and update_time of a snapshot.
+Snapshot = Tuple[Dict[str, Any], List[str], str]
+
+
+def _upsert(engine: Engine):
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Session snapshots do not support {engine.dialect.name}")
+    statement = insert(session_snapshots_table)
+    return statement.on_conflict_do_update(
+        index_elements=["app_name", "user_id", "session_id"],
+        set_={
+            name: statement.excluded[name]
+            for name in ("state", "events", "update_time", "snapshot_at")
+        },
+    )
+
+
+class SessionSnapshotter:
+    """Copies dirty Redis sessions to the database in the background.
+
+    Args:
+        service (RedisSessionService): The service whose sessions are copied.
+        engine (Engine): Engine of the session database.
+        interval_secs (float): Seconds between snapshot rounds.
+        batch_size (int): Dirty sessions taken from Redis per statement.
+        client (Optional[redis.Redis]): Synchronous client to use instead of
+            one made from the service's URL; it must decode responses.
+    """
+
+    def __init__(
+        self,
+        service,
+        engine: Engine,
+        interval_secs: float = 30.0,
+        batch_size: int = 200,
+        client: Optional[redis.Redis] = None,
+    ):
+        self._service = service
+        self._engine = engine
+        self._interval_secs = interval_secs
+        self._batch_size = batch_size
+        # The snapshot thread has its own synchronous client.
+        self._client = client or redis.Redis.from_url(service.url, decode_responses=True)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._table_ready = False
+
+    def _ensure_table(self) -> None:
+        if not self._table_ready:
+            metadata.create_all(self._engine, tables=[session_snapshots_table])
+            self._table_ready = True
+
+    def start(self) -> None:
+        """Start the snapshot thread; later calls do nothing."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="session-snapshots", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.snapshot_dirty)
+
+    def _run(self) -> None:
+        stop = threading.Event()
+        while not stop.wait(self._interval_secs):
+            try:
+                self.snapshot_dirty()
+            except Exception as e:
+                logger.error("Session snapshot round failed: %s", e)
+
+    def snapshot_dirty(self) -> int:
+        """
+        Snapshot the sessions marked dirty since the last round.
+
+        Returns:
+            int: The number of sessions written. Sessions of a failed batch
+            are marked dirty again and retried in the next round.
+        """
+        written = 0
+        while True:
+            members = self._client.spop(self._service.dirty_key, self._batch_size)
+            if not members:
+                return written
+            try:
+                written += self._write(members)
+            except Exception:
+                self._client.sadd(self._service.dirty_key, *members)
+                raise
+
+    def _write(self, members: List[str]) -> int:
+        sessions = [json.loads(member) for member in members]
+        with self._client.pipeline(transaction=False) as pipe:
+            for app_name, user_id, session_id in sessions:
+                pipe.hget(self._service.key("session", app_name, user_id, session_id), "update_time")
+                pipe.hgetall(self._service.key("state", app_name, user_id, session_id))
+                pipe.lrange(self._service.key("events", app_name, user_id, session_id), 0, -1)
+            results = pipe.execute()
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        rows = []
+        for position, (app_name, user_id, session_id) in enumerate(sessions):
+            update_time, state, events = results[3 * position : 3 * position + 3]
+            if update_time is None:
+                # Deleted since it was marked dirty.
+                continue
+            rows.append(
+                {
+                    "app_name": app_name,
+                    "user_id": user_id,
+                    "session_id": session_id,
+                    # Hash values already are JSON; join them without decoding.
+                    "state": "{"
+                    + ",".join(f"{json.dumps(key)}:{value}" for key, value in state.items())
+                    + "}",
+                    "events": "[" + ",".join(events) + "]",
+                    "update_time": update_time,
+                    "snapshot_at": now,
+                }
+            )
+        if rows:
+            self._ensure_table()
+            with self._engine.begin() as connection:
+                connection.execute(_upsert(self._engine), rows)
+            logger.debug("Snapshotted %i sessions", len(rows))
+        return len(rows)
+
+    def load(self, app_name: str, user_id: str, session_id: str) -> Optional[Snapshot]:
+        """Return the snapshot of a session, or None if it has none."""
+        self._ensure_table()
+        table = session_snapshots_table
+        with self._engine.connect() as connection:
+            row = connection.execute(
+                select(table.c.state, table.c.events, table.c.update_time).where(
+                    table.c.app_name == app_name,
+                    table.c.user_id == user_id,
+                    table.c.session_id == session_id,
+                )
+            ).first()
+        if row is None:
+            return None
+        events = [json.dumps(event) for event in json.loads(row.events)]
+        return json.loads(row.state), events, row.update_time
+
+    def delete(self, app_name: str, user_id: str, session_id: str) -> None:
+        """Remove the snapshot of a deleted session."""
+        self._ensure_table()
+        table = session_snapshots_table
+        with self._engine.begin() as connection:
+            connection.execute(
+                delete(table).where(
+                    table.c.app_name == app_name,
+                    table.c.user_id == user_id,
+                    table.c.session_id == session_id,
+                )
+            )
@@ -0,0 +1,85 @@
+"""Session service wrapper that times session loads and event writes."""
+
+import time
+from typing import Any, Dict, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+from ..shared_libraries.turn_timings import TIMINGS_METADATA_KEY, phase_duration, turn_timings
+from .group_commit import flush_session
+
+
+class TimedSessionService(BaseSessionService):
+    """Delegates to another session service and records per-turn timings.
+
+    Session loads are recorded per session and claimed by the next
+    invocation; event writes are recorded per invocation. The final response
+    event of a turn carries the turn's breakdown in ``custom_metadata``.
+    """
+
+    def __init__(self, inner: BaseSessionService):
+        self.inner = inner
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        return await self.inner.create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        started = time.perf_counter()
+        session = await self.inner.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        turn_timings.session_loaded(session_id, time.perf_counter() - started)
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        return await self.inner.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self.inner.delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return await self.inner.append_event(session, event)
+
+        invocation_id = event.invocation_id
+        timings = turn_timings.claim_session_loads(invocation_id, session.id)
+        final = event.author != "user" and event.is_final_response()
+        if final:
+            timings = turn_timings.finish(invocation_id) or timings
+            event.custom_metadata = {
+                **(event.custom_metadata or {}),
+                TIMINGS_METADATA_KEY: timings.to_metadata(),
+            }
+
+        started = time.perf_counter()
+        event = await self.inner.append_event(session, event)
+        turn_timings.event_persisted(invocation_id, time.perf_counter() - started)
+        return event
+
+    async def flush(self, session: Session) -> None:
+        started = time.perf_counter()
+        await flush_session(self.inner, session)
+        # After the final event, so outside the turn's breakdown.
+        phase_duration.observe(time.perf_counter() - started, phase="session_flush")
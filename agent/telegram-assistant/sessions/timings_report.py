@@ -0,0 +1,81 @@
+"""Print p50/p95/p99 per turn phase from the timings stored on recent events.
+
+Usage:
+    python -m telegram-assistant.sessions.timings_report [--limit 1000] [--db-url URL]
+"""
+
+import argparse
+import json
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+from ..config import Config
+from ..shared_libraries.turn_timings import TIMINGS_METADATA_KEY
+
+_RECENT_TIMINGS = text(
+    "SELECT custom_metadata FROM events"
+    " WHERE custom_metadata IS NOT NULL"
+    " ORDER BY timestamp DESC LIMIT :limit"
+)
+
+
+def load_timings(db_url: str, limit: int) -> List[Dict[str, Any]]:
+    """Return the timing breakdowns of the most recent turns."""
+    engine = create_engine(db_url)
+    try:
+        with engine.connect() as connection:
+            rows = connection.execute(_RECENT_TIMINGS, {"limit": limit}).scalars().all()
+    finally:
+        engine.dispose()
+    timings = []
+    for metadata in rows:
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        if metadata and TIMINGS_METADATA_KEY in metadata:
+            timings.append(metadata[TIMINGS_METADATA_KEY])
+    return timings
+
+
+def phase_samples(timings: Iterable[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """Collect millisecond samples per phase; model and tool samples are per call."""
+    samples: Dict[str, List[float]] = {
+        "session_load": [],
+        "model_ttft": [],
+        "model": [],
+        "tool": [],
+        "session_persist": [],
+    }
+    for turn in timings:
+        samples["session_load"].append(turn["session_load_ms"])
+        samples["session_persist"].append(turn["session_persist_ms"])
+        for call in turn["model_calls"]:
+            if call["ttft_ms"] is not None:
+                samples["model_ttft"].append(call["ttft_ms"])
+            if call["total_ms"] is not None:
+                samples["model"].append(call["total_ms"])
+        for call in turn["tool_calls"]:
+            samples["tool"].append(call["total_ms"])
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=1000, help="number of recent turns")
+    parser.add_argument("--db-url", default=None, help="defaults to the configured session database")
+    args = parser.parse_args()
+
+    timings = load_timings(args.db_url or Config().session_db_url, args.limit)
+    print(f"{len(timings)} turns")
+    print(f"{'phase':<16} {'samples':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for phase, values in phase_samples(timings).items():
+        if not values:
+            print(f"{phase:<16} {0:>8}")
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(f"{phase:<16} {len(values):>8} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
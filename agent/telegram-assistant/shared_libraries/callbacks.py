@@ -15,22 +15,116 @@
 """Callback functions for Telegram Assistant Agent."""
 
 import logging
+import threading
 import time
-import json
 
 from google.adk.agents.callback_context import CallbackContext
-from google.adk.models import LlmRequest
-from typing import Any, Dict, Optional, Tuple
+from google.adk.models import LlmRequest, LlmResponse
+from typing import Any, Dict, List, Optional
 from google.adk.tools import BaseTool
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.sessions.state import State
 from google.adk.tools.tool_context import ToolContext
+from ..config import Config
+from ..services.token_usage import get_token_usage
+from .guards import InvocationGuard
+from .history_summary import HISTORY_SUMMARY_KEY, format_history_summary
+from .hooks import ALL_TOOLS, tool_hooks
+from .lead_sync import after_lead_write, before_lead_write
+from .metrics import Stopwatch, counter, gauge, histogram
+from .normalization import Normalizer, compile_tool_normalizers
+from .tracing import get_tracer
+from .turn_timings import turn_timings
+from .validators import ToolValidator, compile_tool_validators
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+_configs = Config()
+_invocation_guard = InvocationGuard(
+    max_model_calls=_configs.MAX_MODEL_CALLS_PER_INVOCATION,
+    max_tool_calls=_configs.MAX_TOOL_CALLS_PER_INVOCATION,
+)
+# None when tracing is disabled; the tracing callbacks are then not registered.
+_tracer = get_tracer()
 
 RATE_LIMIT_SECS = 60
 RPM_QUOTA = 10
+# A session counts as active if it had a turn within this window.
+ACTIVE_SESSION_WINDOW_SECS = 300
+
+_turn_timer = Stopwatch()
+_model_timer = Stopwatch()
+_tool_timer = Stopwatch()
+# Kept in last-seen order: a session is moved to the end on every turn.
+# Turns update it on the event loop, metric collection reads it from any
+# thread, so both go through _session_lock.
+_session_last_seen: Dict[str, float] = {}
+_session_lock = threading.Lock()
+
+
+def _prune_sessions(now: float) -> None:
+    # Called with _session_lock held. Expired sessions are at the front;
+    # stop at the first one still active.
+    cutoff = now - ACTIVE_SESSION_WINDOW_SECS
+    seen = _session_last_seen
+    while seen:
+        session_id = next(iter(seen))
+        if seen[session_id] >= cutoff:
+            break
+        del seen[session_id]
+
+
+def _touch_session(session_id: str) -> None:
+    now = time.time()
+    with _session_lock:
+        _session_last_seen.pop(session_id, None)
+        _session_last_seen[session_id] = now
+        _prune_sessions(now)
+
+
+def _active_sessions() -> int:
+    with _session_lock:
+        _prune_sessions(time.time())
+        return len(_session_last_seen)
+
+
+turn_duration = histogram(
+    "agent_turn_duration_seconds", "Duration of an agent turn (invocation)"
+)
+model_duration = histogram(
+    "agent_model_call_duration_seconds", "Duration of a model call", ("status",)
+)
+model_tokens = counter(
+    "agent_model_tokens_total", "Model tokens by kind (prompt, cached, output)", ("kind",)
+)
+tool_duration = histogram(
+    "agent_tool_call_duration_seconds", "Duration of a tool call", ("tool", "status")
+)
+rate_limit_wait = histogram(
+    "agent_rate_limit_wait_seconds", "Time a model call waited for the rate limiter"
+)
+gauge("agent_turns_in_flight", "Agent turns currently running", lambda: len(_turn_timer))
+gauge(
+    "agent_active_sessions",
+    f"Sessions with a turn in the last {ACTIVE_SESSION_WINDOW_SECS} seconds",
+    _active_sessions,
+)
+
+
+def model_budget_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """Callback function that caps the number of model calls per invocation.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+      llm_request: A LlmRequest obj representing the active LLM request.
+
+    Returns:
+      A canned LlmResponse that ends the turn once the budget is exhausted,
+      otherwise None.
+    """
+    return _invocation_guard.check_model_call(callback_context.invocation_id)
 
 
 def rate_limit_callback(
@@ -73,6 +167,7 @@ def rate_limit_callback(
         delay = RATE_LIMIT_SECS - elapsed_secs + 1
         if delay > 0:
             logger.debug("Sleeping for %i seconds", delay)
+            rate_limit_wait.observe(delay)
             time.sleep(delay)
         callback_context.state["timer_start"] = now
         callback_context.state["request_count"] = 1
@@ -81,121 +176,353 @@ def rate_limit_callback(
 
     return
 
-def validate_customer_id(customer_id: str, session_state: State) -> Tuple[bool, str]:
+
+def inject_faq_context(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> None:
+    """Callback function that adds relevant FAQ snippets to the instruction.
+
+    Product knowledge lives in the FAQ index instead of INSTRUCTION, so only
+    the few entries matching the current user message are sent to the model.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+      llm_request: A LlmRequest obj representing the active LLM request.
+    """
+    user_content = callback_context.user_content
+    if not user_content or not user_content.parts:
+        return
+    question = " ".join(part.text for part in user_content.parts if part.text)
+    if not question.strip():
+        return
+
+    # Imported here: the FAQ index pulls in numpy, which the agent import
+    # should not pay for. The server loads the index during warm-up.
+    from ..services.faq_index import get_faq_index
+
+    faq_index = get_faq_index()
+    if faq_index is None:
+        return
+
+    hits = faq_index.search(
+        question, top_k=_configs.FAQ_TOP_K, min_score=_configs.FAQ_MIN_SCORE
+    )
+    logger.debug("inject_faq_context [hits: %i]", len(hits))
+    if hits:
+        snippets = "\n\n".join(snippet for _, snippet in hits)
+        llm_request.append_instructions([f"**СПРАВКА ИЗ FAQ:**\n{snippets}"])
+    return
+
+
+def inject_history_summary(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> None:
+    """Callback function that adds the summary of compacted history to the instruction.
+
+    Compaction removes the old events of long sessions; without their summary
+    the model would not know what was discussed before the kept events.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+      llm_request: A LlmRequest obj representing the active LLM request.
     """
-        Validates the customer ID against the customer profile in the session state.
-        
-        Args:
-            customer_id (str): The ID of the customer to validate.
-            session_state (State): The session state containing the customer profile.
-        
-        Returns:
-            A tuple containing an bool (True/False) and a String. 
-            When False, a string with the error message to pass to the model for deciding
-            what actions to take to remediate.
+    summary = format_history_summary(callback_context.state.get(HISTORY_SUMMARY_KEY))
+    if summary:
+        llm_request.append_instructions([summary])
+
+
+def _guard_tool_call(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext):
+    # Stop runaway turns: repeated identical calls are answered from the
+    # first result and calls over the per-invocation budget are refused.
+    return _invocation_guard.check_tool_call(tool_context.invocation_id, tool.name, args)
+
+
+def _record_tool_result(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any
+):
+    _invocation_guard.record_tool_result(
+        tool_context.invocation_id, tool.name, args, tool_response
+    )
+
+
+def _lead_diff(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext):
+    # Lead writes are diffed against the last snapshot sent to the backend:
+    # unchanged payloads are skipped, changed ones are PATCHed field by field.
+    return before_lead_write(args, tool_context.state)
+
+
+def _lead_snapshot(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any
+):
+    after_lead_write(args, tool_context.state, tool_response)
+
+
+def _normalize_hook(normalizer: Normalizer):
+    def normalize_args(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext):
+        normalizer(args)
+
+    return normalize_args
+
+
+def _validate_hook(validator: ToolValidator):
+    def validate_args(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext):
+        return validator(args, tool_context)
+
+    return validate_args
+
+
+def configure_tools(tools: List[Any]) -> None:
+    """Register the before_tool/after_tool hooks for the agent's tools.
+
+    Argument normalizers and validators are compiled per tool here, once.
+    Normalization runs first so the call guard and the post hooks see the
+    same arguments the tool does.
+
+    Args:
+      tools: The tools the agent is built with.
     """
-    if 'customer_profile' not in session_state:
-        return False, "No customer profile selected. Please select a profile."
-
-    try:
-        # Parse the customer profile from JSON stored in state
-        customer_data = json.loads(session_state['customer_profile'])
-        stored_customer_id = customer_data.get('customer_id')
-        
-        if customer_id == stored_customer_id:
-            return True, ""
-        else:
-            return False, f"You cannot use the tool with customer_id {customer_id}, only for {stored_customer_id}."
-    except (json.JSONDecodeError, KeyError) as e:
-        return False, "Customer profile couldn't be parsed. Please reload the customer data."
-
-def lowercase_value(value):
-    """Make dictionary lowercase"""
-    if isinstance(value, dict):
-        return dict((k, lowercase_value(v)) for k, v in value.items())
-    elif isinstance(value, str):
-        return value.lower()
-    elif isinstance(value, (list, set, tuple)):
-        tp = type(value)
-        return tp(lowercase_value(i) for i in value)
-    else:
-        return value
+    tool_hooks.clear()
+    if _tracer is not None:
+        # Outermost hooks, so the tool span covers the whole dispatch.
+        tool_hooks.register_pre(ALL_TOOLS, _trace_tool_start, name="trace", priority=-100)
+        tool_hooks.register_post(ALL_TOOLS, _trace_tool_end, name="trace", priority=1000)
+    tool_hooks.register_pre(ALL_TOOLS, _start_tool_timer, name="metrics", priority=-90)
+    tool_hooks.register_post(ALL_TOOLS, _record_tool_metrics, name="metrics", priority=990)
+    for name, normalizer in compile_tool_normalizers(tools).items():
+        tool_hooks.register_pre(name, _normalize_hook(normalizer), priority=0)
+    tool_hooks.register_pre(ALL_TOOLS, _guard_tool_call, name="call_guard", priority=10)
+    for name, validator in compile_tool_validators(tools).items():
+        tool_hooks.register_pre(name, _validate_hook(validator), priority=20)
+    tool_hooks.register_pre("send_lead_to_backend", _lead_diff, name="lead_diff", priority=30)
+
+    tool_hooks.register_post("send_lead_to_backend", _lead_snapshot, name="lead_snapshot")
+    tool_hooks.register_post(ALL_TOOLS, _record_tool_result, name="call_guard", priority=100)
 
 
 # Callback Methods
 def before_tool(
     tool: BaseTool, args: Dict[str, Any], tool_context: CallbackContext
 ):
-    # Make sure all values that the agent is sending to tools are lowercase
-    lowercase_value(args)
-
-    # Several tools require customer_id as input. We don't want to rely
-    # solely on the model picking the right customer id. We validate it.
-    # Alternative: tools can fetch the customer_id from the state directly.
-    if 'customer_id' in args:
-        valid, err = validate_customer_id(args['customer_id'], tool_context.state)
-        if not valid:
-            return err
-
-    # Check for the next tool call and then act accordingly.
-    # Example logic based on the tool being called.
-    if tool.name == "sync_ask_for_approval":
-        amount = args.get("value", None)
-        if amount and amount <= 10:  # Example business rule
-            return {
-                "status": "approved",
-                "message": "You can approve this discount; no manager needed."
-            }
-        # Add more logic checks here as needed for your tools.
-
-    if tool.name == "modify_cart":
-        if (
-            args.get("items_added") is True
-            and args.get("items_removed") is True
-        ):
-            return {"result": "I have added and removed the requested items."}
-    return None
+    return tool_hooks.run_pre(tool, args, tool_context)
 
 def after_tool(
     tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Dict
 ) -> Optional[Dict]:
-    # After approvals, we perform operations deterministically in the callback
-    # to apply the discount in the cart.
-    if tool.name == "sync_ask_for_approval":
-        if tool_response and tool_response.get('status') == "approved":
-            logger.debug("Applying discount to the cart")
-            # Actually make changes to the cart
-
-    if tool.name == "approve_discount":
-        if tool_response and tool_response.get('status') == "ok":
-            logger.debug("Applying discount to the cart")
-            # Actually make changes to the cart
-
-    return None
-
-def before_agent(callback_context):
-    print(">>> DEBUG: Inspecting _invocation_context")
-
-    inv = getattr(callback_context, "_invocation_context", None)
-    if not inv:
-        print("No _invocation_context found")
+    return tool_hooks.run_post(tool, args, tool_context, tool_response)
+
+def start_turn_timer(callback_context: CallbackContext) -> None:
+    """Callback function that starts timing a turn and marks the session active.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+    """
+    _turn_timer.start(callback_context.invocation_id)
+    _touch_session(callback_context.session.id)
+
+
+def record_turn_metrics(callback_context: CallbackContext) -> None:
+    """Callback function that records the duration of a turn.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+    """
+    elapsed = _turn_timer.stop(callback_context.invocation_id)
+    if elapsed is not None:
+        turn_duration.observe(elapsed)
+
+
+def start_model_timer(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> None:
+    """Callback function that starts timing a model call.
+
+    Registered after the other before_model callbacks, so rate limiter waits
+    and calls answered by the budget guard are not counted as model time.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+      llm_request: A LlmRequest obj representing the active LLM request.
+    """
+    _model_timer.start(callback_context.invocation_id)
+    turn_timings.get(callback_context.invocation_id).model_started()
+
+
+def record_model_metrics(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> None:
+    """Callback function that records model latency and token usage.
+
+    The first response (a partial chunk when streaming) also records the
+    time to first token in the turn's timing breakdown.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+      llm_response: A LlmResponse obj representing the model response.
+    """
+    turn_timings.get(callback_context.invocation_id).model_responded(
+        final=not llm_response.partial
+    )
+    if llm_response.partial:
+        return
+    elapsed = _model_timer.stop(callback_context.invocation_id)
+    if elapsed is not None:
+        model_duration.observe(elapsed, status="error" if llm_response.error_code else "ok")
+    usage = llm_response.usage_metadata
+    if usage is not None:
+        model_tokens.inc(usage.prompt_token_count or 0, kind="prompt")
+        model_tokens.inc(usage.cached_content_token_count or 0, kind="cached")
+        model_tokens.inc(usage.candidates_token_count or 0, kind="output")
+
+
+def record_token_usage(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> None:
+    """Callback function that adds the usage of a model call to the token accounting.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+      llm_response: A LlmResponse obj representing the model response.
+    """
+    usage = llm_response.usage_metadata
+    if usage is None or llm_response.partial:
         return
+    session = callback_context.session
+    get_token_usage().record(
+        session.app_name,
+        session.user_id,
+        session.id,
+        prompt_tokens=usage.prompt_token_count or 0,
+        cached_tokens=usage.cached_content_token_count or 0,
+        output_tokens=usage.candidates_token_count or 0,
+    )
+
+
+def _start_tool_timer(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext):
+    _tool_timer.start((tool_context.invocation_id, tool_context.function_call_id))
+
+
+def _record_tool_metrics(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any
+):
+    elapsed = _tool_timer.stop((tool_context.invocation_id, tool_context.function_call_id))
+    if elapsed is not None:
+        status = tool_response.get("status") if isinstance(tool_response, dict) else None
+        tool_duration.observe(elapsed, tool=tool.name, status=status or "ok")
+        turn_timings.get(tool_context.invocation_id).tool_finished(tool.name, elapsed)
+
+
+def before_agent(callback_context: CallbackContext) -> None:
+    """Callback function that opens the agent span of a traced invocation.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+    """
+    invocation_id = callback_context.invocation_id
+    span = _tracer.start_span(
+        ("agent", invocation_id),
+        invocation_id,
+        "agent.invocation",
+        {"agent": callback_context.agent_name, "session": callback_context.session.id},
+    )
+    if span is not None and _tracer.captures_payload(invocation_id):
+        user_content = callback_context.user_content
+        if user_content and user_content.parts:
+            text = " ".join(part.text for part in user_content.parts if part.text)
+            span.payload = {"user": _tracer.truncate(text)}
+
+
+def after_agent(callback_context: CallbackContext) -> None:
+    """Callback function that closes the agent span of a traced invocation.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+    """
+    _tracer.end_span(("agent", callback_context.invocation_id))
+
+
+def before_model_trace(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> None:
+    """Callback function that opens a model span.
 
-    try:
-        # Распечатываем атрибуты
-        print("Attributes of _invocation_context:", dir(inv))
+    Registered last among the before_model callbacks, so the span covers the
+    model call only and is not opened when an earlier callback answers instead.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+      llm_request: A LlmRequest obj representing the active LLM request.
+    """
+    _tracer.start_span(
+        ("model", callback_context.invocation_id),
+        callback_context.invocation_id,
+        "model.call",
+        {"model": llm_request.model, "contents": len(llm_request.contents)},
+    )
+
+
+def after_model_trace(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> None:
+    """Callback function that closes the model span with the response details.
+
+    Args:
+      callback_context: A CallbackContext obj representing the active callback
+        context.
+      llm_response: A LlmResponse obj representing the model response.
+    """
+    if llm_response.partial:
+        return
+    key = ("model", callback_context.invocation_id)
+    span = _tracer.get_span(key)
+    if span is None:
+        return
+    attrs: Dict[str, Any] = {}
+    usage = llm_response.usage_metadata
+    if usage is not None:
+        attrs["tokens_in"] = usage.prompt_token_count
+        attrs["tokens_out"] = usage.candidates_token_count
+    if llm_response.error_code:
+        attrs["error"] = llm_response.error_code
+    content = llm_response.content
+    if content and content.parts:
+        calls = [part.function_call.name for part in content.parts if part.function_call]
+        if calls:
+            attrs["function_calls"] = calls
+        if _tracer.captures_payload(callback_context.invocation_id):
+            text = "".join(part.text for part in content.parts if part.text)
+            if text:
+                span.payload = {"response": _tracer.truncate(text)}
+    _tracer.end_span(key, attrs)
 
-        # Пробуем распечатать __dict__, если есть
-        if hasattr(inv, "__dict__"):
-            print("\nDICT DUMP:")
-            print(json.dumps(inv.__dict__, indent=2, ensure_ascii=False, default=str))
 
-        # Иногда нужные данные лежат в inv.inputs
-        if hasattr(inv, "inputs"):
-            print("\nINPUTS:")
-            print(json.dumps(inv.inputs, indent=2, ensure_ascii=False, default=str))
+def _trace_tool_start(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext):
+    span = _tracer.start_span(
+        ("tool", tool_context.invocation_id, tool_context.function_call_id),
+        tool_context.invocation_id,
+        f"tool.{tool.name}",
+    )
+    if span is not None and _tracer.captures_payload(tool_context.invocation_id):
+        span.payload = {"args": _tracer.truncate(args)}
 
-    except Exception as e:
-        print(f"Error inspecting _invocation_context: {e}")
 
-    print(">>> END DEBUG _invocation_context")
\ No newline at end of file
+def _trace_tool_end(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any
+):
+    key = ("tool", tool_context.invocation_id, tool_context.function_call_id)
+    span = _tracer.get_span(key)
+    if span is None:
+        return
+    status = tool_response.get("status") if isinstance(tool_response, dict) else None
+    if _tracer.captures_payload(tool_context.invocation_id):
+        span.payload = dict(span.payload or {}, response=_tracer.truncate(tool_response))
+    _tracer.end_span(key, {"status": status or "ok"})
@@ -0,0 +1,63 @@
+"""Customer profile kept in session state.
+
+The profile under ``customer_profile`` is written by the client that starts
+the session, either as a dict or, in older clients, as a JSON string. JSON
+strings are parsed once per distinct string and memoized; callers get a
+read-only view of the memoized dict, so no copy is made per call. Callers
+that need to change the profile take a ``dict()`` of it.
+"""
+
+import json
+from collections import OrderedDict
+from threading import Lock
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+CUSTOMER_PROFILE_KEY = "customer_profile"
+
+_MAX_CACHED_PROFILES = 1024
+_parsed_profiles: "OrderedDict[str, Mapping[str, Any]]" = OrderedDict()
+_parsed_profiles_lock = Lock()
+
+
+def get_customer_profile(state: Any) -> Optional[Mapping[str, Any]]:
+    """
+    Return the customer profile from session state.
+
+    Args:
+        state (Any): The session state to read from.
+
+    Returns:
+        Optional[Mapping[str, Any]]: The profile, or None if none is
+        selected; a read-only view for JSON profiles.
+
+    Raises:
+        ValueError: If a JSON profile cannot be parsed.
+    """
+    profile = state.get(CUSTOMER_PROFILE_KEY)
+    if profile is None or isinstance(profile, dict):
+        return profile
+    if not isinstance(profile, str):
+        raise ValueError("Customer profile is not a JSON string")
+
+    # Keyed on the raw string: a rewritten profile is a different key, so a
+    # stale parse can never be returned.
+    with _parsed_profiles_lock:
+        cached = _parsed_profiles.get(profile)
+        if cached is not None:
+            _parsed_profiles.move_to_end(profile)
+            return cached
+
+    try:
+        parsed = json.loads(profile)
+    except json.JSONDecodeError as e:
+        raise ValueError("Customer profile is not valid JSON") from e
+    if not isinstance(parsed, dict):
+        raise ValueError("Customer profile is not a JSON object")
+
+    frozen = MappingProxyType(parsed)
+    with _parsed_profiles_lock:
+        _parsed_profiles[profile] = frozen
+        if len(_parsed_profiles) > _MAX_CACHED_PROFILES:
+            _parsed_profiles.popitem(last=False)
+    return frozen
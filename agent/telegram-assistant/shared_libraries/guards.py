@@ -0,0 +1,142 @@
+"""Per-invocation budgets and loop breaking for model and tool calls."""
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from google.adk.models import LlmResponse
+from google.genai import types
+
+from .metrics import counter
+
+logger = logging.getLogger(__name__)
+
+BUDGET_EXHAUSTED_REPLY = (
+    "Извините, не получилось обработать запрос. "
+    "Попробуйте, пожалуйста, написать еще раз."
+)
+
+guard_violations = counter(
+    "agent_guard_violations_total",
+    "Model and tool calls stopped by the per-invocation guard.",
+    ("kind", "tool"),
+)
+
+
+def _fingerprint(tool_name: str, args: Dict[str, Any]) -> str:
+    """Stable hash of a tool name and its arguments."""
+    payload = json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(f"{tool_name}:{payload}".encode("utf-8")).hexdigest()
+
+
+class InvocationBudget:
+    """Call counters and tool results collected during one invocation."""
+
+    __slots__ = ("model_calls", "tool_calls", "results")
+
+    def __init__(self):
+        self.model_calls = 0
+        self.tool_calls = 0
+        self.results: Dict[str, Any] = {}
+
+
+class InvocationGuard:
+    """
+    Enforces maximum model and tool calls per invocation.
+
+    Identical tool calls (same tool, same arguments) inside one invocation are
+    answered from the result of the first successful call instead of running
+    again, which breaks the most common loop: re-sending the same lead over
+    and over.
+    """
+
+    def __init__(self, max_model_calls: int, max_tool_calls: int, max_invocations: int = 1024):
+        self.max_model_calls = max_model_calls
+        self.max_tool_calls = max_tool_calls
+        self._max_invocations = max_invocations
+        self._budgets: "OrderedDict[str, InvocationBudget]" = OrderedDict()
+        self._lock = Lock()
+
+    def _budget(self, invocation_id: str) -> InvocationBudget:
+        with self._lock:
+            budget = self._budgets.get(invocation_id)
+            if budget is None:
+                budget = self._budgets[invocation_id] = InvocationBudget()
+                if len(self._budgets) > self._max_invocations:
+                    self._budgets.popitem(last=False)
+            return budget
+
+    def check_model_call(self, invocation_id: str) -> Optional[LlmResponse]:
+        """
+        Count a model call and stop it once the budget is exhausted.
+
+        Returns:
+            Optional[LlmResponse]: A canned reply ending the turn, or None to
+            let the call proceed.
+        """
+        budget = self._budget(invocation_id)
+        budget.model_calls += 1
+        if budget.model_calls <= self.max_model_calls:
+            return None
+
+        guard_violations.inc(kind="model_budget", tool="")
+        logger.warning(
+            "Model call budget exhausted [invocation: %s, calls: %i]",
+            invocation_id,
+            budget.model_calls,
+        )
+        return LlmResponse(
+            content=types.Content(
+                role="model", parts=[types.Part(text=BUDGET_EXHAUSTED_REPLY)]
+            )
+        )
+
+    def check_tool_call(
+        self, invocation_id: str, tool_name: str, args: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Count a tool call and short-circuit repeats and budget overruns.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached or error response to use
+            instead of running the tool, or None to let the call proceed.
+        """
+        budget = self._budget(invocation_id)
+        fingerprint = _fingerprint(tool_name, args)
+        if fingerprint in budget.results:
+            guard_violations.inc(kind="repeated_call", tool=tool_name)
+            logger.info("Repeated %s call answered from cache", tool_name)
+            return budget.results[fingerprint]
+
+        budget.tool_calls += 1
+        if budget.tool_calls <= self.max_tool_calls:
+            return None
+
+        guard_violations.inc(kind="tool_budget", tool=tool_name)
+        logger.warning(
+            "Tool call budget exhausted [invocation: %s, tool: %s, calls: %i]",
+            invocation_id,
+            tool_name,
+            budget.tool_calls,
+        )
+        return {
+            "status": "error",
+            "message": "Tool call limit for this turn reached. "
+                       "Answer the user without calling tools.",
+        }
+
+    def record_tool_result(
+        self, invocation_id: str, tool_name: str, args: Dict[str, Any], response: Any
+    ) -> None:
+        """
+        Remember a tool response so identical calls can reuse it.
+
+        Error responses are not remembered: a repeated call after a transient
+        backend failure should reach the backend again.
+        """
+        if isinstance(response, dict) and response.get("status") == "error":
+            return
+        self._budget(invocation_id).results[_fingerprint(tool_name, args)] = response
@@ -0,0 +1,103 @@
+"""Summary of the events compaction removed from a session.
+
+Compaction (see ``sessions.compaction``) moves the old events of long
+sessions out of the session tables and folds them into ``history_summary``
+in session state: counts, the time span, tool calls and the last few
+messages, shortened. ``format_history_summary`` renders it for the model,
+which otherwise would no longer see anything of the removed part of the
+conversation.
+"""
+
+import datetime
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from google.adk.events import Event
+
+HISTORY_SUMMARY_KEY = "history_summary"
+
+# Messages of the removed part kept in the summary, and their length.
+MAX_EXCERPTS = 10
+MAX_EXCERPT_CHARS = 200
+
+
+def _excerpt(event: Event) -> Optional[Dict[str, str]]:
+    """The text of a user or agent message, shortened; None for other events."""
+    if event.content is None or not event.content.parts:
+        return None
+    text = " ".join(
+        part.text.strip() for part in event.content.parts if part.text and not part.thought
+    )
+    text = " ".join(text.split())
+    if not text:
+        return None
+    if len(text) > MAX_EXCERPT_CHARS:
+        text = text[: MAX_EXCERPT_CHARS - 1].rstrip() + "…"
+    return {"author": "user" if event.author == "user" else "agent", "text": text}
+
+
+def fold_summary(summary: Optional[Dict[str, Any]], events: List[Event]) -> Dict[str, Any]:
+    """
+    Fold events into a history summary.
+
+    Args:
+        summary (Optional[Dict[str, Any]]): The summary of earlier compactions.
+        events (List[Event]): The events being removed, oldest first.
+
+    Returns:
+        Dict[str, Any]: The combined summary.
+    """
+    summary = dict(summary or {})
+    tool_calls = Counter(summary.get("tool_calls", {}))
+    for event in events:
+        for call in event.get_function_calls():
+            tool_calls[call.name] += 1
+    excerpts = list(summary.get("excerpts", []))
+    excerpts.extend(excerpt for excerpt in map(_excerpt, events) if excerpt is not None)
+    summary["events"] = summary.get("events", 0) + len(events)
+    summary["user_messages"] = summary.get("user_messages", 0) + sum(
+        1 for event in events if event.author == "user"
+    )
+    summary["tool_calls"] = dict(tool_calls)
+    summary["excerpts"] = excerpts[-MAX_EXCERPTS:]
+    summary.setdefault("first_timestamp", events[0].timestamp)
+    summary["last_timestamp"] = events[-1].timestamp
+    summary["compacted_at"] = time.time()
+    return summary
+
+
+def _date(timestamp: Optional[float]) -> str:
+    if timestamp is None:
+        return "?"
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime("%d.%m.%Y")
+
+
+def format_history_summary(summary: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Render a history summary as an instruction for the model.
+
+    Args:
+        summary (Optional[Dict[str, Any]]): The summary from session state.
+
+    Returns:
+        Optional[str]: The instruction text, or None if there is no summary.
+    """
+    if not summary or not summary.get("events"):
+        return None
+    lines = [
+        "**РАНЕЕ В ДИАЛОГЕ** (старая часть переписки сжата: "
+        f"{summary.get('user_messages', 0)} сообщений клиента, "
+        f"{_date(summary.get('first_timestamp'))}–{_date(summary.get('last_timestamp'))})"
+    ]
+    tool_calls = summary.get("tool_calls") or {}
+    if tool_calls:
+        calls = ", ".join(f"{name} ×{count}" for name, count in sorted(tool_calls.items()))
+        lines.append(f"Вызовы инструментов: {calls}")
+    excerpts = summary.get("excerpts") or []
+    if excerpts:
+        lines.append("Последние реплики перед сжатием:")
+        for excerpt in excerpts:
+            author = "Клиент" if excerpt.get("author") == "user" else "Ассистент"
+            lines.append(f"- {author}: {excerpt.get('text', '')}")
+    return "\n".join(lines)
@@ -0,0 +1,188 @@
+"""Registry of per-tool pre and post hooks behind before_tool/after_tool.
+
+Hooks are registered for a tool name (or ``ALL_TOOLS``) with a priority.
+The ordered chain for each tool is resolved once and cached, so dispatching
+a tool call is a single dict lookup no matter how many tools are registered.
+Every hook is timed and can be switched off at runtime by name.
+"""
+
+import logging
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ALL_TOOLS = "*"
+
+# (tool, args, tool_context) -> response that replaces the tool call, or None
+PreHook = Callable[[Any, Dict[str, Any], Any], Optional[Dict]]
+# (tool, args, tool_context, tool_response) -> replacement response, or None
+PostHook = Callable[[Any, Dict[str, Any], Any, Any], Optional[Dict]]
+
+
+class Hook:
+    """A registered hook together with its switch and timing counters."""
+
+    __slots__ = ("name", "tool_name", "func", "priority", "enabled", "calls", "total_secs")
+
+    def __init__(self, name: str, tool_name: str, func: Callable, priority: int):
+        self.name = name
+        self.tool_name = tool_name
+        self.func = func
+        self.priority = priority
+        self.enabled = True
+        self.calls = 0
+        self.total_secs = 0.0
+
+
+class ToolHookRegistry:
+    """Maps tool names to ordered pre and post hook chains."""
+
+    def __init__(self):
+        self._pre: List[Hook] = []
+        self._post: List[Hook] = []
+        self._pre_chains: Dict[str, Tuple[Hook, ...]] = {}
+        self._post_chains: Dict[str, Tuple[Hook, ...]] = {}
+        self._lock = Lock()
+
+    def register_pre(
+        self, tool_name: str, func: PreHook, name: Optional[str] = None, priority: int = 50
+    ) -> Hook:
+        """
+        Register a hook that runs before the tool.
+
+        Args:
+            tool_name (str): The tool the hook applies to, or ALL_TOOLS.
+            func (PreHook): Returns a response to skip the tool, or None.
+            name (Optional[str]): Name used to enable or disable the hook.
+            priority (int): Lower priorities run first.
+
+        Returns:
+            Hook: The registered hook.
+        """
+        return self._register(self._pre, tool_name, func, name, priority)
+
+    def register_post(
+        self, tool_name: str, func: PostHook, name: Optional[str] = None, priority: int = 50
+    ) -> Hook:
+        """
+        Register a hook that runs after the tool.
+
+        Args:
+            tool_name (str): The tool the hook applies to, or ALL_TOOLS.
+            func (PostHook): Returns a replacement response, or None.
+            name (Optional[str]): Name used to enable or disable the hook.
+            priority (int): Lower priorities run first.
+
+        Returns:
+            Hook: The registered hook.
+        """
+        return self._register(self._post, tool_name, func, name, priority)
+
+    def _register(
+        self, hooks: List[Hook], tool_name: str, func: Callable, name: Optional[str], priority: int
+    ) -> Hook:
+        hook = Hook(name or func.__name__, tool_name, func, priority)
+        with self._lock:
+            hooks.append(hook)
+            self._pre_chains = {}
+            self._post_chains = {}
+        return hook
+
+    def clear(self) -> None:
+        """Remove all hooks."""
+        with self._lock:
+            self._pre = []
+            self._post = []
+            self._pre_chains = {}
+            self._post_chains = {}
+
+    def set_enabled(self, name: str, enabled: bool) -> int:
+        """
+        Enable or disable every hook registered under a name.
+
+        Returns:
+            int: The number of hooks that were switched.
+        """
+        switched = 0
+        for hook in self._pre + self._post:
+            if hook.name == name:
+                hook.enabled = enabled
+                switched += 1
+        logger.info("Tool hook %s %s (%i)", name, "enabled" if enabled else "disabled", switched)
+        return switched
+
+    def enable(self, name: str) -> int:
+        """Enable the hooks registered under a name."""
+        return self.set_enabled(name, True)
+
+    def disable(self, name: str) -> int:
+        """Disable the hooks registered under a name."""
+        return self.set_enabled(name, False)
+
+    @staticmethod
+    def _resolve(hooks: List[Hook], tool_name: str) -> Tuple[Hook, ...]:
+        matching = [hook for hook in hooks if hook.tool_name in (tool_name, ALL_TOOLS)]
+        # sorted() is stable, so equal priorities keep registration order.
+        return tuple(sorted(matching, key=lambda hook: hook.priority))
+
+    def _chain(self, chains: Dict[str, Tuple[Hook, ...]], hooks: List[Hook], tool_name: str):
+        chain = chains.get(tool_name)
+        if chain is None:
+            chain = chains[tool_name] = self._resolve(hooks, tool_name)
+        return chain
+
+    def run_pre(self, tool: Any, args: Dict[str, Any], tool_context: Any) -> Optional[Dict]:
+        """Run the pre hooks of a tool until one returns a response."""
+        for hook in self._chain(self._pre_chains, self._pre, tool.name):
+            if not hook.enabled:
+                continue
+            started = time.perf_counter()
+            try:
+                response = hook.func(tool, args, tool_context)
+            finally:
+                hook.calls += 1
+                hook.total_secs += time.perf_counter() - started
+            if response is not None:
+                return response
+        return None
+
+    def run_post(
+        self, tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any
+    ) -> Optional[Dict]:
+        """Run the post hooks of a tool, each seeing the latest response."""
+        altered = None
+        for hook in self._chain(self._post_chains, self._post, tool.name):
+            if not hook.enabled:
+                continue
+            started = time.perf_counter()
+            try:
+                response = hook.func(
+                    tool, args, tool_context, tool_response if altered is None else altered
+                )
+            finally:
+                hook.calls += 1
+                hook.total_secs += time.perf_counter() - started
+            if response is not None:
+                altered = response
+        return altered
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return call counts and timings of every registered hook."""
+        return [
+            {
+                "stage": stage,
+                "name": hook.name,
+                "tool": hook.tool_name,
+                "enabled": hook.enabled,
+                "calls": hook.calls,
+                "total_secs": hook.total_secs,
+            }
+            for stage, hooks in (("pre", self._pre), ("post", self._post))
+            for hook in hooks
+        ]
+
+
+# Global instance
+tool_hooks = ToolHookRegistry()
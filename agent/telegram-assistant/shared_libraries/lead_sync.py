@@ -0,0 +1,116 @@
+"""Diff-based lead writes for the send_lead_to_backend tool.
+
+The last lead payload that reached the backend is kept in session state
+together with its hash and the backend lead id. A new call with the same
+normalized payload is answered without touching the network; a call with
+changed fields becomes a PATCH of just those fields. Optional fields that
+were dropped from the payload are sent as null so the backend clears them.
+If the backend no longer knows the lead (404), the snapshot is forgotten
+and the tool creates the lead again.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from ..tools.tools import build_lead_payload, update_lead_fields
+from .metrics import counter
+
+logger = logging.getLogger(__name__)
+
+LEAD_ID_KEY = "lead_id"
+LEAD_SNAPSHOT_KEY = "lead_snapshot"
+LEAD_SNAPSHOT_HASH_KEY = "lead_snapshot_hash"
+
+lead_writes = counter(
+    "agent_lead_writes_total",
+    "Lead writes by mode: created, patched or skipped as unchanged.",
+    ("mode",),
+)
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    """Stable hash of a normalized lead payload."""
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def before_lead_write(args: Dict[str, Any], state: Any) -> Optional[Dict[str, Any]]:
+    """
+    Skip or shrink a lead write based on the last written snapshot.
+
+    Args:
+        args (Dict[str, Any]): Arguments of the send_lead_to_backend call.
+        state (Any): The session state of the tool context.
+
+    Returns:
+        Optional[Dict[str, Any]]: A tool response to use instead of calling
+        the tool, or None when the tool should create the lead itself.
+    """
+    payload, error = build_lead_payload(args.get("lead_data"))
+    if error:
+        return None  # The tool reports validation errors itself.
+
+    lead_id = state.get(LEAD_ID_KEY)
+    snapshot = state.get(LEAD_SNAPSHOT_KEY)
+    if lead_id is None or snapshot is None:
+        return None
+
+    if state.get(LEAD_SNAPSHOT_HASH_KEY) == payload_hash(payload):
+        lead_writes.inc(mode="skipped")
+        logger.info("Lead %s unchanged, skipping backend write", lead_id)
+        return {
+            "status": "success",
+            "message": "Lead data is unchanged, nothing to update.",
+            "lead_id": lead_id,
+        }
+
+    changes = {key: value for key, value in payload.items() if snapshot.get(key) != value}
+    changes.update({key: None for key in snapshot if key not in payload})
+    response = update_lead_fields(lead_id, changes)
+    if response.get("status_code") == 404:
+        logger.warning("Lead %s is gone from the backend, creating it again", lead_id)
+        forget_lead(state)
+        return None
+    if response.get("status") == "success":
+        lead_writes.inc(mode="patched")
+    return response
+
+
+def forget_lead(state: Any) -> None:
+    """Drop the backend lead id and the last written snapshot from session state."""
+    # Session state has no deletion; None reads the same as a missing key.
+    for key in (LEAD_ID_KEY, LEAD_SNAPSHOT_KEY, LEAD_SNAPSHOT_HASH_KEY):
+        state[key] = None
+
+
+def after_lead_write(args: Dict[str, Any], state: Any, response: Any) -> None:
+    """
+    Remember the payload of a successful lead write in session state.
+
+    Args:
+        args (Dict[str, Any]): Arguments of the send_lead_to_backend call.
+        state (Any): The session state of the tool context.
+        response (Any): The tool response.
+    """
+    if not isinstance(response, dict) or response.get("status") != "success":
+        return
+    payload, error = build_lead_payload(args.get("lead_data"))
+    if error:
+        return
+
+    digest = payload_hash(payload)
+    if state.get(LEAD_SNAPSHOT_HASH_KEY) == digest:
+        return
+
+    lead_id = state.get(LEAD_ID_KEY)
+    if lead_id is None:
+        lead_id = (response.get("lead_data") or {}).get("id")
+        if lead_id is None:
+            return  # Without a backend id there is nothing to PATCH later.
+        lead_writes.inc(mode="created")
+        state[LEAD_ID_KEY] = lead_id
+
+    state[LEAD_SNAPSHOT_KEY] = payload
+    state[LEAD_SNAPSHOT_HASH_KEY] = digest
@@ -0,0 +1,160 @@
+"""Logging setup for the Telegram Assistant Agent.
+
+Two modes, selected by ``LOG_MODE``:
+
+- ``plain`` - ``logging.basicConfig`` text lines written by the calling
+  thread, for development.
+- ``production`` - the calling thread only merges the message arguments
+  and puts the record on a bounded queue; a background thread redacts phone
+  numbers and e-mail addresses, formats one JSON object per line and writes
+  it to stdout. Selected hot-path loggers are rate limited per logger, and
+  records that are rate limited or do not fit in the queue are dropped and
+  counted in ``agent_log_records_dropped_total``.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from .metrics import counter
+
+LOG_MODES = ("plain", "production")
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# 11 to 15 digits, optionally with +, spaces, dashes and brackets between
+# them: +7 (916) 123-45-67, 89161234567. Telegram IDs (up to 10 digits) stay.
+_PHONE_RE = re.compile(r"(?<![\w+])\+?\d(?:[\s\-()]*\d){10,14}(?!\w)")
+
+dropped_records = counter(
+    "agent_log_records_dropped_total",
+    "Log records dropped by rate limiting or a full log queue",
+    ("logger", "reason"),
+)
+
+_listener: Optional[QueueListener] = None
+
+
+def redact(text: str) -> str:
+    """Replace e-mail addresses and phone numbers in ``text``."""
+    return _PHONE_RE.sub("[phone]", _EMAIL_RE.sub("[email]", text))
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON with PII redacted."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+        }
+        if record.exc_text:
+            entry["exc"] = redact(record.exc_text)
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per logger for records below WARNING.
+
+    Args:
+        rate (float): Records per second let through on average.
+        burst (int): Records that may pass at once after a quiet period.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        super().__init__()
+        self._rate = rate
+        self._burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+        dropped_records.inc(logger=record.name, reason="rate_limit")
+        return False
+
+
+class _AsyncQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments are merged here because they may change after the call;
+        # tracebacks are rendered here because they refer to live frames.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records.inc(logger=record.name, reason="queue_full")
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(config) -> None:
+    """
+    Set up the root logger from the LOG_* settings of Config.
+
+    Only the first call in a process has effect; later calls (one per worker
+    app, the CLI entry points) find the root logger already configured.
+
+    Args:
+        config (Config): Provides the LOG_* settings.
+
+    Raises:
+        ValueError: If LOG_MODE is not one of LOG_MODES.
+    """
+    global _listener
+    if config.LOG_MODE not in LOG_MODES:
+        raise ValueError(
+            f"Unknown LOG_MODE {config.LOG_MODE!r}, expected one of {', '.join(LOG_MODES)}"
+        )
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    if config.LOG_MODE == "plain":
+        logging.basicConfig(level=config.LOG_LEVEL)
+        return
+
+    records: queue.Queue = queue.Queue(config.LOG_QUEUE_SIZE)
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(JsonFormatter())
+    _listener = QueueListener(records, writer)
+    _listener.start()
+    atexit.register(_stop_listener)
+
+    root.addHandler(_AsyncQueueHandler(records))
+    root.setLevel(config.LOG_LEVEL)
+    package = __package__.rsplit(".", 1)[0]
+    for name in config.LOG_RATE_LIMITED_LOGGERS.split(","):
+        if name.strip():
+            logging.getLogger(f"{package}.{name.strip()}").addFilter(
+                RateLimitFilter(config.LOG_RATE_LIMIT_PER_SEC, config.LOG_RATE_LIMIT_BURST)
+            )
@@ -0,0 +1,466 @@
+"""In-process metrics for the Telegram Assistant Agent.
+
+Counters and histograms keep one value shard per thread. A thread only ever
+writes its own shard, so recording a value takes no lock; shards are summed
+when the metrics are collected. Gauges are computed by a function at
+collection time. ``render_prometheus`` produces the text exposition format
+served on ``/metrics``.
+
+Each uvicorn worker is a separate process with its own metrics. With
+several workers, ``MultiprocessMetrics`` has every worker publish its
+metrics to a file in a shared directory, and ``/metrics`` merges the files
+of all workers: counters and histograms are summed, including those of
+workers that have exited, so they never go backwards between scrapes;
+gauges are summed over live workers only.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from threading import Lock, local
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Default latency buckets in seconds, from a fast tool call to a slow turn.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _ShardedMetric:
+    """Base class for metrics that record into per-thread shards."""
+
+    kind = ""
+
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._local = local()
+        self._shards: List[Dict] = []
+        self._shards_lock = Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.label_names)
+
+    def _shard(self) -> Dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._shards_lock:
+                self._shards.append(values)
+            return values
+
+    def _shard_copies(self) -> List[Dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # dict() copies atomically, even while the owning thread records.
+        return [dict(shard) for shard in shards]
+
+
+class Counter(_ShardedMetric):
+    """A monotonically increasing counter with optional labels."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increase the counter for the given label values."""
+        key = self._key(labels)
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Return the current value for the given label values."""
+        return self.collect().get(self._key(labels), 0)
+
+    def collect(self) -> Dict[LabelValues, float]:
+        """Return a copy of all label combinations and their values."""
+        values: Dict[LabelValues, float] = {}
+        for shard in self._shard_copies():
+            for key, amount in shard.items():
+                values[key] = values.get(key, 0) + amount
+        return values
+
+
+class Histogram(_ShardedMetric):
+    """Observations counted into cumulative buckets, with sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for the given label values."""
+        key = self._key(labels)
+        shard = self._shard()
+        # [count per bucket..., count above the last bucket, sum]
+        series = shard.get(key)
+        if series is None:
+            series = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> Dict[LabelValues, Tuple[List[int], float, int]]:
+        """Return cumulative bucket counts, sum and count per label values."""
+        merged: Dict[LabelValues, List] = {}
+        for shard in self._shard_copies():
+            for key, series in shard.items():
+                series = list(series)
+                total = merged.get(key)
+                if total is None:
+                    merged[key] = series
+                else:
+                    for position, amount in enumerate(series):
+                        total[position] += amount
+        result = {}
+        for key, series in merged.items():
+            cumulative, running = [], 0
+            for amount in series[:-1]:
+                running += amount
+                cumulative.append(running)
+            result[key] = (cumulative[:-1], series[-1], running)
+        return result
+
+
+class Gauge:
+    """A value computed by a function each time metrics are collected."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, func: Callable[[], float]):
+        self.name = name
+        self.description = description
+        self.label_names: Tuple[str, ...] = ()
+        self.func = func
+
+    def collect(self) -> Dict[LabelValues, float]:
+        """Return the current value."""
+        return {(): self.func()}
+
+
+class Stopwatch:
+    """Start times of in-flight operations, keyed by e.g. invocation id.
+
+    Entries whose stop is never called (a callback that did not run) are
+    dropped once more than ``max_entries`` operations are in flight.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._started: Dict[Hashable, float] = {}
+
+    def start(self, key: Hashable) -> None:
+        """Record the start of an operation."""
+        started = self._started
+        started[key] = time.perf_counter()
+        while len(started) > self.max_entries:
+            try:
+                started.pop(next(iter(started)), None)
+            except (StopIteration, RuntimeError):
+                break
+
+    def stop(self, key: Hashable) -> Optional[float]:
+        """Return the seconds since start, or None if it was never started."""
+        started = self._started.pop(key, None)
+        if started is None:
+            return None
+        return time.perf_counter() - started
+
+    def __len__(self) -> int:
+        return len(self._started)
+
+
+_registry: Dict[str, object] = {}
+_registry_lock = Lock()
+
+
+def _get_or_create(name: str, factory: Callable[[], object]):
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = factory()
+        return _registry[name]
+
+
+def counter(name: str, description: str, label_names: Tuple[str, ...] = ()) -> Counter:
+    """
+    Get or create a counter registered under the given name.
+
+    Args:
+        name (str): Metric name, e.g. ``agent_guard_violations_total``.
+        description (str): Human readable help text.
+        label_names (Tuple[str, ...]): Names of the labels the counter accepts.
+
+    Returns:
+        Counter: The registered counter.
+    """
+    return _get_or_create(name, lambda: Counter(name, description, label_names))
+
+
+def histogram(
+    name: str,
+    description: str,
+    label_names: Tuple[str, ...] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """
+    Get or create a histogram registered under the given name.
+
+    Args:
+        name (str): Metric name, e.g. ``agent_turn_duration_seconds``.
+        description (str): Human readable help text.
+        label_names (Tuple[str, ...]): Names of the labels the histogram accepts.
+        buckets (Sequence[float]): Upper bounds of the buckets.
+
+    Returns:
+        Histogram: The registered histogram.
+    """
+    return _get_or_create(name, lambda: Histogram(name, description, label_names, buckets))
+
+
+def gauge(name: str, description: str, func: Callable[[], float]) -> Gauge:
+    """
+    Get or create a gauge whose value is computed by ``func`` on collection.
+
+    Args:
+        name (str): Metric name, e.g. ``agent_active_sessions``.
+        description (str): Human readable help text.
+        func (Callable[[], float]): Returns the current value.
+
+    Returns:
+        Gauge: The registered gauge.
+    """
+    return _get_or_create(name, lambda: Gauge(name, description, func))
+
+
+def snapshot() -> Dict[str, Dict[LabelValues, object]]:
+    """Return the current values of every registered metric."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {metric.name: metric.collect() for metric in metrics}
+
+
+def export() -> Dict[str, Dict[str, Any]]:
+    """
+    Return every registered metric as JSON-serializable metric families.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per metric name its kind, help text,
+        label names, bucket bounds (histograms) and values as
+        ``[label values, value]`` pairs; a histogram value is
+        ``[cumulative bucket counts, sum, count]``.
+    """
+    with _registry_lock:
+        metrics = list(_registry.values())
+    families = {}
+    for metric in metrics:
+        family = {
+            "kind": metric.kind,
+            "help": metric.description,
+            "labels": list(metric.label_names),
+            "values": [[list(key), value] for key, value in metric.collect().items()],
+        }
+        if isinstance(metric, Histogram):
+            family["buckets"] = list(metric.buckets)
+            family["values"] = [
+                [key, [list(buckets), total, count]] for key, (buckets, total, count) in family["values"]
+            ]
+        families[metric.name] = family
+    return families
+
+
+def _merge_value(kind: str, total: Any, value: Any) -> Any:
+    if kind != "histogram":
+        return total + value
+    buckets = [a + b for a, b in zip(total[0], value[0])]
+    return [buckets, total[1] + value[1], total[2] + value[2]]
+
+
+def merge(exports: Sequence[Tuple[Dict[str, Dict[str, Any]], bool]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Merge the exported metrics of several processes.
+
+    Args:
+        exports (Sequence[Tuple[Dict[str, Dict[str, Any]], bool]]): The
+            exported metrics of each process and whether it is still running.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The merged metric families.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    values: Dict[str, Dict[LabelValues, Any]] = {}
+    for families, alive in exports:
+        for name, family in families.items():
+            if family["kind"] == "gauge" and not alive:
+                continue
+            if name not in merged:
+                merged[name] = dict(family)
+                values[name] = {}
+            elif family.get("buckets") != merged[name].get("buckets"):
+                continue  # Buckets changed between releases; keep the first.
+            series = values[name]
+            for key, value in family["values"]:
+                key = tuple(key)
+                series[key] = value if key not in series else _merge_value(family["kind"], series[key], value)
+    for name, family in merged.items():
+        family["values"] = [[list(key), value] for key, value in values[name].items()]
+    return merged
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MultiprocessMetrics:
+    """
+    Publishes this worker's metrics to a directory shared by all workers.
+
+    The file is rewritten every ``interval_secs`` in the background and on
+    every scrape served by this worker, so other workers' values lag by at
+    most ``interval_secs``. Files are named ``<pid>-<start time>.json``, so a
+    restarted worker never overwrites the counters of the one it replaces.
+
+    Args:
+        directory (str): The directory shared by the workers.
+        interval_secs (float): How often the background task publishes.
+    """
+
+    def __init__(self, directory: str, interval_secs: float = 5.0):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{time.time_ns()}.json")
+        self._interval_secs = interval_secs
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self) -> None:
+        """Write this worker's current metrics to its file."""
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(export(), file, ensure_ascii=False)
+        os.replace(temporary, self.path)
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Return the metrics of all workers, merged."""
+        self.publish()
+        exports = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    families = json.load(file)
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable metrics file %s", path, exc_info=True)
+                continue
+            pid = int(os.path.basename(path).split("-", 1)[0])
+            exports.append((families, path == self.path or _pid_alive(pid)))
+        return merge(exports)
+
+    def render(self) -> str:
+        """Render the metrics of all workers in the Prometheus text format."""
+        return render_prometheus(self.collect())
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval_secs)
+            try:
+                await asyncio.to_thread(self.publish)
+            except OSError:
+                logger.warning("Failed to publish metrics to %s", self.path, exc_info=True)
+
+    def start(self) -> None:
+        """Start publishing in the background of the running event loop."""
+        if self._task is None:
+            self.publish()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background publishing and publish the final values."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.publish()
+
+
+def reset_multiprocess_dir(directory: str) -> None:
+    """
+    Create the shared metrics directory and remove files of earlier runs.
+
+    Called once by the server before the workers start.
+
+    Args:
+        directory (str): The directory shared by the workers.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.json*")):
+        os.remove(path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(families: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """
+    Render metrics in the Prometheus text format.
+
+    Args:
+        families (Optional[Dict[str, Dict[str, Any]]]): Metric families as
+            returned by ``export`` or ``merge``; this process's registered
+            metrics when omitted.
+
+    Returns:
+        str: The text exposition.
+    """
+    if families is None:
+        families = export()
+    lines = []
+    for name, family in families.items():
+        lines.append(f"# HELP {name} {_escape(family['help'])}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        names = family["labels"]
+        values = sorted((tuple(key), value) for key, value in family["values"])
+        if family["kind"] == "histogram":
+            for key, (buckets, total, count) in values:
+                for bound, cumulative in zip(family["buckets"], buckets):
+                    labels = _labels(names, key, f'le="{bound}"')
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = _labels(names, key, 'le="+Inf"')
+                lines.append(f"{name}_bucket{labels} {count}")
+                lines.append(f"{name}_sum{_labels(names, key)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(names, key)} {count}")
+        else:
+            for key, value in values:
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+    return "\n".join(lines) + "\n"
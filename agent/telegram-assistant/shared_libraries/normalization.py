@@ -0,0 +1,166 @@
+"""Schema-driven, in-place normalization of tool arguments.
+
+A schema maps dotted field paths to a sequence of transform names, e.g.
+``{"lead_data.email": ("strip", "lower")}``. A ``[]`` suffix applies the
+rule to every element of a list (``"items[].sku"``). Each schema is compiled
+once into a tree of closures that rewrite only the listed fields of the
+argument dict in place, without copying any container.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .validators import tool_name_and_function
+
+Transform = Callable[[Any], Any]
+Normalizer = Callable[[Dict[str, Any]], None]
+Schema = Dict[str, Sequence[str]]
+
+
+def _lower(value: Any) -> Any:
+    return value.lower() if isinstance(value, str) else value
+
+
+def _strip(value: Any) -> Any:
+    return value.strip() if isinstance(value, str) else value
+
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def _phone(value: Any) -> Any:
+    """Normalize a Russian phone number to +7XXXXXXXXXX, leave anything else."""
+    if not isinstance(value, str):
+        return value
+    digits = _NON_DIGITS.sub("", value)
+    if len(digits) != 11 or digits[0] not in "78":
+        return value
+    return "+7" + digits[1:]
+
+
+TRANSFORMS: Dict[str, Transform] = {
+    "lower": _lower,
+    "strip": _strip,
+    "phone": _phone,
+}
+
+# Argument schemas of the tools registered with the agent.
+TOOL_ARG_SCHEMAS: Dict[str, Schema] = {
+    "send_lead_to_backend": {
+        "lead_data.name": ("strip",),
+        "lead_data.phone": ("strip", "phone"),
+        "lead_data.email": ("strip", "lower"),
+        "lead_data.telegramUsername": ("strip",),
+        "lead_data.telegramId": ("strip",),
+        "lead_data.company": ("strip",),
+        "lead_data.position": ("strip",),
+        "lead_data.notes": ("strip",),
+    },
+}
+
+
+def _chain(names: Sequence[str]) -> Optional[Transform]:
+    functions = [TRANSFORMS[name] for name in names]
+    if not functions:
+        return None
+    if len(functions) == 1:
+        return functions[0]
+
+    def chained(value: Any) -> Any:
+        for function in functions:
+            value = function(value)
+        return value
+
+    return chained
+
+
+class _Node:
+    __slots__ = ("transforms", "children")
+
+    def __init__(self):
+        self.transforms: List[str] = []
+        self.children: Dict[Tuple[str, bool], "_Node"] = {}
+
+
+def _compile_node(node: _Node) -> Optional[Normalizer]:
+    fields = []
+    for (key, each), child in node.children.items():
+        transform = _chain(child.transforms)
+        nested = _compile_node(child)
+        fields.append((key, each, transform, nested))
+    if not fields:
+        return None
+    fields = tuple(fields)
+
+    def apply(container: Dict[str, Any]) -> None:
+        for key, each, transform, nested in fields:
+            value = container.get(key)
+            if value is None:
+                continue
+            if each:
+                if not isinstance(value, list):
+                    continue
+                for position, item in enumerate(value):
+                    if transform is not None:
+                        value[position] = item = transform(item)
+                    if nested is not None and isinstance(item, dict):
+                        nested(item)
+            else:
+                if transform is not None:
+                    container[key] = value = transform(value)
+                if nested is not None and isinstance(value, dict):
+                    nested(value)
+
+    return apply
+
+
+def compile_normalizer(schema: Schema) -> Optional[Normalizer]:
+    """
+    Compile an argument schema into an in-place normalizer.
+
+    Args:
+        schema (Schema): Field paths mapped to transform names.
+
+    Returns:
+        Optional[Normalizer]: A function that normalizes an argument dict in
+        place, or None if the schema is empty.
+
+    Raises:
+        KeyError: If the schema refers to an unknown transform.
+    """
+    root = _Node()
+    for path, names in schema.items():
+        for name in names:
+            if name not in TRANSFORMS:
+                raise KeyError(f"Unknown transform '{name}' for field '{path}'")
+        node = root
+        for part in path.split("."):
+            each = part.endswith("[]")
+            key = part[:-2] if each else part
+            node = node.children.setdefault((key, each), _Node())
+        node.transforms.extend(names)
+    return _compile_node(root)
+
+
+def compile_tool_normalizers(
+    tools: List[Any], schemas: Optional[Dict[str, Schema]] = None
+) -> Dict[str, Normalizer]:
+    """
+    Compile normalizers for the tools that have an argument schema.
+
+    Args:
+        tools (List[Any]): The tools passed to the agent (functions or BaseTool).
+        schemas (Optional[Dict[str, Schema]]): Schemas by tool name, defaults
+            to TOOL_ARG_SCHEMAS.
+
+    Returns:
+        Dict[str, Normalizer]: Normalizers keyed by tool name.
+    """
+    schemas = TOOL_ARG_SCHEMAS if schemas is None else schemas
+    normalizers = {}
+    for tool in tools:
+        name, _ = tool_name_and_function(tool)
+        normalizer = compile_normalizer(schemas.get(name, {}))
+        if normalizer is not None:
+            normalizers[name] = normalizer
+    return normalizers
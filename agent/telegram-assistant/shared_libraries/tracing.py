@@ -0,0 +1,309 @@
+"""Sampled, structured tracing of agent, model and tool callbacks.
+
+Spans are opened and closed from paired callbacks (before_/after_agent,
+before_/after_model, before_/after_tool) and emitted as one compact JSON
+line each on the ``trace`` logger. Sampling is decided once per invocation,
+so a sampled turn is always traced end to end. Payload capture (tool args,
+prompt and response text) is sampled separately and truncated to a fixed
+size. When tracing is disabled the callbacks are not registered at all.
+
+Spans go to one or more sinks (TRACE_SINKS): ``log`` writes the JSON lines,
+``otel`` mirrors them as OpenTelemetry spans under the incoming W3C trace
+context, exported by the span processors set up for the ADK server.
+"""
+
+import json
+import logging
+import os
+import time
+import zlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate
+from opentelemetry import trace as otel_trace
+
+logger = logging.getLogger(__name__)
+
+_MAX_OPEN_SPANS = 4096
+
+
+def _sampled(invocation_id: str, rate: float, salt: str = "") -> bool:
+    """Deterministic per-invocation sampling decision."""
+    if rate >= 1.0:
+        return True
+    if rate <= 0.0:
+        return False
+    return zlib.crc32(f"{salt}{invocation_id}".encode("utf-8")) < rate * 0x100000000
+
+
+class Span:
+    """An open span."""
+
+    __slots__ = ("trace_id", "span_id", "parent", "name", "start", "attrs", "payload", "exported")
+
+    def __init__(self, trace_id: str, parent: Optional["Span"], name: str, attrs: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.name = name
+        self.start = time.time()
+        self.attrs = attrs
+        self.payload: Optional[Dict[str, str]] = None
+        # Sink-specific handle, e.g. the matching OpenTelemetry span.
+        self.exported: Any = None
+
+    @property
+    def parent_id(self) -> Optional[str]:
+        return self.parent.span_id if self.parent is not None else None
+
+
+class SpanSink:
+    """Receives finished spans and events. Subclasses export them somewhere."""
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span, duration_ms: float) -> None:
+        pass
+
+    def on_event(self, trace_id: str, name: str, attrs: Dict[str, Any]) -> None:
+        pass
+
+
+class JsonLogSink(SpanSink):
+    """Writes spans and events as single-line JSON records to a logger."""
+
+    def __init__(self, target: logging.Logger):
+        self._logger = target
+
+    def _emit(self, record: Dict[str, Any]) -> None:
+        self._logger.info(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        )
+
+    def on_end(self, span: Span, duration_ms: float) -> None:
+        record = {
+            "type": "span",
+            "name": span.name,
+            "trace": span.trace_id,
+            "span": span.span_id,
+            "parent": span.parent_id,
+            "ts": round(span.start, 6),
+            "dur_ms": round(duration_ms, 3),
+        }
+        if span.attrs:
+            record["attrs"] = span.attrs
+        if span.payload:
+            record["payload"] = span.payload
+        self._emit(record)
+
+    def on_event(self, trace_id: str, name: str, attrs: Dict[str, Any]) -> None:
+        self._emit(
+            {"type": "event", "name": name, "trace": trace_id, "ts": round(time.time(), 6), "attrs": attrs}
+        )
+
+
+class OtelSpanSink(SpanSink):
+    """Mirrors spans as OpenTelemetry spans.
+
+    The root span of an invocation is parented to the OpenTelemetry context
+    current at ``before_agent`` (the ADK invocation span, itself a child of
+    the ``traceparent`` received on ``/run``); other spans nest under it.
+    """
+
+    def __init__(self, tracer: Optional[otel_trace.Tracer] = None):
+        self._tracer = tracer or otel_trace.get_tracer(__name__)
+
+    def on_start(self, span: Span) -> None:
+        parent = span.parent.exported if span.parent is not None else None
+        span.exported = self._tracer.start_span(
+            span.name,
+            context=otel_trace.set_span_in_context(parent) if parent is not None else None,
+            start_time=int(span.start * 1e9),
+        )
+
+    def on_end(self, span: Span, duration_ms: float) -> None:
+        exported = span.exported
+        if exported is None:
+            return
+        exported.set_attribute("invocation_id", span.trace_id)
+        for key, value in span.attrs.items():
+            if value is not None:
+                exported.set_attribute(key, value)
+        for key, value in (span.payload or {}).items():
+            exported.set_attribute(f"payload.{key}", value)
+        if "error" in span.attrs or span.attrs.get("status") == "error":
+            exported.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+        exported.end(end_time=int((span.start + duration_ms / 1000) * 1e9))
+
+    def on_event(self, trace_id: str, name: str, attrs: Dict[str, Any]) -> None:
+        otel_trace.get_current_span().add_event(name, attrs)
+
+
+class Tracer:
+    """Keeps open spans keyed by callback pair and forwards them to sinks."""
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        payload_sample_rate: float = 0.0,
+        max_payload_chars: int = 256,
+        sinks: Optional[List[SpanSink]] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.payload_sample_rate = payload_sample_rate
+        self.max_payload_chars = max_payload_chars
+        self.sinks: List[SpanSink] = list(sinks or [])
+        self._open: "OrderedDict[Hashable, Span]" = OrderedDict()
+        self._roots: Dict[str, Span] = {}
+        self._lock = Lock()
+
+    def is_sampled(self, invocation_id: str) -> bool:
+        """Whether spans of this invocation are recorded."""
+        return _sampled(invocation_id, self.sample_rate)
+
+    def captures_payload(self, invocation_id: str) -> bool:
+        """Whether payloads of this (sampled) invocation are captured."""
+        return _sampled(invocation_id, self.payload_sample_rate, salt="payload:")
+
+    def truncate(self, value: Any) -> str:
+        """Render a payload value as a string bounded by max_payload_chars."""
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+        if len(text) > self.max_payload_chars:
+            return text[: self.max_payload_chars] + "…"
+        return text
+
+    def start_span(
+        self, key: Hashable, invocation_id: str, name: str, attrs: Optional[Dict[str, Any]] = None
+    ) -> Optional[Span]:
+        """
+        Open a span for a sampled invocation.
+
+        Args:
+            key (Hashable): Identifies the span for the matching end_span call.
+            invocation_id (str): Used as trace id and for the sampling decision.
+            name (str): Span name, e.g. ``tool.send_lead_to_backend``.
+            attrs (Optional[Dict[str, Any]]): Small span attributes.
+
+        Returns:
+            Optional[Span]: The span, or None if the invocation is not sampled.
+        """
+        if not self.is_sampled(invocation_id):
+            return None
+        with self._lock:
+            span = Span(invocation_id, self._roots.get(invocation_id), name, attrs or {})
+            if span.parent is None:
+                self._roots[invocation_id] = span
+            self._open[key] = span
+            while len(self._open) > _MAX_OPEN_SPANS:
+                _, dropped = self._open.popitem(last=False)
+                self._roots.pop(dropped.trace_id, None)
+        for sink in self.sinks:
+            sink.on_start(span)
+        return span
+
+    def get_span(self, key: Hashable) -> Optional[Span]:
+        """Return the open span for a key, if any."""
+        return self._open.get(key)
+
+    def end_span(self, key: Hashable, attrs: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        """Close the span opened under ``key`` and hand it to the sinks."""
+        with self._lock:
+            span = self._open.pop(key, None)
+            if span is not None and self._roots.get(span.trace_id) is span:
+                del self._roots[span.trace_id]
+        if span is None:
+            return None
+        if attrs:
+            span.attrs.update(attrs)
+        duration_ms = (time.time() - span.start) * 1000
+        for sink in self.sinks:
+            sink.on_end(span, duration_ms)
+        return span
+
+    def event(self, invocation_id: str, name: str, attrs: Optional[Dict[str, Any]] = None) -> None:
+        """Emit a point-in-time event for a sampled invocation."""
+        if not self.is_sampled(invocation_id):
+            return
+        for sink in self.sinks:
+            sink.on_event(invocation_id, name, attrs or {})
+
+
+class TraceContextMiddleware:
+    """ASGI middleware that continues the W3C trace context of a request.
+
+    The ``traceparent``/``tracestate`` headers are extracted and made the
+    current OpenTelemetry context while the request is handled, so spans
+    created by ADK and by the tracing callbacks join the caller's trace.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        carrier = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope["headers"]
+            if name in (b"traceparent", b"tracestate")
+        }
+        if not carrier:
+            await self.app(scope, receive, send)
+            return
+        token = otel_context.attach(propagate.extract(carrier))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            otel_context.detach(token)
+
+
+def inject_trace_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Add the current W3C trace context to outgoing request headers."""
+    propagate.inject(headers)
+    return headers
+
+
+_SINKS = {
+    "log": lambda: JsonLogSink(logging.getLogger("trace")),
+    "otel": OtelSpanSink,
+}
+
+_tracer: Optional[Tracer] = None
+_tracer_loaded = False
+_tracer_lock = Lock()
+
+
+def get_tracer() -> Optional[Tracer]:
+    """
+    Get the global Tracer instance.
+
+    Returns:
+        Optional[Tracer]: The tracer, or None when tracing is disabled.
+    """
+    global _tracer, _tracer_loaded
+    if _tracer_loaded:
+        return _tracer
+
+    with _tracer_lock:
+        if not _tracer_loaded:
+            from ..config import Config
+
+            config = Config()
+            if config.TRACE_ENABLED:
+                _tracer = Tracer(
+                    sample_rate=config.TRACE_SAMPLE_RATE,
+                    payload_sample_rate=config.TRACE_PAYLOAD_SAMPLE_RATE,
+                    max_payload_chars=config.TRACE_MAX_PAYLOAD_CHARS,
+                    sinks=[
+                        _SINKS[name.strip()]()
+                        for name in config.TRACE_SINKS.split(",")
+                        if name.strip()
+                    ],
+                )
+            _tracer_loaded = True
+    return _tracer
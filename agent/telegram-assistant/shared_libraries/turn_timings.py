@@ -0,0 +1,141 @@
+"""Per-turn latency breakdown: session load, model calls, tool calls, persist.
+
+Phases are recorded into a ``TurnTimings`` entry keyed by invocation id:
+model and tool calls by the agent callbacks, session loads and event writes
+by ``TimedSessionService``. The breakdown is attached to the final response
+event of the turn as ``custom_metadata["timings"]`` and every phase is also
+observed in the ``agent_turn_phase_duration_seconds`` histogram.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from .metrics import histogram
+
+TIMINGS_METADATA_KEY = "timings"
+
+PHASES = ("session_load", "model_ttft", "model", "tool", "session_persist")
+
+phase_duration = histogram(
+    "agent_turn_phase_duration_seconds",
+    "Duration of a phase of an agent turn",
+    ("phase",),
+)
+
+_MAX_TURNS = 4096
+_MAX_PENDING_LOADS = 4096
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+class TurnTimings:
+    """The timing breakdown of a single turn."""
+
+    __slots__ = ("session_load", "model_calls", "tool_calls", "persist", "_model_started")
+
+    def __init__(self):
+        self.session_load: List[float] = []
+        self.model_calls: List[Dict[str, Optional[float]]] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.persist: List[float] = []
+        self._model_started: Optional[float] = None
+
+    def model_started(self) -> None:
+        self._model_started = time.perf_counter()
+        self.model_calls.append({"ttft": None, "total": None})
+
+    def model_responded(self, final: bool) -> None:
+        """Record the first response chunk (TTFT) and, if final, the total."""
+        if self._model_started is None:
+            return
+        elapsed = time.perf_counter() - self._model_started
+        call = self.model_calls[-1]
+        if call["ttft"] is None:
+            call["ttft"] = elapsed
+            phase_duration.observe(elapsed, phase="model_ttft")
+        if final:
+            call["total"] = elapsed
+            self._model_started = None
+            phase_duration.observe(elapsed, phase="model")
+
+    def tool_finished(self, tool_name: str, elapsed: float) -> None:
+        self.tool_calls.append({"tool": tool_name, "total": elapsed})
+        phase_duration.observe(elapsed, phase="tool")
+
+    def to_metadata(self) -> Dict[str, Any]:
+        """Return the breakdown in milliseconds, as stored on the event."""
+        return {
+            "session_load_ms": _ms(sum(self.session_load)),
+            "session_loads": len(self.session_load),
+            "model_calls": [
+                {
+                    "ttft_ms": _ms(call["ttft"]) if call["ttft"] is not None else None,
+                    "total_ms": _ms(call["total"]) if call["total"] is not None else None,
+                }
+                for call in self.model_calls
+            ],
+            "tool_calls": [
+                {"tool": call["tool"], "total_ms": _ms(call["total"])} for call in self.tool_calls
+            ],
+            "session_persist_ms": _ms(sum(self.persist)),
+            "session_persists": len(self.persist),
+        }
+
+
+class TurnTimingRegistry:
+    """Turn timings of in-flight invocations and pending session loads.
+
+    ADK loads the session before the invocation id exists, so load times
+    are kept per session until the first event of the invocation is written.
+    """
+
+    def __init__(self):
+        self._turns: "OrderedDict[str, TurnTimings]" = OrderedDict()
+        self._pending_loads: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, invocation_id: str) -> TurnTimings:
+        """Return the timings of an invocation, creating them if needed."""
+        with self._lock:
+            timings = self._turns.get(invocation_id)
+            if timings is None:
+                timings = self._turns[invocation_id] = TurnTimings()
+                if len(self._turns) > _MAX_TURNS:
+                    self._turns.popitem(last=False)
+            return timings
+
+    def session_loaded(self, session_id: str, elapsed: float) -> None:
+        phase_duration.observe(elapsed, phase="session_load")
+        with self._lock:
+            self._pending_loads.setdefault(session_id, []).append(elapsed)
+            if len(self._pending_loads) > _MAX_PENDING_LOADS:
+                self._pending_loads.popitem(last=False)
+
+    def claim_session_loads(self, invocation_id: str, session_id: str) -> TurnTimings:
+        """Move the pending session loads into the invocation's timings."""
+        timings = self.get(invocation_id)
+        with self._lock:
+            loads = self._pending_loads.pop(session_id, None)
+        if loads:
+            timings.session_load.extend(loads)
+        return timings
+
+    def event_persisted(self, invocation_id: str, elapsed: float) -> None:
+        phase_duration.observe(elapsed, phase="session_persist")
+        with self._lock:
+            timings = self._turns.get(invocation_id)
+        if timings is not None:
+            timings.persist.append(elapsed)
+
+    def finish(self, invocation_id: str) -> Optional[TurnTimings]:
+        """Remove and return the timings of a finished invocation."""
+        with self._lock:
+            return self._turns.pop(invocation_id, None)
+
+
+# Global instance
+turn_timings = TurnTimingRegistry()
@@ -0,0 +1,96 @@
+"""Per-tool argument validators compiled once when the agent is built."""
+
+import inspect
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from google.adk.sessions.state import State
+
+from .customer_profile import get_customer_profile
+
+# A check returns None when the call is allowed, or an error message for the model.
+Check = Callable[[Dict[str, Any], Any], Optional[str]]
+
+
+def validate_customer_id(customer_id: str, session_state: State) -> Tuple[bool, str]:
+    """
+        Validates the customer ID against the customer profile in the session state.
+
+        Args:
+            customer_id (str): The ID of the customer to validate.
+            session_state (State): The session state containing the customer profile.
+
+        Returns:
+            A tuple containing an bool (True/False) and a String.
+            When False, a string with the error message to pass to the model for deciding
+            what actions to take to remediate.
+    """
+    try:
+        customer_data = get_customer_profile(session_state)
+    except ValueError:
+        return False, "Customer profile couldn't be parsed. Please reload the customer data."
+
+    if customer_data is None:
+        return False, "No customer profile selected. Please select a profile."
+
+    stored_customer_id = customer_data.get('customer_id')
+    if customer_id == stored_customer_id:
+        return True, ""
+    return False, f"You cannot use the tool with customer_id {customer_id}, only for {stored_customer_id}."
+
+
+def _check_customer_id(args: Dict[str, Any], tool_context: Any) -> Optional[str]:
+    # Several tools require customer_id as input. We don't want to rely
+    # solely on the model picking the right customer id. We validate it.
+    if 'customer_id' not in args:
+        return None
+    valid, err = validate_customer_id(args['customer_id'], tool_context.state)
+    return None if valid else err
+
+
+class ToolValidator:
+    """The argument checks that apply to a single tool."""
+
+    __slots__ = ("tool_name", "checks")
+
+    def __init__(self, tool_name: str, checks: Sequence[Check]):
+        self.tool_name = tool_name
+        self.checks = tuple(checks)
+
+    def __call__(self, args: Dict[str, Any], tool_context: Any) -> Optional[str]:
+        for check in self.checks:
+            error = check(args, tool_context)
+            if error:
+                return error
+        return None
+
+
+def tool_name_and_function(tool: Any) -> Tuple[str, Optional[Callable]]:
+    """Return the name under which ADK registers a tool and its function."""
+    if callable(tool) and not hasattr(tool, "name"):
+        return tool.__name__, tool
+    return tool.name, getattr(tool, "func", None)
+
+
+def compile_tool_validators(tools: List[Any]) -> Dict[str, ToolValidator]:
+    """
+    Build validators for the tools that need any checks.
+
+    Args:
+        tools (List[Any]): The tools passed to the agent (functions or BaseTool).
+
+    Returns:
+        Dict[str, ToolValidator]: Validators keyed by tool name. Tools without
+        checks are left out, so calling them costs a single dict lookup.
+    """
+    validators = {}
+    for tool in tools:
+        name, func = tool_name_and_function(tool)
+        parameters = inspect.signature(func).parameters if func else {}
+
+        checks: List[Check] = []
+        if 'customer_id' in parameters:
+            checks.append(_check_customer_id)
+
+        if checks:
+            validators[name] = ToolValidator(name, checks)
+    return validators
@@ -18,7 +18,7 @@ import logging
 import re
 import time
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from google.adk.tools import ToolContext
 from ..services.auth_service import get_auth_service
 
@@ -62,6 +62,65 @@ def _normalize_phone(phone: str) -> str:
         digits = '7' + digits[1:]
     return '+' + digits
 
+def build_lead_payload(lead_data: dict) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validate raw lead data and build the payload for the backend API.
+
+    Args:
+        lead_data (dict): The lead data as sent by the model.
+
+    Returns:
+        Tuple[Optional[Dict[str, Any]], Optional[str]]: The normalized payload
+        and None, or None and a validation error message.
+    """
+    if not isinstance(lead_data, dict):
+        return None, "Invalid data format"
+
+    name = lead_data.get('name', '').strip()
+    phone = lead_data.get('phone', '').strip()
+    email = lead_data.get('email', '').strip() if lead_data.get('email') else None
+    telegram_username = lead_data.get('telegramUsername', '').strip() if lead_data.get('telegramUsername') else None
+    telegram_id = lead_data.get('telegramId', '').strip() if lead_data.get('telegramId') else None
+    company = lead_data.get('company', '').strip() if lead_data.get('company') else None
+    position = lead_data.get('position', '').strip() if lead_data.get('position') else None
+    notes = lead_data.get('notes', '').strip() if lead_data.get('notes') else None
+
+    # Validate required fields
+    if not _validate_name(name):
+        return None, "Invalid name format"
+
+    if not _validate_phone(phone):
+        return None, "Invalid phone number format"
+
+    # Validate optional email
+    if email and not _validate_email(email):
+        return None, "Invalid email format"
+
+    # Prepare data for backend API
+    api_data = {
+        'name': name,
+        'phone': _normalize_phone(phone),
+        'status': 'new',
+        'source': 'telegram'
+    }
+
+    # Add optional fields if provided
+    if email:
+        api_data['email'] = email
+    if telegram_username:
+        api_data['telegramUsername'] = telegram_username
+    if telegram_id:
+        api_data['telegramId'] = telegram_id
+    if company:
+        api_data['company'] = company
+    if position:
+        api_data['position'] = position
+    if notes:
+        api_data['notes'] = notes
+
+    return api_data, None
+
+
 def send_lead_to_backend(lead_data: dict) -> dict:
     """
     Sends a lead to the backend API with validation and retry logic.
@@ -79,53 +138,11 @@ def send_lead_to_backend(lead_data: dict) -> dict:
         {'status': 'success', 'message': 'Lead sent to backend successfully.'}
     """
     try:
-        # Validate required fields
-        if not isinstance(lead_data, dict):
-            return {"status": "error", "message": "Invalid data format"}
-        
-        name = lead_data.get('name', '').strip()
-        phone = lead_data.get('phone', '').strip()
-        email = lead_data.get('email', '').strip() if lead_data.get('email') else None
-        telegram_username = lead_data.get('telegramUsername', '').strip() if lead_data.get('telegramUsername') else None
-        telegram_id = lead_data.get('telegramId', '').strip() if lead_data.get('telegramId') else None
-        company = lead_data.get('company', '').strip() if lead_data.get('company') else None
-        position = lead_data.get('position', '').strip() if lead_data.get('position') else None
-        notes = lead_data.get('notes', '').strip() if lead_data.get('notes') else None
-        
-        # Validate required fields
-        if not _validate_name(name):
-            return {"status": "error", "message": "Invalid name format"}
+        api_data, error = build_lead_payload(lead_data)
+        if error:
+            return {"status": "error", "message": error}
         
-        if not _validate_phone(phone):
-            return {"status": "error", "message": "Invalid phone number format"}
-        
-        # Validate optional email
-        if email and not _validate_email(email):
-            return {"status": "error", "message": "Invalid email format"}
-        
-        # Prepare data for backend API
-        api_data = {
-            'name': name,
-            'phone': _normalize_phone(phone),
-            'status': 'new',
-            'source': 'telegram'
-        }
-        
-        # Add optional fields if provided
-        if email:
-            api_data['email'] = email
-        if telegram_username:
-            api_data['telegramUsername'] = telegram_username
-        if telegram_id:
-            api_data['telegramId'] = telegram_id
-        if company:
-            api_data['company'] = company
-        if position:
-            api_data['position'] = position
-        if notes:
-            api_data['notes'] = notes
-        
-        logger.info(">>> Sending validated lead to backend API: %s", api_data)
+        logger.debug(">>> Sending validated lead to backend API: %s", api_data)
         
         # Send data to backend API with JWT authentication
         try:
@@ -349,6 +366,65 @@ def update_lead_status(lead_id: int, new_status: str, notes: str = None) -> dict
         }
 
 
+def update_lead_fields(lead_id: Any, fields: Dict[str, Any]) -> dict:
+    """
+    Update only the given fields of a lead in the backend API.
+
+    Args:
+        lead_id (Any): The ID of the lead to update
+        fields (Dict[str, Any]): Changed fields of the validated lead payload
+
+    Returns:
+        dict: A dictionary with the status, message, and lead data
+    """
+    try:
+        logger.info(">>> Updating lead %s fields: %s", lead_id, sorted(fields))
+        
+        auth_service = get_auth_service()
+        response = auth_service.make_authenticated_request(
+            method='PATCH',
+            endpoint=f'/leads/{lead_id}',
+            json=fields
+        )
+        
+        if response.status_code == 200:
+            logger.info("Lead fields updated successfully")
+            lead_data = response.json() if response.content else {}
+            return {
+                "status": "success",
+                "message": "Lead updated successfully.",
+                "lead_id": lead_id,
+                "lead_data": lead_data
+            }
+        elif response.status_code == 404:
+            logger.warning("Lead not found with ID: %s", lead_id)
+            return {
+                "status": "error",
+                "message": f"Lead with ID {lead_id} not found.",
+                "status_code": 404
+            }
+        else:
+            error_msg = f"HTTP {response.status_code}"
+            try:
+                error_details = response.json()
+                error_msg += f": {error_details}"
+            except:
+                error_msg += f": {response.text}"
+            
+            logger.error("Backend API error: %s", error_msg)
+            return {
+                "status": "error",
+                "message": f"Backend API error: {error_msg}"
+            }
+            
+    except Exception as e:
+        logger.error("Failed to update lead fields: %s", str(e))
+        return {
+            "status": "error",
+            "message": f"Failed to update lead: {str(e)}"
+        }
+
+
 def find_lead_by_telegram_id(telegram_id: str) -> dict:
     """
     Find a lead by Telegram ID.
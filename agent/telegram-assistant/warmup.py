@@ -0,0 +1,131 @@
+"""Startup warm-up of the agent server.
+
+Each stage is run once per worker before the server starts accepting
+requests, so the first user after a deploy does not pay for lazy imports
+and first connections:
+
+- ``build_agent`` - import google.adk internals and build ``root_agent``.
+- ``faq_index`` - load the FAQ search index (and numpy), which the agent
+  module leaves to the first model call.
+- ``backend_token`` - log in to the backend, which also opens the keep-alive
+  connection of AuthService's pool.
+- ``session_db`` - open ``WARMUP_DB_CONNECTIONS`` connections in the pool of
+  each PostgreSQL session service.
+- ``model_call`` - with ``WARMUP_MODEL_CALL``, a one-token call through the
+  agent's Gemini client, which resolves credentials and opens its connection.
+
+Stages are timed and logged; a failing stage is logged and skipped, the
+remaining stages still run.
+"""
+
+import inspect
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Awaitable, Callable, Dict, List, Tuple, Union
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+WarmupStage = Tuple[str, Callable[[], Union[None, Awaitable[None]]]]
+
+
+def _build_agent() -> None:
+    # Imports google.adk internals and builds root_agent, its tools and hooks.
+    from .agent import root_agent  # noqa: F401
+
+
+def _faq_index() -> None:
+    from .services import get_faq_index
+
+    get_faq_index()
+
+
+def _backend_token() -> None:
+    from .services import get_auth_service
+
+    get_auth_service().get_auth_headers()
+
+
+async def _session_db(connections: int) -> None:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+    from .sessions import session_db_engines
+
+    engines = session_db_engines()
+    if not engines:
+        logger.info("No database session service, skipping session_db warm-up")
+        return
+    # Connections are checked out at the same time, so the pool keeps this
+    # many open once they are returned.
+    async with AsyncExitStack() as stack:
+        for engine in engines:
+            for _ in range(connections):
+                if isinstance(engine, AsyncEngine):
+                    await stack.enter_async_context(engine.connect())
+                else:
+                    stack.enter_context(engine.connect())
+
+
+async def _model_call() -> None:
+    from google.genai import types
+
+    from .agent import root_agent
+
+    model = root_agent.canonical_model
+    await model.api_client.aio.models.generate_content(
+        model=model.model,
+        contents="ping",
+        config=types.GenerateContentConfig(max_output_tokens=1),
+    )
+
+
+def warmup_stages(config: Config = None) -> List[WarmupStage]:
+    """
+    Return the warm-up stages in the order they run.
+
+    Args:
+        config (Config): Provides the WARMUP_* settings; read from the
+            environment when omitted.
+
+    Returns:
+        List[WarmupStage]: The enabled stages.
+    """
+    config = config or Config()
+    stages: List[WarmupStage] = [
+        ("build_agent", _build_agent),
+        ("faq_index", _faq_index),
+        ("backend_token", _backend_token),
+        ("session_db", lambda: _session_db(config.WARMUP_DB_CONNECTIONS)),
+    ]
+    if config.WARMUP_MODEL_CALL:
+        stages.append(("model_call", _model_call))
+    return stages
+
+
+async def run_warmup(stages: List[WarmupStage]) -> Dict[str, float]:
+    """
+    Run warm-up stages in order.
+
+    Args:
+        stages (List[WarmupStage]): (name, function) pairs; functions may be
+            sync or async.
+
+    Returns:
+        Dict[str, float]: Seconds spent per stage; failed stages are included.
+    """
+    timings = {}
+    total_started = time.perf_counter()
+    for name, stage in stages:
+        started = time.perf_counter()
+        try:
+            result = stage()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning("Warm-up stage %s failed: %s", name, e)
+        timings[name] = time.perf_counter() - started
+        logger.info("Warm-up stage %s took %.3fs", name, timings[name])
+    logger.info("Warm-up finished in %.3fs", time.perf_counter() - total_started)
+    return timings
@@ -0,0 +1,59 @@
+"""Session TTL archival: which sessions count as having a lead."""
+
+import datetime
+
+import pytest
+from google.adk.events import Event, EventActions
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.database_session_service import StorageSession
+from google.genai import types
+from sqlalchemy import create_engine, update
+
+from conftest import load
+
+archival = load("sessions.archival")
+
+APP = "telegram_customer_service_app"
+
+
+def _lead_response(status: str) -> Event:
+    response = types.FunctionResponse(
+        name="send_lead_to_backend", response={"status": status, "lead_id": 7}
+    )
+    return Event(
+        author="agent",
+        invocation_id="e-1",
+        content=types.Content(role="user", parts=[types.Part(function_response=response)]),
+    )
+
+
+@pytest.mark.asyncio
+async def test_sessions_with_a_lead_are_kept(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'sessions.db'}"
+    service = DatabaseSessionService(db_url=db_url)
+    events = {
+        # Written before lead_id was kept in state: only the tool response shows the lead.
+        "legacy-lead": [_lead_response("success")],
+        "state-lead": [Event(author="agent", actions=EventActions(state_delta={"lead_id": 7}))],
+        "failed-lead": [_lead_response("error")],
+        "no-lead": [Event(author="user", content=types.Content(role="user", parts=[types.Part(text="Привет")]))],
+    }
+    for session_id, session_events in events.items():
+        session = await service.create_session(app_name=APP, user_id="u", session_id=session_id)
+        for event in session_events:
+            await service.append_event(session, event)
+
+    engine = create_engine(db_url)
+    archiver = archival.SessionArchiver(engine, str(tmp_path / "archive"))
+    long_ago = datetime.datetime(2020, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(update(StorageSession.__table__).values(update_time=long_ago))
+
+    stats = archiver.archive({APP: 30})
+
+    assert stats.sessions_scanned == 4
+    assert stats.sessions_kept_with_lead == 2
+    assert stats.sessions_archived == 2
+    remaining = await service.list_sessions(app_name=APP, user_id="u")
+    assert sorted(session.id for session in remaining.sessions) == ["legacy-lead", "state-lead"]
+    assert sorted(archiver.restore(APP, "u")) == ["failed-lead", "no-lead"]
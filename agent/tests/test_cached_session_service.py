@@ -0,0 +1,119 @@
+"""CachedSessionService in front of a SQLite DatabaseSessionService."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from google.adk.events import Event, EventActions
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.database_session_service import (
+    StorageAppState,
+    StorageSession,
+    StorageUserState,
+)
+from google.genai import types
+from sqlalchemy import update
+
+from conftest import load
+
+cached_session_service = load("sessions.cached_session_service")
+
+APP = "app"
+
+
+def _event(text: str, **state) -> Event:
+    return Event(
+        author="user",
+        invocation_id="inv",
+        content=types.Content(role="user", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state),
+    )
+
+
+@pytest.fixture
+def database(tmp_path):
+    return DatabaseSessionService(db_url=f"sqlite:///{tmp_path / 'sessions.db'}")
+
+
+@pytest.fixture
+def loads(database, monkeypatch):
+    """Counts full loads from the database."""
+    calls = []
+    get_session = database.get_session
+
+    async def counting(**kwargs):
+        calls.append(kwargs["session_id"])
+        return await get_session(**kwargs)
+
+    monkeypatch.setattr(database, "get_session", counting)
+    return calls
+
+
+def _behind_the_cache(table, **where):
+    # Another replica's write. SQLite's update_time has whole seconds, so the
+    # new time is set explicitly rather than left to CURRENT_TIMESTAMP.
+    later = datetime.utcnow() + timedelta(minutes=1)
+    conditions = [getattr(table, column) == value for column, value in where.items()]
+    return update(table).where(*conditions).values(state={"changed": True}, update_time=later)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "statement, key",
+    [
+        (_behind_the_cache(StorageSession, app_name=APP, user_id="u", id="s"), "changed"),
+        (_behind_the_cache(StorageAppState, app_name=APP), "app:changed"),
+        (_behind_the_cache(StorageUserState, app_name=APP, user_id="u"), "user:changed"),
+    ],
+    ids=["session", "app_state", "user_state"],
+)
+async def test_session_changed_behind_the_cache_is_reloaded(database, loads, statement, key):
+    service = cached_session_service.CachedSessionService(database)
+    await service.create_session(app_name=APP, user_id="u", session_id="s")
+
+    await service.get_session(app_name=APP, user_id="u", session_id="s")
+    cached = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert loads == ["s"]
+    assert key not in cached.state
+
+    with database.db_engine.begin() as connection:
+        connection.execute(statement)
+
+    reloaded = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert loads == ["s", "s"]
+    assert reloaded.state[key] is True
+
+
+@pytest.mark.asyncio
+async def test_appended_event_is_served_from_the_cache(database, loads):
+    service = cached_session_service.CachedSessionService(database)
+    await service.create_session(app_name=APP, user_id="u", session_id="s")
+    session = await service.get_session(app_name=APP, user_id="u", session_id="s")
+
+    await service.append_event(session, _event("hello", step=1))
+
+    cached = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert loads == ["s"]
+    assert [event.content.parts[0].text for event in cached.events] == ["hello"]
+    assert cached.state["step"] == 1
+    assert cached.last_update_time == session.last_update_time
+
+    # Callers get copies: changing one leaves the cached session intact.
+    cached.state["step"] = 2
+    cached.events.clear()
+    again = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert again.state["step"] == 1
+    assert len(again.events) == 1
+
+
+@pytest.mark.asyncio
+async def test_app_state_delta_drops_the_entry(database, loads):
+    service = cached_session_service.CachedSessionService(database)
+    await service.create_session(app_name=APP, user_id="u", session_id="s")
+    session = await service.get_session(app_name=APP, user_id="u", session_id="s")
+
+    await service.append_event(session, _event("hello", **{"app:mode": "sale"}))
+
+    loaded = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert loads == ["s", "s"]
+    assert loaded.state["app:mode"] == "sale"
+    assert len(loaded.events) == 1
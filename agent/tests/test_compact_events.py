@@ -0,0 +1,104 @@
+"""EventCodec and CompactEventSessionService on SQLite."""
+
+import pytest
+from google.adk.events import Event, EventActions
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from conftest import load
+
+compact_events = load("sessions.compact_events")
+group_commit = load("sessions.group_commit")
+
+APP = "app"
+
+PAYLOADS = {
+    "content": types.Content(
+        role="model",
+        parts=[
+            types.Part(text="Здравствуйте! Чем могу помочь?"),
+            types.Part(function_call=types.FunctionCall(name="search_faq", args={"q": "доставка"})),
+        ],
+    ),
+    "grounding_metadata": types.GroundingMetadata(
+        web_search_queries=["доставка по Москве"],
+        grounding_chunks=[
+            types.GroundingChunk(web=types.GroundingChunkWeb(uri="https://example.com", title="FAQ"))
+        ],
+    ),
+    "usage_metadata": types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=1200, candidates_token_count=85, total_token_count=1285
+    ),
+    "citation_metadata": types.CitationMetadata(
+        citations=[types.Citation(start_index=0, end_index=12, uri="https://example.com")]
+    ),
+}
+
+
+def _event(**fields) -> Event:
+    return Event(author="agent", invocation_id="inv", **fields)
+
+
+def _dump(events):
+    # ADK's event row turns a missing long_running_tool_ids into an empty set.
+    return [event.model_dump(exclude={"long_running_tool_ids"}) for event in events]
+
+
+@pytest.mark.parametrize("name", sorted(compact_events.PAYLOAD_FIELDS))
+def test_codec_round_trip(name):
+    assert name in PAYLOADS
+    codec = compact_events.EventCodec()
+    payload = codec.encode(_event(**{name: PAYLOADS[name]}))
+
+    assert payload[0] == compact_events.FORMAT_MSGPACK_ZSTD
+    assert codec.decode(payload) == {name: PAYLOADS[name]}
+
+
+def test_codec_skips_events_without_payload():
+    codec = compact_events.EventCodec()
+    assert codec.encode(_event(actions=EventActions(state_delta={"a": 1}))) is None
+
+
+def test_codec_rejects_unknown_format():
+    codec = compact_events.EventCodec()
+    payload = codec.encode(_event(content=PAYLOADS["content"]))
+
+    with pytest.raises(ValueError, match="Unknown event payload format 7"):
+        codec.decode(bytes([7]) + payload[1:])
+
+
+@pytest.fixture
+def database(tmp_path):
+    return DatabaseSessionService(db_url=f"sqlite:///{tmp_path / 'sessions.db'}")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("buffered", [False, True], ids=["direct", "group_commit"])
+async def test_session_round_trip(database, buffered):
+    inner = group_commit.GroupCommitSessionService(database) if buffered else database
+    service = compact_events.CompactEventSessionService(inner)
+    session = await service.create_session(app_name=APP, user_id="u", session_id="s")
+
+    appended = [
+        _event(
+            content=types.Content(role="user", parts=[types.Part(text="Сколько стоит доставка?")]),
+            actions=EventActions(state_delta={"turns": 1}),
+        ),
+        _event(**PAYLOADS),
+        _event(actions=EventActions(state_delta={"turns": 2})),
+    ]
+    for event in appended:
+        assert await service.append_event(session, event) is event
+    assert session.events == appended
+    await service.flush(session)
+
+    # The event rows carry no content; it comes from the payloads.
+    stored = await database.get_session(app_name=APP, user_id="u", session_id="s")
+    assert [event.content for event in stored.events] == [None, None, None]
+
+    loaded = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert _dump(loaded.events) == _dump(appended)
+    assert loaded.state["turns"] == 2
+
+    await service.delete_session(app_name=APP, user_id="u", session_id="s")
+    assert await service.get_session(app_name=APP, user_id="u", session_id="s") is None
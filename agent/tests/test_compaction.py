@@ -0,0 +1,50 @@
+"""SessionCompactor on SQLite."""
+
+import pytest
+from google.adk.events import Event
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from conftest import load
+
+compaction = load("sessions.compaction")
+
+APP = "app"
+
+
+@pytest.fixture
+def database(tmp_path):
+    return DatabaseSessionService(db_url=f"sqlite:///{tmp_path / 'sessions.db'}")
+
+
+async def _session(database, invocations):
+    session = await database.create_session(app_name=APP, user_id="u", session_id="s")
+    ids = []
+    for invocation_id, text in invocations:
+        event = Event(
+            author="user",
+            invocation_id=invocation_id,
+            content=types.Content(role="user", parts=[types.Part(text=text)]),
+        )
+        await database.append_event(session, event)
+        ids.append(event.id)
+    return ids
+
+
+def test_keep_must_leave_an_event(database):
+    with pytest.raises(ValueError, match="keep must be at least 1"):
+        compaction.SessionCompactor(database.db_engine, keep=0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("keep, removed", [(1, 3), (2, 1), (3, 1), (4, 0), (10, 0)])
+async def test_old_events_end_at_an_invocation_boundary(database, keep, removed):
+    ids = await _session(
+        database, [("e-1", "a"), ("e-2", "b"), ("e-2", "c"), ("e-3", "d")]
+    )
+    compactor = compaction.SessionCompactor(database.db_engine, keep=keep, archive=False)
+
+    with database.db_engine.connect() as connection:
+        old = compactor._old_event_ids(connection, APP, "u", "s")
+
+    assert old == ids[:removed]
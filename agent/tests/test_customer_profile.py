@@ -0,0 +1,43 @@
+"""Customer profile parsing and validation."""
+
+import json
+
+import pytest
+
+from conftest import load
+
+customer_profile = load("shared_libraries.customer_profile")
+validators = load("shared_libraries.validators")
+
+
+def test_rewritten_json_profile_is_parsed_again():
+    state = {"customer_profile": json.dumps({"customer_id": "c-1"})}
+    assert customer_profile.get_customer_profile(state)["customer_id"] == "c-1"
+
+    state["customer_profile"] = json.dumps({"customer_id": "c-2"})
+    assert customer_profile.get_customer_profile(state)["customer_id"] == "c-2"
+
+
+def test_memoized_profile_is_read_only():
+    state = {"customer_profile": json.dumps({"customer_id": "c-3"})}
+    first = customer_profile.get_customer_profile(state)
+    with pytest.raises(TypeError):
+        first["customer_id"] = "changed"
+
+    assert customer_profile.get_customer_profile(state) is first
+    assert dict(first) == {"customer_id": "c-3"}
+
+
+@pytest.mark.parametrize("profile", ["{not json", "[1, 2]", 42])
+def test_invalid_profile(profile):
+    with pytest.raises(ValueError):
+        customer_profile.get_customer_profile({"customer_profile": profile})
+
+
+def test_validate_customer_id():
+    state = {"customer_profile": {"customer_id": "c-1"}}
+    assert validators.validate_customer_id("c-1", state) == (True, "")
+    valid, error = validators.validate_customer_id("c-2", state)
+    assert not valid and "c-1" in error
+    assert not validators.validate_customer_id("c-1", {})[0]
+    assert not validators.validate_customer_id("c-1", {"customer_profile": "{"})[0]
@@ -0,0 +1,45 @@
+"""FAQ index builds and staleness."""
+
+import json
+import os
+
+from conftest import load
+
+faq_index = load("services.faq_index")
+
+ENTRIES = [
+    {"question": "Можно ли нанести логотип на ручки?", "answer": "Да, гравировкой или печатью."},
+    {"question": "Сколько стоит доставка?", "answer": "По Москве доставка бесплатная."},
+]
+
+
+def _write_faq(path) -> str:
+    path.write_text("\n".join(json.dumps(entry, ensure_ascii=False) for entry in ENTRIES), "utf-8")
+    return str(path)
+
+
+def test_build_replaces_index_in_place(tmp_path):
+    index_dir = tmp_path / "faq_index"
+    faq_index.build_faq_index(ENTRIES[:1], str(index_dir), dim=64)
+    faq_index.build_faq_index(ENTRIES, str(index_dir), dim=64)
+
+    # Only the index itself is left; the build directory is gone.
+    assert os.listdir(tmp_path) == ["faq_index"]
+    index = faq_index.FaqIndex(str(index_dir))
+    assert len(index) == 2
+    score, snippet = index.search("логотип на ручках", top_k=1)[0]
+    assert "логотип" in snippet and score > 0
+
+
+def test_index_is_stale_when_dim_changes(tmp_path):
+    faq_path = _write_faq(tmp_path / "faq.jsonl")
+    index_dir = str(tmp_path / "faq_index")
+    assert faq_index._index_is_stale(faq_path, index_dir, 64)
+
+    faq_index.build_faq_index(faq_index.load_faq_entries(faq_path), index_dir, dim=64)
+    assert not faq_index._index_is_stale(faq_path, index_dir, 64)
+    assert faq_index._index_is_stale(faq_path, index_dir, 128)
+
+    later = os.path.getmtime(os.path.join(index_dir, "meta.json")) + 10
+    os.utime(faq_path, (later, later))
+    assert faq_index._index_is_stale(faq_path, index_dir, 64)
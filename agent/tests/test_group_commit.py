@@ -0,0 +1,149 @@
+"""Group commit of session event appends on SQLite."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.events import Event, EventActions
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+from sqlalchemy import event as sqlalchemy_event
+
+from conftest import load
+
+async_database_session_service = load("sessions.async_database_session_service")
+group_commit = load("sessions.group_commit")
+
+APP = "app"
+
+
+def _event(text: str, **state) -> Event:
+    return Event(
+        author="agent",
+        invocation_id="e-1",
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state),
+    )
+
+
+def _count_commits(engine) -> list:
+    commits = [0]
+
+    def on_commit(connection):
+        commits[0] += 1
+
+    sqlalchemy_event.listen(getattr(engine, "sync_engine", engine), "commit", on_commit)
+    return commits
+
+
+async def _stored(service, session) -> list:
+    # Reads the database directly, past the buffer.
+    stored = await service.inner.get_session(
+        app_name=session.app_name, user_id=session.user_id, session_id=session.id
+    )
+    return [event.content.parts[0].text for event in stored.events]
+
+
+@pytest.fixture
+def database(tmp_path):
+    return DatabaseSessionService(db_url=f"sqlite:///{tmp_path / 'sessions.db'}")
+
+
+@pytest.mark.asyncio
+async def test_flush_at_invocation_end(database):
+    service = group_commit.GroupCommitSessionService(database)
+    session = await service.create_session(app_name=APP, user_id="u", session_id="s")
+    commits = _count_commits(database.db_engine)
+
+    for text in ("call", "response", "reply"):
+        await service.append_event(session, _event(text, turns=1))
+    assert await _stored(service, session) == []
+
+    plugin = group_commit.SessionFlushPlugin()
+    context = SimpleNamespace(session_service=service, session=session)
+    await plugin.after_run_callback(invocation_context=context)
+
+    assert commits[0] == 1
+    assert await _stored(service, session) == ["call", "response", "reply"]
+    stored = await database.get_session(app_name=APP, user_id="u", session_id="s")
+    assert stored.state["turns"] == 1
+    assert session.last_update_time == stored.last_update_time
+
+
+@pytest.mark.asyncio
+async def test_flush_on_max_events(database):
+    service = group_commit.GroupCommitSessionService(database, max_events=2)
+    session = await service.create_session(app_name=APP, user_id="u", session_id="s")
+
+    await service.append_event(session, _event("one"))
+    assert await _stored(service, session) == []
+    await service.append_event(session, _event("two"))
+    assert await _stored(service, session) == ["one", "two"]
+    await service.append_event(session, _event("three"))
+    assert await _stored(service, session) == ["one", "two"]
+
+
+@pytest.mark.asyncio
+async def test_flush_after_max_delay(database):
+    service = group_commit.GroupCommitSessionService(database, max_delay_secs=0.05)
+    session = await service.create_session(app_name=APP, user_id="u", session_id="s")
+
+    # The invocation never reaches its end callback.
+    await service.append_event(session, _event("orphan"))
+    await asyncio.sleep(0.2)
+
+    assert await _stored(service, session) == ["orphan"]
+    assert not service._buffers
+
+
+@pytest.mark.asyncio
+async def test_reads_see_buffered_events(database):
+    service = group_commit.GroupCommitSessionService(database)
+    session = await service.create_session(app_name=APP, user_id="u", session_id="s")
+    await service.append_event(session, _event("hello", step=1))
+
+    read = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert [event.content.parts[0].text for event in read.events] == ["hello"]
+    assert read.state["step"] == 1
+
+    await service.append_event(session, _event("again"))
+    listed = await service.list_sessions(app_name=APP, user_id="u")
+    assert [item.id for item in listed.sessions] == ["s"]
+    assert await _stored(service, session) == ["hello", "again"]
+
+
+@pytest.mark.asyncio
+async def test_window_shares_one_transaction(tmp_path):
+    database = async_database_session_service.AsyncDatabaseSessionService(
+        f"sqlite+aiosqlite:///{tmp_path / 'sessions.db'}"
+    )
+    service = group_commit.GroupCommitSessionService(database, window_ms=20, min_sessions=1)
+    sessions = [
+        await service.create_session(app_name=APP, user_id=f"u{n}", session_id=f"s{n}")
+        for n in range(3)
+    ]
+    commits = _count_commits(database.db_engine)
+    for n, session in enumerate(sessions):
+        await service.append_event(session, _event(f"reply {n}"))
+
+    await asyncio.gather(*(service.flush(session) for session in sessions))
+
+    assert commits[0] == 1
+    for n, session in enumerate(sessions):
+        assert await _stored(service, session) == [f"reply {n}"]
+    await database.db_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_flushes_every_session(database):
+    service = group_commit.GroupCommitSessionService(database)
+    first = await service.create_session(app_name=APP, user_id="u", session_id="a")
+    second = await service.create_session(app_name=APP, user_id="v", session_id="b")
+    await service.append_event(first, _event("first"))
+    await service.append_event(second, _event("second"))
+
+    await service.flush_all()
+
+    assert await _stored(service, first) == ["first"]
+    assert await _stored(service, second) == ["second"]
+    assert not service._buffers
@@ -0,0 +1,32 @@
+"""Per-invocation guard: repeated tool calls and budgets."""
+
+from conftest import load
+
+guards = load("shared_libraries.guards")
+
+ARGS = {"lead_data": {"name": "Иван", "phone": "+79991234567"}}
+
+
+def test_repeated_call_reuses_success():
+    guard = guards.InvocationGuard(max_model_calls=5, max_tool_calls=5)
+    assert guard.check_tool_call("e-1", "send_lead_to_backend", ARGS) is None
+    guard.record_tool_result("e-1", "send_lead_to_backend", ARGS, {"status": "success", "lead_id": 7})
+
+    response = guard.check_tool_call("e-1", "send_lead_to_backend", dict(ARGS))
+    assert response == {"status": "success", "lead_id": 7}
+    assert guard.check_tool_call("e-2", "send_lead_to_backend", ARGS) is None
+
+
+def test_repeated_call_after_error_runs_again():
+    guard = guards.InvocationGuard(max_model_calls=5, max_tool_calls=5)
+    assert guard.check_tool_call("e-1", "send_lead_to_backend", ARGS) is None
+    guard.record_tool_result("e-1", "send_lead_to_backend", ARGS, {"status": "error", "message": "HTTP 502"})
+
+    assert guard.check_tool_call("e-1", "send_lead_to_backend", ARGS) is None
+
+
+def test_tool_budget():
+    guard = guards.InvocationGuard(max_model_calls=5, max_tool_calls=1)
+    assert guard.check_tool_call("e-1", "find_product", {"q": "ручки"}) is None
+    response = guard.check_tool_call("e-1", "find_product", {"q": "кружки"})
+    assert response["status"] == "error"
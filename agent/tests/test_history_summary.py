@@ -0,0 +1,76 @@
+"""History summary of compacted sessions and its injection into the instruction."""
+
+from types import SimpleNamespace
+
+from google.adk.events import Event
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from conftest import load
+
+callbacks = load("shared_libraries.callbacks")
+history_summary = load("shared_libraries.history_summary")
+
+
+def _message(author: str, text: str, timestamp: float) -> Event:
+    role = "user" if author == "user" else "model"
+    return Event(
+        author=author,
+        timestamp=timestamp,
+        content=types.Content(role=role, parts=[types.Part(text=text)]),
+    )
+
+
+def _tool_call(timestamp: float) -> Event:
+    call = types.FunctionCall(name="send_lead_to_backend", args={"name": "Иван"})
+    return Event(
+        author="agent",
+        timestamp=timestamp,
+        content=types.Content(role="model", parts=[types.Part(function_call=call)]),
+    )
+
+
+def test_fold_keeps_the_last_messages():
+    first = history_summary.fold_summary(
+        None,
+        [_message("user", f"Вопрос {n}", 1_700_000_000 + n) for n in range(8)],
+    )
+    summary = history_summary.fold_summary(
+        first,
+        [
+            _message("agent", "Ручки с гравировкой   от 100 шт.", 1_700_000_100),
+            _tool_call(1_700_000_101),
+            _message("user", "Я" * 500, 1_700_000_102),
+        ],
+    )
+
+    assert summary["events"] == 11
+    assert summary["user_messages"] == 9
+    assert summary["tool_calls"] == {"send_lead_to_backend": 1}
+    assert summary["first_timestamp"] == 1_700_000_000
+    excerpts = summary["excerpts"]
+    assert len(excerpts) == history_summary.MAX_EXCERPTS
+    assert excerpts[0] == {"author": "user", "text": "Вопрос 0"}
+    assert excerpts[-2] == {"author": "agent", "text": "Ручки с гравировкой от 100 шт."}
+    assert len(excerpts[-1]["text"]) == history_summary.MAX_EXCERPT_CHARS
+
+
+def test_summary_is_added_to_the_instruction():
+    summary = history_summary.fold_summary(
+        None, [_message("user", "Нужны кружки с логотипом", 1_700_000_000), _tool_call(1_700_000_001)]
+    )
+    context = SimpleNamespace(state={history_summary.HISTORY_SUMMARY_KEY: summary})
+    request = LlmRequest(config=types.GenerateContentConfig(system_instruction="Инструкция"))
+    callbacks.inject_history_summary(context, request)
+
+    instruction = request.config.system_instruction
+    assert instruction.startswith("Инструкция")
+    assert "**РАНЕЕ В ДИАЛОГЕ**" in instruction
+    assert "send_lead_to_backend ×1" in instruction
+    assert "- Клиент: Нужны кружки с логотипом" in instruction
+
+
+def test_no_summary_leaves_the_instruction_alone():
+    request = LlmRequest(config=types.GenerateContentConfig(system_instruction="Инструкция"))
+    callbacks.inject_history_summary(SimpleNamespace(state={}), request)
+    assert request.config.system_instruction == "Инструкция"
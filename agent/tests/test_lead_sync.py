@@ -0,0 +1,62 @@
+"""Diff-based lead writes: skipped, patched and recreated leads."""
+
+import pytest
+
+from conftest import load
+
+lead_sync = load("shared_libraries.lead_sync")
+
+LEAD = {"name": "Иван", "phone": "+7 999 123-45-67", "company": "Ромашка"}
+
+
+@pytest.fixture
+def patches(monkeypatch):
+    sent = []
+
+    def update_lead_fields(lead_id, fields):
+        sent.append((lead_id, fields))
+        return {"status": "success", "lead_id": lead_id}
+
+    monkeypatch.setattr(lead_sync, "update_lead_fields", update_lead_fields)
+    return sent
+
+
+def _created(lead_data) -> dict:
+    state = {}
+    args = {"lead_data": lead_data}
+    assert lead_sync.before_lead_write(args, state) is None
+    lead_sync.after_lead_write(args, state, {"status": "success", "lead_data": {"id": 7}})
+    return state
+
+
+def test_unchanged_lead_is_skipped(patches):
+    state = _created(LEAD)
+    response = lead_sync.before_lead_write({"lead_data": dict(LEAD)}, state)
+    assert response["status"] == "success"
+    assert response["lead_id"] == 7
+    assert patches == []
+
+
+def test_changed_and_removed_fields_are_patched(patches):
+    state = _created(LEAD)
+    lead_data = {"name": "Иван", "phone": LEAD["phone"], "email": "ivan@example.com"}
+    response = lead_sync.before_lead_write({"lead_data": lead_data}, state)
+    assert response["status"] == "success"
+    assert patches == [(7, {"email": "ivan@example.com", "company": None})]
+
+
+def test_missing_lead_is_created_again(monkeypatch):
+    monkeypatch.setattr(
+        lead_sync,
+        "update_lead_fields",
+        lambda lead_id, fields: {"status": "error", "status_code": 404},
+    )
+    state = _created(LEAD)
+    args = {"lead_data": dict(LEAD, company="Лютик")}
+    assert lead_sync.before_lead_write(args, state) is None
+    assert state[lead_sync.LEAD_ID_KEY] is None
+    assert state[lead_sync.LEAD_SNAPSHOT_KEY] is None
+
+    lead_sync.after_lead_write(args, state, {"status": "success", "lead_data": {"id": 8}})
+    assert state[lead_sync.LEAD_ID_KEY] == 8
+    assert state[lead_sync.LEAD_SNAPSHOT_KEY]["company"] == "Лютик"
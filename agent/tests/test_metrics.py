@@ -0,0 +1,109 @@
+"""Agent metrics: active session tracking and merging across workers."""
+
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import load
+
+callbacks = load("shared_libraries.callbacks")
+metrics = load("shared_libraries.metrics")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(callbacks, "time", SimpleNamespace(time=lambda: now[0]))
+    monkeypatch.setattr(callbacks, "_session_last_seen", {})
+    return now
+
+
+def _turn(session_id: str) -> None:
+    context = SimpleNamespace(invocation_id=f"e-{session_id}", session=SimpleNamespace(id=session_id))
+    callbacks.start_turn_timer(context)
+    callbacks.record_turn_metrics(context)
+
+
+def test_expired_sessions_are_pruned_on_write(clock):
+    for session_id in ("s-1", "s-2", "s-3"):
+        _turn(session_id)
+    clock[0] += callbacks.ACTIVE_SESSION_WINDOW_SECS - 1
+    _turn("s-1")
+    clock[0] += 2
+    _turn("s-4")
+
+    # Never scraped, yet only sessions seen within the window are kept.
+    assert list(callbacks._session_last_seen) == ["s-1", "s-4"]
+    assert callbacks._active_sessions() == 2
+
+
+def test_active_sessions_are_read_safely_from_other_threads(monkeypatch):
+    monkeypatch.setattr(callbacks, "_session_last_seen", {})
+    monkeypatch.setattr(callbacks, "ACTIVE_SESSION_WINDOW_SECS", 0.001)
+    errors = []
+    done = threading.Event()
+
+    def scrape():
+        try:
+            while not done.is_set():
+                callbacks._active_sessions()
+        except Exception as e:  # pragma: no cover - the failure being tested
+            errors.append(e)
+
+    scrapers = [threading.Thread(target=scrape) for _ in range(4)]
+    for thread in scrapers:
+        thread.start()
+    for n in range(20000):
+        callbacks._touch_session(f"s-{n % 500}")
+    done.set()
+    for thread in scrapers:
+        thread.join()
+
+    assert errors == []
+
+
+
+def _worker_export(monkeypatch, requests: int, in_flight: int, latency: float) -> dict:
+    # What another worker process publishes, from a registry of its own.
+    monkeypatch.setattr(metrics, "_registry", {})
+    metrics.counter("test_requests_total", "Requests", ("route",)).inc(requests, route="/run")
+    metrics.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0)).observe(latency)
+    metrics.gauge("test_in_flight", "In flight", lambda: in_flight)
+    return metrics.export()
+
+
+def test_merge_sums_workers_and_drops_gauges_of_exited_ones(monkeypatch):
+    merged = metrics.merge([
+        (_worker_export(monkeypatch, requests=3, in_flight=2, latency=0.05), True),
+        (_worker_export(monkeypatch, requests=4, in_flight=5, latency=0.5), False),
+    ])
+    text = metrics.render_prometheus(merged)
+
+    assert 'test_requests_total{route="/run"} 7' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+    assert "test_latency_seconds_count 2" in text
+    assert "test_in_flight 2" in text
+
+
+def test_scrapes_see_every_worker(monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics, "_registry", {})
+    requests = metrics.counter("test_multiprocess_requests_total", "Requests")
+    requests.inc(2)
+    metrics.reset_multiprocess_dir(str(tmp_path))
+    # An earlier worker that has exited (no such pid) and a live sibling.
+    (tmp_path / "999999999-1.json").write_text(
+        '{"test_multiprocess_requests_total": {"kind": "counter", "help": "Requests",'
+        ' "labels": [], "values": [[[], 5]]}}'
+    )
+    sibling = metrics.MultiprocessMetrics(str(tmp_path))
+    sibling.path = str(tmp_path / f"{os.getpid()}-2.json")
+    sibling.publish()
+
+    worker = metrics.MultiprocessMetrics(str(tmp_path))
+    assert "test_multiprocess_requests_total 9" in worker.render()
+
+    metrics.reset_multiprocess_dir(str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,126 @@
+"""RedisSessionService and its snapshots against fakeredis."""
+
+import fakeredis
+import pytest
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event, EventActions
+from google.genai import types
+from sqlalchemy import create_engine
+
+from conftest import load
+
+redis_session_service = load("sessions.redis_session_service")
+session_snapshots = load("sessions.session_snapshots")
+
+APP = "app"
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def service(server):
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    return redis_session_service.RedisSessionService(
+        "redis://fake", max_events=3, client=client
+    )
+
+
+def _event(text: str, state_delta=None) -> Event:
+    return Event(
+        author="user",
+        invocation_id="inv",
+        content=types.Content(role="user", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta or {}),
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_and_duplicate(service):
+    session = await service.create_session(
+        app_name=APP, user_id="u", session_id="s", state={"a": 1, "app:b": 2, "user:c": 3}
+    )
+    assert session.state == {"a": 1, "app:b": 2, "user:c": 3}
+
+    with pytest.raises(AlreadyExistsError):
+        await service.create_session(app_name=APP, user_id="u", session_id="s")
+
+    loaded = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert loaded.state == session.state
+    assert loaded.last_update_time == session.last_update_time
+
+
+@pytest.mark.asyncio
+async def test_append_caps_events_and_applies_state(service):
+    session = await service.create_session(app_name=APP, user_id="u", session_id="s")
+    for i in range(5):
+        await service.append_event(
+            session,
+            _event(f"m{i}", {"turn": i, "app:seen": i, "user:name": "Иван", "temp:x": 1}),
+        )
+
+    loaded = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert [event.content.parts[0].text for event in loaded.events] == ["m2", "m3", "m4"]
+    assert loaded.state == {"turn": 4, "app:seen": 4, "user:name": "Иван"}
+    assert loaded.last_update_time == session.last_update_time
+
+    other = await service.create_session(app_name=APP, user_id="u", session_id="other")
+    assert other.state == {"app:seen": 4, "user:name": "Иван"}
+
+
+@pytest.mark.asyncio
+async def test_stale_session(service):
+    session = await service.create_session(app_name=APP, user_id="u", session_id="s")
+    stale = session.model_copy(deep=True)
+    await service.append_event(session, _event("first"))
+
+    with pytest.raises(ValueError, match="stale session"):
+        await service.append_event(stale, _event("second"))
+    loaded = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert len(loaded.events) == 1
+
+
+@pytest.mark.asyncio
+async def test_list_and_delete(service):
+    await service.create_session(app_name=APP, user_id="u1", session_id="a", state={"k": 1})
+    await service.create_session(app_name=APP, user_id="u1", session_id="b")
+    await service.create_session(app_name=APP, user_id="u2", session_id="c")
+
+    listed = await service.list_sessions(app_name=APP, user_id="u1")
+    assert sorted(session.id for session in listed.sessions) == ["a", "b"]
+    assert {session.id: session.state for session in listed.sessions}["a"] == {"k": 1}
+    everyone = await service.list_sessions(app_name=APP)
+    assert sorted(session.id for session in everyone.sessions) == ["a", "b", "c"]
+
+    await service.delete_session(app_name=APP, user_id="u1", session_id="a")
+    assert await service.get_session(app_name=APP, user_id="u1", session_id="a") is None
+    listed = await service.list_sessions(app_name=APP, user_id="u1")
+    assert [session.id for session in listed.sessions] == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_and_restore_after_flushall(service, server, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'snapshots.db'}")
+    service.snapshots = session_snapshots.SessionSnapshotter(
+        service, engine, client=fakeredis.FakeRedis(server=server, decode_responses=True)
+    )
+    session = await service.create_session(app_name=APP, user_id="u", session_id="s")
+    await service.append_event(session, _event("привет", {"lead": "draft"}))
+    await service.append_event(session, _event("ещё"))
+
+    assert service.snapshots.snapshot_dirty() == 1
+    assert service.snapshots.snapshot_dirty() == 0
+    await service.client.flushall()
+
+    restored = await service.get_session(app_name=APP, user_id="u", session_id="s")
+    assert [event.content.parts[0].text for event in restored.events] == ["привет", "ещё"]
+    assert restored.state == {"lead": "draft"}
+    assert restored.last_update_time == pytest.approx(session.last_update_time)
+    # The restored session accepts appends from the session it was saved from.
+    await service.append_event(session, _event("дальше"))
+
+    await service.delete_session(app_name=APP, user_id="u", session_id="s")
+    assert service.snapshots.load(APP, "u", "s") is None
+    assert await service.get_session(app_name=APP, user_id="u", session_id="s") is None
@@ -0,0 +1,91 @@
+"""Token usage aggregation, its bound and top_usage on SQLite."""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+
+from conftest import load
+
+token_usage = load("services.token_usage")
+
+
+def _aggregator(monkeypatch, db_url: str, max_pending: int = 1000):
+    aggregator = token_usage.TokenUsageAggregator(create_engine(db_url), max_pending=max_pending)
+    # Flushes are driven by the tests, not the background thread.
+    monkeypatch.setattr(aggregator, "_start", lambda: None)
+    return aggregator
+
+
+def test_flushes_accumulate_in_one_row(tmp_path, monkeypatch):
+    engine_url = f"sqlite:///{tmp_path / 'usage.db'}"
+    aggregator = _aggregator(monkeypatch, engine_url)
+
+    aggregator.record("app", "u-1", "s-1", prompt_tokens=100, cached_tokens=40, output_tokens=10)
+    aggregator.record("app", "u-1", "s-1", prompt_tokens=50, cached_tokens=0, output_tokens=5)
+    aggregator.record("app", "u-2", "s-2", prompt_tokens=10, cached_tokens=0, output_tokens=1)
+    assert aggregator.flush() == 2
+    aggregator.record("app", "u-1", "s-1", prompt_tokens=200, cached_tokens=100, output_tokens=20)
+    assert aggregator.flush() == 1
+    assert aggregator.flush() == 0
+
+    engine = create_engine(engine_url)
+    top = token_usage.top_usage(engine, by="session")
+    assert [(row["session_id"], row["model_calls"]) for row in top] == [("s-1", 3), ("s-2", 1)]
+    assert top[0]["prompt_tokens"] == 350
+    assert top[0]["cached_tokens"] == 140
+    assert top[0]["output_tokens"] == 35
+    assert top[0]["total_tokens"] == 385
+
+    (day,) = token_usage.top_usage(engine, by="day")
+    assert day["model_calls"] == 4
+    assert day["total_tokens"] == 385 + 11
+    assert token_usage.top_usage(engine, by="user", limit=1)[0]["user_id"] == "u-1"
+
+
+def test_failed_flush_is_retried(tmp_path, monkeypatch):
+    # The database directory is missing until the second flush.
+    directory = tmp_path / "db"
+    aggregator = _aggregator(monkeypatch, f"sqlite:///{directory / 'usage.db'}")
+
+    aggregator.record("app", "u", "s", prompt_tokens=100, cached_tokens=0, output_tokens=10)
+    assert aggregator.flush() == 0
+    aggregator.record("app", "u", "s", prompt_tokens=50, cached_tokens=0, output_tokens=5)
+
+    directory.mkdir()
+    assert aggregator.flush() == 1
+    (row,) = token_usage.top_usage(create_engine(f"sqlite:///{directory / 'usage.db'}"))
+    assert (row["model_calls"], row["prompt_tokens"], row["output_tokens"]) == (2, 150, 15)
+
+
+def test_pending_totals_are_bounded(tmp_path, monkeypatch):
+    aggregator = _aggregator(monkeypatch, f"sqlite:///{tmp_path / 'db' / 'usage.db'}", max_pending=2)
+    dropped = token_usage.dropped_calls.value()
+
+    for session_id in ("s-1", "s-2", "s-3"):
+        aggregator.record("app", "u", session_id, prompt_tokens=1, cached_tokens=0, output_tokens=1)
+    assert aggregator.flush() == 0
+
+    # Restored after the failure, still within the bound.
+    aggregator.record("app", "u", "s-4", prompt_tokens=1, cached_tokens=0, output_tokens=1)
+    aggregator.record("app", "u", "s-1", prompt_tokens=1, cached_tokens=0, output_tokens=1)
+    pending = {key[2]: totals for key, totals in aggregator._pending.items()}
+    assert sorted(pending) == ["s-1", "s-2"]
+    assert pending["s-1"][0] == 2
+    assert token_usage.dropped_calls.value() == dropped + 2
+
+
+@pytest.mark.parametrize(
+    "enabled, uri, expected",
+    [
+        (True, "postgresql+asyncpg://agent:secret@db/sessions", "postgresql://agent:secret@db/sessions"),
+        (True, "postgresql://agent@db/sessions", "postgresql://agent@db/sessions"),
+        (True, "sqlite+aiosqlite:///sessions.db", "sqlite:///sessions.db"),
+        (True, "redis://redis:6379/0", None),
+        (True, None, None),
+        (False, "postgresql://agent@db/sessions", None),
+    ],
+)
+def test_enabled_only_with_a_session_database(enabled, uri, expected):
+    config = SimpleNamespace(TOKEN_USAGE_ENABLED=enabled, SESSION_SERVICE_URI=uri)
+    assert token_usage.token_usage_db_url(config) == expected
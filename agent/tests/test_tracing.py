@@ -0,0 +1,135 @@
+"""OpenTelemetry export of the tracing callbacks and trace context propagation."""
+
+from types import SimpleNamespace
+
+import pytest
+import requests
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from google.adk.models import LlmRequest, LlmResponse
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from conftest import load
+
+auth_service = load("services.auth_service")
+callbacks = load("shared_libraries.callbacks")
+tracing = load("shared_libraries.tracing")
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_SPAN_ID = "00f067aa0ba902b7"
+TRACEPARENT = f"00-{TRACE_ID}-{PARENT_SPAN_ID}-01"
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def otel_tracer(exporter):
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return provider.get_tracer("test")
+
+
+@pytest.fixture
+def traced(monkeypatch, otel_tracer):
+    tracer = tracing.Tracer(sinks=[tracing.OtelSpanSink(otel_tracer)])
+    monkeypatch.setattr(callbacks, "_tracer", tracer)
+    return tracer
+
+
+def _run_turn() -> None:
+    # The callbacks of one turn, in the order ADK calls them.
+    invocation_id = "e-1"
+    context = SimpleNamespace(
+        invocation_id=invocation_id,
+        agent_name="telegram_customer_service_agent",
+        session=SimpleNamespace(id="s-1"),
+        user_content=None,
+    )
+    tool = SimpleNamespace(name="send_lead_to_backend")
+    tool_context = SimpleNamespace(invocation_id=invocation_id, function_call_id="call-1")
+
+    callbacks.before_agent(context)
+    callbacks.before_model_trace(context, LlmRequest(model="gemini-2.0-flash"))
+    callbacks.after_model_trace(context, LlmResponse())
+    callbacks._trace_tool_start(tool, {"name": "Иван"}, tool_context)
+    callbacks._trace_tool_end(tool, {"name": "Иван"}, tool_context, {"status": "success"})
+    callbacks.after_agent(context)
+
+
+def test_spans_join_incoming_traceparent(traced, exporter):
+    app = FastAPI()
+
+    @app.post("/run")
+    def run():
+        _run_turn()
+        return {"ok": True}
+
+    app.add_middleware(tracing.TraceContextMiddleware)
+    response = TestClient(app).post("/run", headers={"traceparent": TRACEPARENT})
+    assert response.status_code == 200
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert set(spans) == {"agent.invocation", "model.call", "tool.send_lead_to_backend"}
+    for span in spans.values():
+        assert format(span.context.trace_id, "032x") == TRACE_ID
+
+    agent = spans["agent.invocation"]
+    assert format(agent.parent.span_id, "016x") == PARENT_SPAN_ID
+    assert spans["model.call"].parent.span_id == agent.context.span_id
+    assert spans["tool.send_lead_to_backend"].parent.span_id == agent.context.span_id
+    assert spans["tool.send_lead_to_backend"].attributes["status"] == "success"
+
+
+def test_spans_without_traceparent_start_a_trace(traced, exporter):
+    _run_turn()
+
+    spans = exporter.get_finished_spans()
+    assert len({span.context.trace_id for span in spans}) == 1
+    agent = next(span for span in spans if span.name == "agent.invocation")
+    assert agent.parent is None
+
+
+def test_backend_requests_carry_traceparent(monkeypatch, otel_tracer):
+    service = auth_service.AuthService()
+    monkeypatch.setattr(service, "get_auth_headers", lambda: {"Authorization": "Bearer t"})
+    sent = {}
+
+    def request(method, url, **kwargs):
+        sent.update(kwargs["headers"])
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+    monkeypatch.setattr(service._http, "request", request)
+
+    with otel_tracer.start_as_current_span("tool.send_lead_to_backend") as span:
+        service.make_authenticated_request("POST", "/leads", json={})
+
+    _, trace_id, span_id, _ = sent["traceparent"].split("-")
+    assert trace_id == format(span.get_span_context().trace_id, "032x")
+    assert span_id == format(span.get_span_context().span_id, "016x")
+    assert sent["Authorization"] == "Bearer t"
+
+
+def test_disabled_tracing_is_decided_once(monkeypatch):
+    config_module = load("config")
+    built = []
+
+    class CountingConfig(config_module.Config):
+        def __init__(self, **kwargs):
+            built.append(1)
+            super().__init__(**kwargs)
+
+    monkeypatch.setattr(config_module, "Config", CountingConfig)
+    monkeypatch.setenv("TRACE_ENABLED", "false")
+    monkeypatch.setattr(tracing, "_tracer", None)
+    monkeypatch.setattr(tracing, "_tracer_loaded", False)
+
+    assert tracing.get_tracer() is None
+    assert tracing.get_tracer() is None
+    assert len(built) == 1
@@ -3,6 +3,7 @@
 import { Injectable, Logger } from '@nestjs/common';
 import { ConfigService } from '@nestjs/config';
 import axios, { AxiosInstance } from 'axios';
+import { randomBytes } from 'crypto';
 import { CreateAiGatewayDto } from './dto/create-ai-gateway.dto';
 
 @Injectable()
@@ -106,6 +107,16 @@ export class AiGatewayService {
     }
   }
 
+  /**
+   * Создает заголовок W3C traceparent для запроса в ADK
+   * @returns traceparent с новыми trace-id и span-id
+   */
+  private createTraceparent(): string {
+    const traceId = randomBytes(16).toString('hex');
+    const spanId = randomBytes(8).toString('hex');
+    return `00-${traceId}-${spanId}-01`;
+  }
+
   /**
    * Отправляет сообщение в ADK
    * @param message - текст сообщения
@@ -185,10 +196,16 @@ export class AiGatewayService {
         },
       });
 
+      // W3C trace context: агент продолжает этот трейс и передает его в backend
+      const traceparent = this.createTraceparent();
+      this.logger.debug('ADK trace context', { traceparent });
+
       let response;
       let wasNewSessionCreated = false; // Флаг, что была создана новая сессия
       try {
-        response = await this.adkClient.post('/run', payload);
+        response = await this.adkClient.post('/run', payload, {
+          headers: { traceparent },
+        });
         this.logger.debug('ADK request sent successfully');
       } catch (error: any) {
         // Если сессия не найдена, создаем новую
@@ -212,7 +229,9 @@ export class AiGatewayService {
             oldSessionId: sessionId,
           });
           payload.sessionId = newSessionId;
-          response = await this.adkClient.post('/run', payload);
+          response = await this.adkClient.post('/run', payload, {
+            headers: { traceparent },
+          });
         } else {
           throw error;
         }